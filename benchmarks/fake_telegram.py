@@ -0,0 +1,177 @@
+"""
+Локальный фейковый Bot API для тестов и нагрузочных замеров.
+Принимает запросы бота (TELEGRAM_API_URL=http://127.0.0.1:PORT), запоминает их
+и отвечает как Telegram. Может имитировать лимит на чат: слишком частые сообщения
+в один чат получают 429 с retry_after. Умеет слать обновления на webhook бота.
+
+Запуск отдельно: python benchmarks/fake_telegram.py [--port 8090] [--chat-interval 1.0]
+
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from aiohttp import ClientSession, TCPConnector, web
+
+
+MESSAGE_METHODS = ("sendmessage", "editmessagetext")
+
+
+class FakeTelegram:
+    """Фейковый Bot API: методы бота и журнал вызовов"""
+
+    def __init__(self, chat_interval: float = 0.0, retry_after: int = 1):
+        self.chat_interval = chat_interval  # Минимум секунд между сообщениями в чат (0 - без лимита)
+        self.retry_after = retry_after
+        self.calls = []  # [(метод, параметры)]
+        self.flood_errors = 0
+        self._last_sent = {}  # {chat_id: время последнего сообщения}
+        self._message_ids = itertools.count(1)
+        self._runner = None
+        self.url = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запускает сервер, возвращает его адрес для TELEGRAM_API_URL"""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def calls_of(self, method: str) -> list:
+        return [params for name, params in self.calls if name == method.lower()]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method'].lower()
+        params = dict(await request.post())
+        if method in MESSAGE_METHODS and self.chat_interval:
+            chat_id = params.get('chat_id')
+            now = time.monotonic()
+            if now - self._last_sent.get(chat_id, -self.chat_interval) < self.chat_interval:
+                self.flood_errors += 1
+                return web.json_response({
+                    'ok': False,
+                    'error_code': 429,
+                    'description': f"Too Many Requests: retry after {self.retry_after}",
+                    'parameters': {'retry_after': self.retry_after},
+                }, status=429)
+            self._last_sent[chat_id] = now
+        self.calls.append((method, params))
+        return web.json_response({'ok': True, 'result': self.result(method, params)})
+
+    def result(self, method: str, params: dict):
+        if method == "getme":
+            return {'id': 1, 'is_bot': True, 'first_name': 'VVSUle', 'username': 'vvsule_bot'}
+        if method in MESSAGE_METHODS:
+            chat_id = int(params['chat_id'])
+            message_id = int(params['message_id']) if 'message_id' in params else next(self._message_ids)
+            message = {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+                'text': params.get('text', ''),
+            }
+            if 'reply_markup' in params:
+                message['reply_markup'] = json.loads(params['reply_markup'])
+            return message
+        return True
+
+
+def message_update(update_id: int, chat_id: int, text: str) -> dict:
+    """Обновление с текстовым сообщением пользователя"""
+    user = {'id': chat_id, 'is_bot': False, 'first_name': 'Студент'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': user,
+            'text': text,
+        },
+    }
+
+
+def callback_update(update_id: int, chat_id: int, message_id: int, data: str) -> dict:
+    """Обновление с нажатием inline-кнопки"""
+    user = {'id': chat_id, 'is_bot': False, 'first_name': 'Студент'}
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': user,
+            'chat_instance': str(chat_id),
+            'data': data,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'text': 'Расписание',
+            },
+        },
+    }
+
+
+async def send_updates(webhook_url: str, updates: list, secret: str, concurrency: int = 40) -> dict:
+    """
+    Шлет обновления на webhook так, как это делает Telegram (не больше concurrency
+    соединений одновременно). Возвращает коды ответов и пропускную способность.
+    """
+    statuses = {}
+    pending = iter(updates)
+    started = time.monotonic()
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+        async def worker():
+            for update in pending:
+                async with session.post(
+                        webhook_url, json=update,
+                        headers={'X-Telegram-Bot-Api-Secret-Token': secret}
+                ) as response:
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    seconds = time.monotonic() - started
+    return {
+        'updates': len(updates),
+        'seconds': round(seconds, 3),
+        'per_second': round(len(updates) / seconds, 1) if seconds else 0.0,
+        'statuses': statuses,
+    }
+
+
+async def serve(port: int, chat_interval: float):
+    telegram = FakeTelegram(chat_interval=chat_interval)
+    url = await telegram.start(port=port)
+    print(f"Фейковый Bot API: TELEGRAM_API_URL={url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"Запросов: {len(telegram.calls)}, ответов 429: {telegram.flood_errors}")
+    finally:
+        await telegram.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--chat-interval", type=float, default=1.0, help="Секунд между сообщениями в чат")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.chat_interval))
+
+
+if __name__ == "__main__":
+    main()
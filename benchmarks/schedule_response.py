@@ -0,0 +1,91 @@
+"""
+Бенчмарк ответа /api/schedule из кэша.
+Сравнивает прежний путь (json.loads записи + jsonify всего ответа)
+с отдачей готового JSON из StoredSchedule.
+
+Запуск: python benchmarks/schedule_response.py [--weeks 3] [--lessons 30] [--number 2000]
+
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from vvsule.cache_policy import StoredSchedule, serialize_schedule
+
+
+def make_schedule(weeks: int, lessons: int) -> dict:
+    """Расписание примерно того же объема, что у реальной группы"""
+    return {
+        'success': True,
+        'group_name': 'БПИ-25-1',
+        'weeks': [
+            [
+                {
+                    'Дата': f'Понедельник\n{1 + i % 28:02d}.09.2025',
+                    'Время': '09:00 - 10:30',
+                    'Дисциплина': 'Математический анализ и линейная алгебра',
+                    'Аудитория': '1101',
+                    'Преподаватель': 'Иванов Иван Иванович',
+                    'Тип занятия': 'Лекция',
+                    'Ссылка на вебинар': 'https://www.vvsu.ru/webinar/room-42',
+                }
+                for i in range(lessons)
+            ]
+            for _ in range(weeks)
+        ],
+        'parsed_at': datetime.now().isoformat(),
+        'total_weeks': weeks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=3)
+    parser.add_argument("--lessons", type=int, default=30, help="Занятий в неделе")
+    parser.add_argument("--number", type=int, default=2000, help="Запросов на замер")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    blob, weeks_count, blob_hash = serialize_schedule(make_schedule(args.weeks, args.lessons))
+    last_updated = datetime.utcnow()
+    stored = StoredSchedule(blob, last_updated, weeks_count=weeks_count, content_hash=blob_hash)
+
+    def legacy():
+        data = json.loads(blob)
+        return jsonify({
+            'success': True,
+            'schedule': data,
+            'group': 'БПИ-25-1',
+            'weeks_count': len(data.get('weeks', [])),
+            'source': 'cache',
+            'stale': False,
+            'cached_at': last_updated.isoformat()
+        }).get_data()
+
+    def passthrough():
+        return app.response_class(
+            stored.response_bytes('БПИ-25-1', False),
+            mimetype='application/json'
+        ).get_data()
+
+    with app.app_context():
+        assert json.loads(legacy())['schedule'] == json.loads(passthrough())['schedule']
+        legacy_time = min(timeit.repeat(legacy, number=args.number, repeat=3))
+        passthrough_time = min(timeit.repeat(passthrough, number=args.number, repeat=3))
+
+    legacy_us = legacy_time / args.number * 1e6
+    passthrough_us = passthrough_time / args.number * 1e6
+    print(f"Размер записи: {len(stored.body) / 1024:.1f} КБ, недель: {weeks_count}")
+    print(f"json.loads + jsonify: {legacy_us:8.1f} мкс/запрос")
+    print(f"готовый JSON:         {passthrough_us:8.1f} мкс/запрос")
+    print(f"ускорение:            {legacy_us / passthrough_us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
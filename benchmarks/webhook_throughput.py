@@ -0,0 +1,82 @@
+"""
+Бенчмарк пропускной способности webhook.
+Фейковый Telegram шлет обновления на webhook-сервер бота, бот отвечает на каждое
+сообщение через очередь отправки в тот же фейковый Bot API. Обработчик - эхо без БД,
+так что замеряются прием обновлений, диспетчер и исходящие запросы.
+
+Запуск: python benchmarks/webhook_throughput.py [--updates 2000] [--chats 200] [--concurrency 40]
+
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+os.environ.setdefault("BOT_TOKEN", "123:abc")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher, Router, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from benchmarks.fake_telegram import FakeTelegram, message_update, send_updates
+from vvsule.outbound import OutboundDispatcher
+from vvsule.webhook import create_webhook_app
+
+
+SECRET = "benchmark-secret"
+
+
+async def run(updates: int, chats: int, concurrency: int, max_concurrent: int):
+    telegram = FakeTelegram()
+    api_url = await telegram.start()
+
+    bot = Bot(token="123:abc", session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)))
+    outbound = OutboundDispatcher(
+        global_rate=1000, chat_rate=100, chat_burst=10, group_chat_rate=100, max_retries=3
+    )
+    bot.session.middleware(outbound)
+
+    router = Router()
+
+    @router.message()
+    async def echo(message: types.Message):
+        await message.answer(message.text)
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+
+    app = create_webhook_app(dispatcher, bot, path="/webhook", secret=SECRET, max_concurrent=max_concurrent)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    batch = [message_update(i, 1000 + i % chats, f"сообщение {i}") for i in range(1, updates + 1)]
+    try:
+        result = await send_updates(f"http://127.0.0.1:{port}/webhook", batch, SECRET, concurrency)
+    finally:
+        await runner.cleanup()
+        await outbound.close()
+        await bot.session.close()
+        await telegram.stop()
+
+    print(f"Обновлений: {result['updates']} за {result['seconds']} сек ({result['per_second']}/сек)")
+    print(f"Ответы webhook: {result['statuses']}")
+    print(f"Обработка: {app['webhook'].stats()}")
+    print(f"Отправлено в Bot API: {len(telegram.calls_of('sendMessage'))}, очередь: {outbound.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=40, help="Соединений Telegram к webhook")
+    parser.add_argument("--max-concurrent", type=int, default=100, help="WEBHOOK_MAX_CONCURRENT_UPDATES")
+    args = parser.parse_args()
+    asyncio.run(run(args.updates, args.chats, args.concurrency, args.max_concurrent))
+
+
+if __name__ == "__main__":
+    main()
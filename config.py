@@ -1,6 +1,7 @@
 """
 Загружает настройки из .env и предоставляет структурированный доступ.
-Содержит классы для настроек БД, Telegram.
+Содержит классы для настроек БД, Telegram, парсера, кэша расписания, его прогрева,
+ограничения исходящих запросов к Bot API, фоновых задач бота и режима webhook.
 
 """
 import os
@@ -30,12 +31,95 @@ class TelegramConfig:
     token: str
     admin_ids: List[int]
     super_admin: int
+    api_url: str  # Адрес Bot API, пусто - api.telegram.org (для тестов - локальный сервер)
+
+@dataclass
+class ParserConfig:
+    """Конфигурация парсера расписания"""
+    pool_size: int  # Максимум одновременно запущенных браузеров
+    pool_warm_size: int  # Сколько браузеров прогревать при старте
+    driver_max_uses: int  # Перезапуск браузера после N парсингов
+    driver_max_age_minutes: int  # Перезапуск браузера после M минут жизни
+    pool_acquire_timeout: int  # Сколько ждать свободный браузер (сек)
+    extraction_mode: str  # 'script' - таблица одним запросом, 'elements' - поячеечно
+    backend: str  # 'selenium' или 'http' (без браузера)
+    http_fallback: bool  # При ошибке HTTP-бэкенда парсить через Selenium
+    http_timetable_url: str  # Страница расписания для HTTP-бэкенда
+    http_group_param: str  # Имя параметра запроса с группой
+    http_timeout: int  # Таймаут HTTP-запроса (сек)
+    http_connection_limit: int  # Размер пула соединений aiohttp
+    wait_input_timeout: float  # Ожидание поля ввода группы (сек)
+    wait_autocomplete_timeout: float  # Ожидание кнопки группы в автодополнении (сек)
+    wait_schedule_timeout: float  # Ожидание строк расписания после выбора группы (сек)
+    wait_slide_timeout: float  # Ожидание перелистывания недели (сек)
+    wait_table_timeout: float  # Ожидание таблицы активной недели (сек)
+    max_workers: int  # Одновременных парсингов, 0 - по свободной памяти
+    browser_memory_mb: int  # Сколько памяти закладывать на один браузер (МБ)
+    max_weeks: int  # Сколько недель вперед можно смотреть (горизонт расписания)
+    eager_weeks: int  # Сколько недель парсить сразу, остальные - по запросу
+
+@dataclass
+class CacheConfig:
+    """Конфигурация кэша расписания"""
+    soft_ttl: int  # До этого возраста кэш свежий (сек)
+    hard_ttl: int  # До этого возраста устаревший кэш отдается с фоновым обновлением (сек)
+    memory_ttl: int  # Сколько держать расписание в памяти процесса (сек)
+    memory_max_entries: int  # Максимум групп в памяти
+    memory_max_bytes: int  # Максимальный размер кэша в памяти (байт)
+    weather_max_age: int  # Cache-Control max-age и время жизни снимка прогноза для /api/weather (сек)
+    rendered_ttl: int  # Сколько держать готовые сообщения бота с расписанием (сек)
+    rendered_max_entries: int  # Максимум готовых сообщений в памяти
+    rendered_max_bytes: int  # Максимальный размер готовых сообщений в памяти (байт)
+
+@dataclass
+class WarmerConfig:
+    """Конфигурация фонового прогрева кэша"""
+    enabled: bool
+    interval: int  # Период проверки кэша активных групп (сек)
+    active_days: int  # Группа активна, если ее пользователи заходили за N дней
+    refresh_margin: int  # За сколько до мягкого TTL обновлять кэш (сек)
+    peak_hours: tuple  # Часы перед занятиями (местное время), [начало, конец)
+    peak_refresh_age: int  # В часы перед занятиями обновлять кэш старше этого возраста (сек)
+
+@dataclass
+class OutboundConfig:
+    """Конфигурация ограничения исходящих запросов к Bot API"""
+    global_rate: float  # Сообщений в секунду на весь бот
+    chat_rate: float  # Сообщений в секунду в личный чат
+    chat_burst: int  # Сколько сообщений подряд можно отправить в чат без ожидания
+    group_chat_rate: float  # Сообщений в секунду в групповой чат
+    max_retries: int  # Сколько раз повторять запрос после RetryAfter
+
+@dataclass
+class TasksConfig:
+    """Конфигурация фоновых задач обработчиков бота"""
+    max_concurrent: int  # Одновременно выполняемых задач, остальные ждут
+    drain_timeout: float  # Сколько ждать задачи при остановке бота (сек)
+
+@dataclass
+class WebhookConfig:
+    """Конфигурация получения обновлений через webhook"""
+    enabled: bool  # BOT_MODE=webhook, иначе polling
+    url: str  # Публичный адрес балансировщика перед репликами бота
+    path: str  # Путь, на который Telegram присылает обновления
+    secret: str  # Секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+    host: str
+    port: int
+    max_concurrent_updates: int  # Одновременно обрабатываемых обновлений на реплику
+    max_connections: int  # Одновременных соединений Telegram к webhook
+    fsm_redis_url: str  # Общее состояние диалогов для нескольких реплик, пусто - в памяти процесса
 
 @dataclass
 class Config:
     """Основная конфигурация приложения"""
     db: DatabaseConfig
     telegram: TelegramConfig
+    parser: ParserConfig
+    cache: CacheConfig
+    warmer: WarmerConfig
+    outbound: OutboundConfig
+    tasks: TasksConfig
+    webhook: WebhookConfig
     debug: bool
     log_level: str
     
@@ -70,13 +154,99 @@ class Config:
             password=os.getenv("DB_PASSWORD", ""),
         )
         
+        # Parser
+        parser_config = ParserConfig(
+            pool_size=int(os.getenv("PARSER_POOL_SIZE", "2")),
+            pool_warm_size=int(os.getenv("PARSER_POOL_WARM_SIZE", "1")),
+            driver_max_uses=int(os.getenv("PARSER_DRIVER_MAX_USES", "50")),
+            driver_max_age_minutes=int(os.getenv("PARSER_DRIVER_MAX_AGE_MINUTES", "60")),
+            pool_acquire_timeout=int(os.getenv("PARSER_POOL_ACQUIRE_TIMEOUT", "60")),
+            extraction_mode=os.getenv("PARSER_EXTRACTION_MODE", "script").lower(),
+            backend=os.getenv("PARSER_BACKEND", "selenium").lower(),
+            http_fallback=os.getenv("PARSER_HTTP_FALLBACK", "True").lower() == "true",
+            http_timetable_url=os.getenv("PARSER_HTTP_TIMETABLE_URL", "https://www.vvsu.ru/timetable/"),
+            http_group_param=os.getenv("PARSER_HTTP_GROUP_PARAM", "gr"),
+            http_timeout=int(os.getenv("PARSER_HTTP_TIMEOUT", "15")),
+            http_connection_limit=int(os.getenv("PARSER_HTTP_CONNECTION_LIMIT", "10")),
+            wait_input_timeout=float(os.getenv("PARSER_WAIT_INPUT_TIMEOUT", "10")),
+            wait_autocomplete_timeout=float(os.getenv("PARSER_WAIT_AUTOCOMPLETE_TIMEOUT", "5")),
+            wait_schedule_timeout=float(os.getenv("PARSER_WAIT_SCHEDULE_TIMEOUT", "10")),
+            wait_slide_timeout=float(os.getenv("PARSER_WAIT_SLIDE_TIMEOUT", "5")),
+            wait_table_timeout=float(os.getenv("PARSER_WAIT_TABLE_TIMEOUT", "3")),
+            max_workers=int(os.getenv("PARSER_MAX_WORKERS", "0")),
+            browser_memory_mb=int(os.getenv("PARSER_BROWSER_MEMORY_MB", "400")),
+            max_weeks=int(os.getenv("PARSER_MAX_WEEKS", "3")),
+            eager_weeks=int(os.getenv("PARSER_EAGER_WEEKS", "1")),
+        )
+        
+        # Cache
+        cache_config = CacheConfig(
+            soft_ttl=int(os.getenv("SCHEDULE_CACHE_SOFT_TTL", "21600")),
+            hard_ttl=int(os.getenv("SCHEDULE_CACHE_HARD_TTL", "86400")),
+            memory_ttl=int(os.getenv("SCHEDULE_MEMORY_CACHE_TTL", "300")),
+            memory_max_entries=int(os.getenv("SCHEDULE_MEMORY_CACHE_MAX_ENTRIES", "500")),
+            memory_max_bytes=int(os.getenv("SCHEDULE_MEMORY_CACHE_MAX_MB", "64")) * 1024 * 1024,
+            weather_max_age=int(os.getenv("WEATHER_CACHE_MAX_AGE", "1800")),
+            rendered_ttl=int(os.getenv("RENDERED_MESSAGE_CACHE_TTL", "21600")),
+            rendered_max_entries=int(os.getenv("RENDERED_MESSAGE_CACHE_MAX_ENTRIES", "2000")),
+            rendered_max_bytes=int(os.getenv("RENDERED_MESSAGE_CACHE_MAX_MB", "16")) * 1024 * 1024,
+        )
+        
+        # Cache warmer
+        peak_start, peak_end = os.getenv("CACHE_WARMER_PEAK_HOURS", "6-9").split("-")
+        warmer_config = WarmerConfig(
+            enabled=os.getenv("CACHE_WARMER_ENABLED", "True").lower() == "true",
+            interval=int(os.getenv("CACHE_WARMER_INTERVAL", "600")),
+            active_days=int(os.getenv("CACHE_WARMER_ACTIVE_DAYS", "14")),
+            refresh_margin=int(os.getenv("CACHE_WARMER_REFRESH_MARGIN", "1800")),
+            peak_hours=(int(peak_start), int(peak_end)),
+            peak_refresh_age=int(os.getenv("CACHE_WARMER_PEAK_REFRESH_AGE", "10800")),
+        )
+        
+        # Outbound
+        outbound_config = OutboundConfig(
+            global_rate=float(os.getenv("OUTBOUND_GLOBAL_RATE", "30")),
+            chat_rate=float(os.getenv("OUTBOUND_CHAT_RATE", "1")),
+            chat_burst=int(os.getenv("OUTBOUND_CHAT_BURST", "3")),
+            group_chat_rate=int(os.getenv("OUTBOUND_GROUP_CHAT_PER_MINUTE", "20")) / 60,
+            max_retries=int(os.getenv("OUTBOUND_MAX_RETRIES", "3")),
+        )
+        
+        # Bot tasks
+        tasks_config = TasksConfig(
+            max_concurrent=int(os.getenv("BOT_TASKS_MAX_CONCURRENT", "50")),
+            drain_timeout=float(os.getenv("BOT_TASKS_DRAIN_TIMEOUT", "10")),
+        )
+        
+        # Webhook
+        webhook_config = WebhookConfig(
+            enabled=os.getenv("BOT_MODE", "polling").lower() == "webhook",
+            url=os.getenv("WEBHOOK_URL", "").rstrip("/"),
+            path=os.getenv("WEBHOOK_PATH", "/telegram/webhook"),
+            secret=os.getenv("WEBHOOK_SECRET", ""),
+            host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+            port=int(os.getenv("WEBHOOK_PORT", "8081")),
+            max_concurrent_updates=int(os.getenv("WEBHOOK_MAX_CONCURRENT_UPDATES", "100")),
+            max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40")),
+            fsm_redis_url=os.getenv("FSM_REDIS_URL", ""),
+        )
+        if webhook_config.enabled and not webhook_config.secret:
+            raise ValueError("WEBHOOK_SECRET не найден!")
+        
         return cls(
             db=db_config,
             telegram=TelegramConfig(
                 token=token,
                 admin_ids=admin_ids,
-                super_admin=super_admin
+                super_admin=super_admin,
+                api_url=os.getenv("TELEGRAM_API_URL", "").rstrip("/")
             ),
+            parser=parser_config,
+            cache=cache_config,
+            warmer=warmer_config,
+            outbound=outbound_config,
+            tasks=tasks_config,
+            webhook=webhook_config,
             debug=os.getenv("DEBUG", "False").lower() == "true",
             log_level=os.getenv("LOG_LEVEL", "INFO").upper()
         )
@@ -4,20 +4,29 @@
 Также запускает веб-приложение
 
 """
-from flask import Flask, render_template, send_from_directory, jsonify, request
+from flask import Flask, Response, render_template, send_from_directory, jsonify, request, stream_with_context, url_for
 import asyncio
 import threading
 import logging
 import sys
 import os
-import json
-from datetime import datetime
+from datetime import datetime, timezone
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select
-from vvsule.database.models import ScheduleCache
-from vvsule.parser import parse_vvsu_timetable
+from sqlalchemy import select, and_, func, distinct
+from vvsule.database.models import ScheduleCache, Lesson
+from vvsule.lessons import make_lessons, week_blobs
+from vvsule.parser import parse_vvsu_timetable, driver_pool, wait_stats, parse_flight, parse_scheduler, parse_key
+from vvsule.parse_scheduler import Priority
+from vvsule.cache_policy import make_cached_schedule, content_hash, assemble_schedule, week_rows, parsed_content_hash
+from vvsule.schedule_calendar import current_week_key, shift_week, week_keys
+from vvsule.cache_warmer import cache_warmer
+from vvsule.memory_cache import MemoryCache, schedule_memory_cache
+from vvsule.message_cache import rendered_messages, message_digests
+from vvsule.outbound import outbound_dispatcher
+from vvsule.task_manager import task_manager
+from vvsule.schedule_jobs import schedule_jobs, QUEUED, DONE, ERROR
 from vvsule.gismeteo import get_weekly_weather_sync
 from config import config
 from sqlalchemy import create_engine
@@ -51,29 +60,49 @@ except ImportError as e:
 
 
 def get_cached_schedule(group_name: str):
-    """Получение кэшированного расписания из БД"""
+    """Получение свежего кэшированного расписания из БД"""
+    entry = get_cached_schedule_entry(group_name)
+    if entry and not entry.is_stale:
+        return entry.data
+    return None
+
+
+def get_cached_schedule_entry(group_name: str):
+    """Кэш расписания из БД со свежестью (свежий или устаревший), None если истек"""
+    normalized_group = group_name.upper()
+    
+    # Сначала кэш в памяти процесса (общий с ботом)
+    stored = schedule_memory_cache.get(normalized_group)
+    if stored:
+        return make_cached_schedule(stored)
+    
     if not DB_AVAILABLE:
         return None
     
     session = SessionLocal()
-    normalized_group = group_name.upper()
     try:
-        # Ищем кэш в БД
-        cache = session.query(ScheduleCache).filter(
+        # Недели группы от текущей до горизонта вместе с их занятиями
+        keys = week_keys(current_week_key(), config.parser.max_weeks)
+        rows = session.query(
+            ScheduleCache.week_type, ScheduleCache.last_updated, Lesson
+        ).outerjoin(
+            Lesson,
+            and_(Lesson.group_name == ScheduleCache.group_name, Lesson.week_key == ScheduleCache.week_type)
+        ).filter(
             ScheduleCache.group_name == normalized_group,
-            ScheduleCache.week_type == "all_weeks"
-        ).first()
+            ScheduleCache.week_type.in_(keys)
+        ).order_by(ScheduleCache.week_type, Lesson.position).all()
         
-        if cache:
-            # Проверяем, не устарели ли данные
-            time_diff = datetime.utcnow() - cache.last_updated
-            if time_diff.total_seconds() < 21600:  # 6 часов
-                try:
-                    data = json.loads(cache.schedule_data)
-                    logging.info(f"Загружен кэш для {normalized_group}: {len(data.get('weeks', []))} недель")
-                    return data
-                except Exception as e:
-                    logging.error(f"Ошибка при загрузке кэша: {e}")
+        stored = assemble_schedule(normalized_group, week_blobs(rows))
+        if stored:
+            schedule_memory_cache.put(normalized_group, stored, size=stored.size)
+            entry = make_cached_schedule(stored)
+            if entry:
+                logging.info(
+                    f"Загружен кэш для {normalized_group}: {stored.weeks_count} недель"
+                    f" ({entry.state}, {int(entry.age_seconds)} сек)"
+                )
+                return entry
         
         logging.info(f"Кэш для {normalized_group} не найден или устарел")
         return None
@@ -86,34 +115,50 @@ def get_cached_schedule(group_name: str):
 
 
 def save_schedule_cache(group_name: str, schedule_data: dict):
-    """Сохранение расписания в кэш (синхронная версия)"""
+    """Сохранение распарсенных недель в кэш (синхронная версия): строка недели и ее занятия в lessons"""
     if not DB_AVAILABLE:
         return
     
+    rows = week_rows(schedule_data)
+    if not rows:
+        return
+    
     session = SessionLocal()
     normalized_group = group_name.upper()
     try:
-        # Ищем существующий кэш
-        cache = session.query(ScheduleCache).filter(
-            ScheduleCache.group_name == normalized_group,
-            ScheduleCache.week_type == "all_weeks"
-        ).first()
-        
-        if cache:
-            cache.schedule_data = json.dumps(schedule_data, ensure_ascii=False)
-            cache.last_updated = datetime.utcnow()
-            logging.info(f"Обновлен кэш для {normalized_group}")
-        else:
-            cache = ScheduleCache(
-                group_name=normalized_group,
-                week_type="all_weeks",
-                schedule_data=json.dumps(schedule_data, ensure_ascii=False)
+        keys = [key for key, _lessons, _hash in rows]
+        existing = {
+            cache.week_type: cache
+            for cache in session.query(ScheduleCache).filter(
+                ScheduleCache.group_name == normalized_group,
+                ScheduleCache.week_type.in_(keys)
             )
-            session.add(cache)
-            logging.info(f"Создан новый кэш для {normalized_group}")
+        }
+        # Занятия недель заменяются целиком
+        session.query(Lesson).filter(
+            Lesson.group_name == normalized_group,
+            Lesson.week_key.in_(keys)
+        ).delete(synchronize_session=False)
+        
+        for key, lessons, lessons_hash in rows:
+            cache = existing.get(key)
+            if cache:
+                cache.schedule_data = None
+                cache.weeks_count = 1
+                cache.content_hash = lessons_hash
+                cache.last_updated = datetime.utcnow()
+            else:
+                session.add(ScheduleCache(
+                    group_name=normalized_group,
+                    week_type=key,
+                    weeks_count=1,
+                    content_hash=lessons_hash
+                ))
+            session.add_all(make_lessons(normalized_group, key, lessons))
         
         session.commit()
-        logging.info(f"Кэш сохранен для {normalized_group}")
+        schedule_memory_cache.invalidate(normalized_group)
+        logging.info(f"Кэш сохранен для {normalized_group}: недели {', '.join(keys)}")
         
     except Exception as e:
         logging.error(f"Ошибка при сохранении кэша: {e}")
@@ -122,6 +167,98 @@ def save_schedule_cache(group_name: str, schedule_data: dict):
         session.close()
 
 
+def parse_and_save_schedule(group_name: str, on_progress=None, start_week: int = 0, max_weeks: int = None):
+    """
+    Парсинг недель с сохранением в кэш (выполняется воркером планировщика).
+    По умолчанию - только ближайшие недели (PARSER_EAGER_WEEKS).
+    """
+    schedule_data = parse_vvsu_timetable(
+        group_name, on_progress=on_progress,
+        start_week=start_week, max_weeks=max_weeks or config.parser.eager_weeks
+    )
+    if schedule_data and schedule_data.get('success'):
+        save_schedule_cache(group_name, schedule_data)
+    return schedule_data
+
+
+def parse_and_cache_schedule(group_name: str, start_week: int = 0, max_weeks: int = None):
+    """Парсинг в очереди планировщика с ожиданием результата"""
+    return parse_scheduler.run(
+        parse_and_save_schedule, group_name, start_week=start_week, max_weeks=max_weeks,
+        key=parse_key(group_name, start_week), progress=True
+    )
+
+
+def refresh_schedule_in_background(group_name: str, weeks: int = None):
+    """Фоновое обновление устаревшего кэша, weeks недель с текущей (ответ пользователю не ждет)"""
+    if parse_flight.in_flight(group_name):
+        return
+    logging.info(f"🔄 Фоновое обновление кэша для {group_name}")
+    parse_scheduler.submit(
+        parse_and_save_schedule, group_name, max_weeks=weeks, key=group_name, priority=Priority.WARM, progress=True
+    )
+
+
+def load_week(group_name: str, week_index: int):
+    """Парсинг одной недели (week_index недель после текущей) с ожиданием результата"""
+    return parse_flight.do(parse_key(group_name, week_index), parse_and_cache_schedule, group_name, week_index, 1)
+
+
+def prefetch_week(group_name: str, week_index: int):
+    """Заранее загружает неделю, к которой пользователь, скорее всего, перейдет"""
+    key = parse_key(group_name, week_index)
+    if week_index >= config.parser.max_weeks or parse_flight.in_flight(key):
+        return
+    parse_scheduler.submit(
+        parse_and_save_schedule, group_name, start_week=week_index, max_weeks=1,
+        key=key, priority=Priority.WARM, progress=True
+    )
+
+
+def start_schedule_job(group_name: str):
+    """Ставит парсинг группы в очередь и возвращает задачу, в которую пишется его ход"""
+    job, created = schedule_jobs.get_or_create(group_name)
+    if not created:
+        return job
+
+    # Парсинг группы мог уже идти (бот, фоновое обновление) - тогда подписываемся на него
+    parse_job = parse_scheduler.submit(parse_and_save_schedule, group_name, key=group_name, progress=True)
+    info = parse_scheduler.queue_info(group_name) or {}
+    job.publish(QUEUED, position=info.get('position'), eta_seconds=info.get('eta_seconds'))
+    parse_job.subscribe(job.publish)
+    parse_job.future.add_done_callback(lambda future: finish_schedule_job(job, future))
+    return job
+
+
+def finish_schedule_job(job, future):
+    """Публикует результат парсинга в задачу"""
+    try:
+        schedule_data = future.result()
+    except Exception as e:
+        logging.error(f"Ошибка парсинга {job.group_name}: {e}")
+        job.publish(ERROR, message=f'Ошибка при загрузке расписания: {e}')
+        return
+
+    if schedule_data and schedule_data.get('success'):
+        job.publish(DONE, **parser_payload(job.group_name, schedule_data))
+    else:
+        error_msg = schedule_data.get('error', 'Неизвестная ошибка') if schedule_data else 'Ошибка парсинга'
+        job.publish(ERROR, message=f'Ошибка при загрузке расписания: {error_msg}')
+
+
+def parser_payload(group_name: str, schedule_data: dict) -> dict:
+    """Ответ /api/schedule для только что распарсенного расписания"""
+    return {
+        'success': True,
+        'schedule': schedule_data,
+        'group': group_name,
+        'weeks_count': len(schedule_data.get('weeks', [])),
+        'max_weeks': config.parser.max_weeks,
+        'source': 'parser',
+        'stale': False
+    }
+
+
 def run_bot():
     """Запускает бота в отдельном потоке"""
     import asyncio
@@ -145,6 +282,23 @@ def run_webapp():
     app.run(host="localhost", port=5000, debug=True, use_reloader=False)
 
 
+def cacheable_response(body: bytes, etag: str, last_modified: datetime = None, max_age: int = 0):
+    """
+    JSON-ответ с ETag, Last-Modified и Cache-Control.
+    На If-None-Match / If-Modified-Since отвечает 304 без тела.
+    ETag слабый: он считается по содержимому, а метаданные ответа
+    (время кэширования, число недель, время прогноза) в него не входят.
+    """
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, max_age)
+    response.cache_control.must_revalidate = True
+    return response.make_conditional(request)
+
+
 @app.route("/")  
 def web():  
     return render_template('index.html')  
@@ -175,16 +329,23 @@ def get_schedule():
         })
 
     # Проверяем кэш
-    cached_data = get_cached_schedule(normalized_group)
+    cached = get_cached_schedule_entry(normalized_group)
     
-    if cached_data:
-        return jsonify({
-            'success': True,
-            'schedule': cached_data,
-            'group': normalized_group,
-            'weeks_count': len(cached_data.get('weeks', [])),
-            'source': 'cache'
-        })
+    if cached:
+        # Устаревший кэш отдаем сразу, а расписание обновляем в фоне
+        if cached.is_stale and PARSER_AVAILABLE:
+            refresh_schedule_in_background(normalized_group, cached.stored.weeks_count)
+
+        # Готовый JSON из кэша отдаем без разбора и повторной сериализации
+        etag = cached.stored.content_hash + ('-stale' if cached.is_stale else '')
+        # Свежий кэш браузер может хранить до мягкого TTL, устаревший - всегда перепроверять
+        max_age = 0 if cached.is_stale else int(config.cache.soft_ttl - cached.age_seconds)
+        return cacheable_response(
+            cached.stored.response_bytes(normalized_group, cached.is_stale),
+            etag=etag,
+            last_modified=cached.stored.modified_at,
+            max_age=max_age
+        )
 
     if not PARSER_AVAILABLE:
         return jsonify({
@@ -193,23 +354,36 @@ def get_schedule():
             'source': 'error'
         })
     
+    if not request.args.get('wait'):
+        # Не держим поток до конца парсинга: клиент следит за задачей через SSE
+        job = start_schedule_job(normalized_group)
+        response = jsonify({
+            'success': True,
+            'pending': True,
+            'job_id': job.id,
+            'group': normalized_group,
+            'status': job.snapshot()['state'],
+            'events_url': url_for('schedule_job_events', job_id=job.id),
+            'status_url': url_for('schedule_job_status', job_id=job.id),
+            'source': 'job'
+        })
+        response.status_code = 202
+        response.headers['Location'] = url_for('schedule_job_status', job_id=job.id)
+        response.cache_control.no_store = True
+        return response
+
     try:
-        # Используем существующую функцию парсинга
-        schedule_data = parse_vvsu_timetable(normalized_group)
+        # ?wait=1: ждем парсинг в запросе; одновременные запросы группы ждут один общий парсинг
+        schedule_data = parse_flight.do(normalized_group, parse_and_cache_schedule, normalized_group)
         
         if schedule_data and schedule_data.get('success'):
-            # Сохраняем в кэш
-            save_schedule_cache(normalized_group, schedule_data)
-
-            weeks = schedule_data.get('weeks', [])
-
-            return jsonify({
-                'success': True,
-                'schedule': schedule_data,
-                'group': normalized_group,
-                'weeks_count': len(weeks),
-                'source': 'parser'
-            })
+            response = jsonify(parser_payload(normalized_group, schedule_data))
+            # ETag собирается так же, как у записи кэша, чтобы следующий запрос получил 304
+            etag = parsed_content_hash(normalized_group, schedule_data)
+            if etag:
+                response.set_etag(etag, weak=True)
+            response.cache_control.no_cache = True
+            return response
         else:
             error_msg = schedule_data.get('error', 'Неизвестная ошибка') if schedule_data else 'Ошибка парсинга'
             logging.error(f"Ошибка парсинга: {error_msg}")
@@ -229,6 +403,91 @@ def get_schedule():
         })
 
 
+@app.route('/api/schedule/week', methods=['GET'])
+def get_schedule_week():
+    """Одна неделя расписания (offset недель после текущей): дальние недели парсятся по запросу"""
+    normalized_group = request.args.get('group', '').strip().upper()
+    try:
+        offset = int(request.args.get('offset', '0'))
+    except ValueError:
+        offset = -1
+    
+    if not normalized_group or not 0 <= offset < config.parser.max_weeks:
+        return jsonify({
+            'success': False,
+            'message': 'Не указана группа или неделя вне горизонта'
+        })
+    
+    week = shift_week(current_week_key(), offset)
+    cached = get_cached_schedule_entry(normalized_group)
+    lessons = cached.stored.index.week(week) if cached else None
+    if lessons is not None:
+        source = 'cache'
+    elif not PARSER_AVAILABLE:
+        return jsonify({
+            'success': False,
+            'message': 'Парсер недоступен',
+            'source': 'error'
+        })
+    else:
+        try:
+            result = load_week(normalized_group, offset)
+        except Exception as e:
+            logging.error(f"Ошибка парсинга недели в веб-приложении: {e}", exc_info=True)
+            result = {'success': False, 'error': str(e)}
+        if not result or not result.get('success'):
+            error_msg = result.get('error', 'Неизвестная ошибка') if result else 'Ошибка парсинга'
+            return jsonify({
+                'success': False,
+                'message': f'Ошибка при загрузке недели: {error_msg}',
+                'source': 'error'
+            })
+        lessons = (result.get('weeks') or [[]])[0]
+        source = 'parser'
+    
+    # Пока пользователь смотрит неделю, загружаем следующую
+    if PARSER_AVAILABLE and not (cached and cached.stored.index.week(shift_week(week, 1)) is not None):
+        prefetch_week(normalized_group, offset + 1)
+    
+    return jsonify({
+        'success': True,
+        'group': normalized_group,
+        'offset': offset,
+        'week_key': week,
+        'lessons': lessons,
+        'max_weeks': config.parser.max_weeks,
+        'source': source
+    })
+
+
+@app.route('/api/schedule/jobs/<job_id>', methods=['GET'])
+def schedule_job_status(job_id):
+    """Состояние задачи загрузки расписания"""
+    job = schedule_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Задача не найдена'}), 404
+    return jsonify(job.snapshot())
+
+
+@app.route('/api/schedule/jobs/<job_id>/events', methods=['GET'])
+def schedule_job_events(job_id):
+    """Ход загрузки расписания потоком Server-Sent Events"""
+    job = schedule_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Задача не найдена'}), 404
+
+    # При переподключении EventSource присылает номер последнего полученного события
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        last_id = 0
+
+    response = Response(stream_with_context(job.stream(last_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx не должен буферизовать поток
+    return response
+
+
 @app.route('/api/cache/stats', methods=['GET'])
 def cache_stats():
     """Статистика кэша"""
@@ -239,19 +498,21 @@ def cache_stats():
         })
     
     session = SessionLocal()
-    normalized_group = group_name.upper()
     try:
-        total_cache = session.query(ScheduleCache).count()
+        # В schedule_cache строка на каждую неделю группы
+        total_cache = session.query(func.count(distinct(ScheduleCache.group_name))).scalar()
         
         # Группы в кэше
-        groups = session.query(ScheduleCache.normalized_group).distinct().all()
+        groups = session.query(ScheduleCache.group_name).distinct().all()
         groups_list = [g[0] for g in groups]
         
         return jsonify({
             'success': True,
             'total_cached_groups': total_cache,
             'cached_groups': groups_list,
-            'db_available': DB_AVAILABLE
+            'db_available': DB_AVAILABLE,
+            'memory': schedule_memory_cache.stats(),
+            'rendered_messages': rendered_messages.stats()
         })
     except Exception as e:
         logging.error(f"Ошибка при получении статистики кэша: {e}")
@@ -263,12 +524,65 @@ def cache_stats():
         session.close()
 
 
+@app.route('/api/parser/stats', methods=['GET'])
+def parser_stats():
+    """Статистика пула браузеров, ожиданий, объединения запросов и очереди парсера"""
+    return jsonify({
+        'success': True,
+        'driver_pool': driver_pool.stats(),
+        'waits': wait_stats.snapshot(),
+        'coalescing': parse_flight.stats(),
+        'scheduler': parse_scheduler.stats(),
+        'warmer': cache_warmer.stats(),
+        'jobs': schedule_jobs.stats()
+    })
+
+
+@app.route('/api/bot/stats', methods=['GET'])
+def bot_stats():
+    """Статистика бота: очередь отправки, пропущенные правки и фоновые задачи"""
+    return jsonify({
+        'success': True,
+        'outbound': outbound_dispatcher.stats(),
+        'messages': message_digests.stats(),
+        'tasks': task_manager.stats()
+    })
+
+
+WEATHER_VOLATILE_FIELDS = ('updated_at',)  # Меняются при каждом запросе к API, в ETag не входят
+WEATHER_SNAPSHOT_MAX_BYTES = 1024 * 1024
+
+# Последний успешный прогноз: API (и случайные демо-данные) вызывается не чаще раза в weather_max_age
+weather_snapshots = MemoryCache(max_entries=1, max_bytes=WEATHER_SNAPSHOT_MAX_BYTES, ttl=config.cache.weather_max_age)
+
+
+def get_weather_snapshot():
+    """(тело, ETag, время получения, успех) прогноза погоды - из снимка или свежий"""
+    snapshot = weather_snapshots.get('weather')
+    if snapshot is not None:
+        return snapshot
+
+    weather_data = get_weekly_weather_sync()
+    body = app.json.dumps(weather_data).encode('utf-8')
+    stable = {key: value for key, value in weather_data.items() if key not in WEATHER_VOLATILE_FIELDS}
+    success = bool(weather_data.get('success'))
+    snapshot = (body, content_hash(app.json.dumps(stable)), datetime.utcnow(), success)
+    if success:
+        weather_snapshots.put('weather', snapshot, size=len(body))
+    return snapshot
+
+
 @app.route('/api/weather', methods=['GET'])
 def get_weather():
     """API endpoint для получения погоды во Владивостоке"""
     try:
-        weather_data = get_weekly_weather_sync()
-        return jsonify(weather_data)
+        body, etag, fetched_at, success = get_weather_snapshot()
+        return cacheable_response(
+            body,
+            etag=etag,
+            last_modified=fetched_at,
+            max_age=config.cache.weather_max_age if success else 0
+        )
     except Exception as e:
         logging.error(f"Ошибка при получении погоды: {e}")
         return jsonify({
@@ -278,6 +592,14 @@ def get_weather():
 
 
 if __name__ == "__main__":
+    # Прогреваем браузеры заранее, чтобы первый запрос не ждал запуска Firefox
+    warm_thread = threading.Thread(
+        target=driver_pool.warm_up,
+        args=(config.parser.pool_warm_size,),
+        daemon=True
+    )
+    warm_thread.start()
+
     web_thread = threading.Thread(target=run_webapp, daemon=True)
     web_thread.start()
     
@@ -1,36 +1,61 @@
 """Фоновые задачи для парсинга расписания"""
 
 import asyncio
+import json
 import logging
+from datetime import timedelta
 from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
 from aiogram.types import InlineKeyboardMarkup
 from vvsule.database.crud import crud
 from vvsule.database.database import database
-from vvsule.parser import parse_vvsu_timetable
-from vvsule.keyboards import get_schedule_keyboard
+from config import config
+from vvsule.parser import parse_vvsu_timetable, parse_flight, parse_scheduler, parse_key, WeekStream
+from vvsule.parse_scheduler import Priority
+from vvsule.keyboards import get_schedule_keyboard, get_day_keyboard
+from vvsule.cache_policy import content_hash, week_rows
+from vvsule.message_cache import RenderedMessage, message_key, rendered_messages
+from vvsule.group_directory import group_directory
+from vvsule.outbound import OutboundPriority, sending_priority
+from vvsule.schedule_calendar import (
+    ScheduleIndex, current_date, current_week_key, shift_week, week_key, week_monday, weeks_between
+)
 from vvsule.user_state import get_user_week_position, update_user_week_position, set_user_week_position
 
 
+QUEUE_NOTICE_DELAY = 1.0  # Через сколько секунд ожидания показать место в очереди
+
+DAY_NAMES = ("понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье")
+
+_refresh_tasks = set()  # Фоновые обновления устаревшего кэша и предзагрузка недель
+
+
 async def parse_and_send_schedule(bot: Bot, chat_id: int, group_name: str, user_id: int, 
-                                  week_type: str, offset: int, message_id: int = None):
-    """Фоновая задача парсинга и отправки/редактирования расписания"""
+                                  week_type: str, offset: int, message_id: int = None, week: str = None):
+    """
+    Фоновая задача парсинга и отправки/редактирования расписания.
+    week - ключ нужной недели из callback data; без него неделя считается
+    по сохраненной позиции пользователя (кнопки старого формата).
+    """
     try:
         normalized_group = group_name.upper()
 
         logging.info(f"=== НАЧАЛО фонового парсинга для {normalized_group} ===")
         
         # Сначала проверяем кэш
-        cached_schedule = None
+        cached = None
         async for session in database.get_session():
             logging.info(f"Проверяю кэш для группы {normalized_group}")
-            cached_schedule = await crud.get_cached_schedule(
+            cached = await crud.get_cached_schedule_entry(
                 session=session,
                 group_name=normalized_group,
                 week_type="all_weeks"
             )
             
-            if cached_schedule:
-                logging.info(f"Найден кэш для {normalized_group}: {len(cached_schedule.get('weeks', []))} недель")
+            if cached:
+                logging.info(
+                    f"Найден кэш для {normalized_group}: {len(cached.data.get('weeks', []))} недель ({cached.state})"
+                )
             else:
                 logging.info(f"Кэш для {normalized_group} не найден")
             
@@ -44,33 +69,42 @@ async def parse_and_send_schedule(bot: Bot, chat_id: int, group_name: str, user_
                     group_name=normalized_group
                 )
         
-        all_weeks_data = cached_schedule
+        all_weeks_data = cached.data if cached else None
+        is_stale = bool(cached and cached.is_stale)
+        
+        # Устаревший кэш показываем сразу, а расписание обновляем в фоне
+        if is_stale:
+            refresh_schedule_in_background(normalized_group, cached.stored.weeks_count)
         
         if not all_weeks_data:
-            logging.info(f"Начинаю парсинг ВСЕХ недель для {normalized_group}")
-            # Парсим расписание
-            loop = asyncio.get_event_loop()
-            all_weeks_data = await loop.run_in_executor(
-                None, parse_vvsu_timetable, normalized_group
-            )
-            
-            if all_weeks_data:
-                logging.info(f"Парсинг завершен: {len(all_weeks_data.get('weeks', []))} недель")
+            # Сообщение "Загрузка..." только когда расписание придется парсить
+            if message_id:
+                await send_or_edit_schedule_message(
+                    bot=bot,
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    text=f"⏳ Загружаю расписание для группы <b>{normalized_group}</b>...\n"
+                         f"⏰ Это может занять некоторое время",
+                    keyboard=None
+                )
             
-            # Сохраняем в кэш если успешно
-            if all_weeks_data and all_weeks_data.get('success') is True:
-                logging.info(f"Сохраняю в кэш для {normalized_group}")
-                async for session in database.get_session():
-                    try:
-                        await crud.save_schedule_cache(
-                            session=session,
-                            group_name=normalized_group,
-                            week_type="all_weeks",
-                            schedule_data=all_weeks_data
-                        )
-                        logging.info(f"Кэш сохранен: {len(all_weeks_data.get('weeks', []))} недель")
-                    except Exception as e:
-                        logging.error(f"Ошибка при сохранении в кэш: {e}")
+            # Если группу уже парсят (другой пользователь или сайт), ждем тот же парсинг
+            weeks_stream = WeekStream()
+            parse_task = asyncio.ensure_future(parse_flight.do_async(
+                normalized_group, parse_and_cache_schedule, normalized_group,
+                Priority.INTERACTIVE, weeks_stream.on_progress
+            ))
+            parse_task.add_done_callback(weeks_stream.finish_task)
+            done, _ = await asyncio.wait({parse_task}, timeout=QUEUE_NOTICE_DELAY)
+            if not done and message_id:
+                await show_queue_position(bot, chat_id, message_id, normalized_group)
+            if not done and week_type == "current":
+                # Текущую неделю показываем сразу, остальные дождемся в том же сообщении
+                message_id = await show_first_week(
+                    bot, chat_id, message_id, normalized_group, weeks_stream, parse_task,
+                    max_weeks=config.parser.eager_weeks
+                )
+            all_weeks_data = await parse_task
         
         # Проверяем результат
         if not all_weeks_data:
@@ -122,42 +156,52 @@ async def parse_and_send_schedule(bot: Bot, chat_id: int, group_name: str, user_
                 await bot.send_message(chat_id, error_text, parse_mode="HTML")
             return
         
-        # Определяем индекс недели
-        week_index = calculate_week_index(week_type, offset, total_weeks, user_id, normalized_group)
+        # Недели ищутся по календарю, а не по позиции в результате парсинга
+        index = cached.stored.index if cached else ScheduleIndex.from_schedule(all_weeks_data)
         
-        logging.info(f"Выбираю неделю {week_index + 1} из {total_weeks}")
+        # Листать можно на весь горизонт, даже если дальние недели еще не загружены
+        horizon = max(config.parser.max_weeks, total_weeks)
         
-        # Берем нужную неделю
-        if 0 <= week_index < total_weeks:
-            schedule_data = weeks[week_index]
-            logging.info(f"Занятий в неделе {week_index + 1}: {len(schedule_data)}")
+        # Определяем индекс недели (смещение от текущей)
+        this_week = current_week_key()
+        if week and week_type != "current":
+            week_index = min(max(weeks_between(this_week, week), 0), horizon - 1)
         else:
-            schedule_data = []
-            logging.warning(f"Неделя {week_index + 1} не найдена")
+            week_index = calculate_week_index(week_type, offset, horizon, user_id, normalized_group)
+        week = shift_week(this_week, week_index)
         
-        # Форматируем расписание
-        schedule_text = format_schedule_for_telegram(schedule_data)
-        week_name = get_week_name_with_number(week_type, offset, week_index, total_weeks)
+        logging.info(f"Выбираю неделю {week} ({week_index + 1} из {horizon})")
         
-        response_text = (
-            f"Расписание для группы <b>{normalized_group}</b>\n"
-            f"{week_name}\n"
-            f"Неделя {week_index + 1} из {total_weeks}\n\n"
-            f"{schedule_text}"
-        )
+        # Берем нужную неделю
+        schedule_data = index.week(week)
+        if schedule_data is not None:
+            logging.info(f"Занятий в неделе {week}: {len(schedule_data)}")
+        else:
+            # Дальние недели парсятся только когда к ним переходят
+            schedule_data = await load_week(normalized_group, week_index)
+            if schedule_data is None:
+                schedule_data = []
+                logging.warning(f"Неделя {week} не найдена")
         
-        # Создаем клавиатуру
-        keyboard = get_schedule_keyboard(normalized_group, week_type)
+        # Пока пользователь читает неделю, загружаем следующую
+        if week_index + 1 < horizon and index.week(shift_week(this_week, week_index + 1)) is None:
+            prefetch_week(normalized_group, week_index + 1)
         
-        logging.info(f"Подготавливаю сообщение ({len(response_text)} символов)")
+        # Готовое сообщение из кэша (хэш недели из записи кэша считается один раз)
+        week_hash = cached.stored.week_hash(week) if cached else None
+        group_id = await group_directory.resolve_id(normalized_group)
+        message = render_week_message(
+            normalized_group, week, schedule_data, week_type, week_index, horizon, is_stale, week_hash, group_id
+        )
         
         # Отправляем или редактируем сообщение
         await send_or_edit_schedule_message(
             bot=bot,
             chat_id=chat_id,
             message_id=message_id,
-            text=response_text,
-            keyboard=keyboard
+            text=message.parts[0],
+            keyboard=message.keyboard,
+            parts=message.parts
         )
         
         logging.info(f"=== УСПЕШНО завершено для {normalized_group} ===")
@@ -179,13 +223,247 @@ async def parse_and_send_schedule(bot: Bot, chat_id: int, group_name: str, user_
             logging.error(f"Не удалось отправить сообщение об ошибке: {send_error}")
 
 
+async def send_day_schedule(bot: Bot, chat_id: int, group_name: str, day_offset: int, message_id: int = None):
+    """
+    Расписание на один день (0 - сегодня, 1 - завтра).
+    День берется из индекса кэша (память или один запрос к БД),
+    если его неделя не загружена - парсится только она.
+    """
+    normalized_group = group_name.upper()
+    day = current_date() + timedelta(days=day_offset)
+    try:
+        cached = None
+        async for session in database.get_session():
+            cached = await crud.get_cached_schedule_entry(
+                session=session,
+                group_name=normalized_group,
+                week_type="all_weeks"
+            )
+        
+        if cached and cached.is_stale:
+            refresh_schedule_in_background(normalized_group, cached.stored.weeks_count)
+        
+        keyboard = get_day_keyboard(normalized_group, await group_directory.resolve_id(normalized_group))
+        lessons = cached.stored.index.day(day) if cached else None
+        if lessons is None:
+            logging.info(f"День {day} для {normalized_group} не в кэше, парсю одну неделю")
+            week = week_key(day)
+            week_lessons = await load_week(normalized_group, weeks_between(current_week_key(), week))
+            if week_lessons is None:
+                await send_or_edit_schedule_message(
+                    bot=bot,
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    text=f"❌ Не удалось загрузить расписание группы {normalized_group}",
+                    keyboard=keyboard
+                )
+                return
+            lessons = ScheduleIndex({week: week_lessons}).day(day)
+        
+        await send_or_edit_schedule_message(
+            bot=bot,
+            chat_id=chat_id,
+            message_id=message_id,
+            text=format_day_for_telegram(normalized_group, day, day_offset, lessons),
+            keyboard=keyboard
+        )
+    except Exception as e:
+        logging.error(f"Ошибка при отправке расписания на день: {e}", exc_info=True)
+        try:
+            await bot.send_message(chat_id, "❌ Произошла ошибка при загрузке расписания", parse_mode="HTML")
+        except Exception as send_error:
+            logging.error(f"Не удалось отправить сообщение об ошибке: {send_error}")
+
+
+async def parse_and_cache_schedule(normalized_group: str, priority: Priority = Priority.INTERACTIVE,
+                                   on_progress=None, start_week: int = 0, max_weeks: int = None):
+    """
+    Парсинг недель группы с сохранением в кэш.
+    По умолчанию - только ближайшие недели (PARSER_EAGER_WEEKS), остальные загружает load_week.
+    """
+    max_weeks = max_weeks or config.parser.eager_weeks
+    logging.info(f"Начинаю парсинг {max_weeks} недель с +{start_week} для {normalized_group}")
+    all_weeks_data = await parse_scheduler.run_async(
+        parse_vvsu_timetable, normalized_group, start_week=start_week, max_weeks=max_weeks,
+        key=parse_key(normalized_group, start_week), priority=priority,
+        progress=True, on_progress=on_progress
+    )
+    
+    if all_weeks_data:
+        logging.info(f"Парсинг завершен: {len(all_weeks_data.get('weeks', []))} недель")
+    
+    # Сохраняем в кэш если успешно
+    if all_weeks_data and all_weeks_data.get('success') is True:
+        prerender_weeks(normalized_group, all_weeks_data, await group_directory.resolve_id(normalized_group))
+        logging.info(f"Сохраняю в кэш для {normalized_group}")
+        async for session in database.get_session():
+            try:
+                await crud.save_schedule_cache(
+                    session=session,
+                    group_name=normalized_group,
+                    week_type="all_weeks",
+                    schedule_data=all_weeks_data
+                )
+                logging.info(f"Кэш сохранен: {len(all_weeks_data.get('weeks', []))} недель")
+            except Exception as e:
+                logging.error(f"Ошибка при сохранении в кэш: {e}")
+    
+    return all_weeks_data
+
+
+def render_week_message(normalized_group: str, week: str, lessons: list, week_type: str, week_index: int,
+                        horizon: int, is_stale: bool = False, week_hash: str = None,
+                        group_id: int = None) -> RenderedMessage:
+    """
+    Сообщение с расписанием недели: из кэша готовых сообщений или форматирование с сохранением.
+    group_id - id группы для компактных кнопок (без него кнопки в старом формате).
+    """
+    if week_hash is None:
+        week_hash = content_hash(json.dumps(lessons, ensure_ascii=False))
+    key = message_key(
+        normalized_group, week, week_hash, f"{week_type}:{week_index}:{horizon}:{int(is_stale)}:{group_id}"
+    )
+    message = rendered_messages.get(key)
+    if message:
+        return message
+    
+    week_name = get_week_name_with_number(week_type, 0, week_index, horizon, week)
+    response_text = (
+        f"Расписание для группы <b>{normalized_group}</b>\n"
+        f"{week_name}\n"
+        f"Неделя {week_index + 1} из {horizon}\n\n"
+        f"{format_schedule_for_telegram(lessons)}"
+    )
+    if is_stale:
+        response_text += "\n\n🔄 Показано сохраненное расписание, обновляю его"
+    
+    message = RenderedMessage(
+        parts=split_message(response_text),
+        keyboard=get_schedule_keyboard(normalized_group, week_type, week, group_id)
+    )
+    rendered_messages.put(key, message, size=message.size)
+    logging.info(f"Подготовлено сообщение {week} для {normalized_group} ({len(response_text)} символов)")
+    return message
+
+
+def prerender_weeks(normalized_group: str, schedule_data: dict, group_id: int = None):
+    """Готовит сообщения распарсенных недель в том виде, в каком к ним обычно переходят"""
+    this_week = current_week_key()
+    horizon = config.parser.max_weeks
+    for week, lessons, week_hash in week_rows(schedule_data):
+        week_index = weeks_between(this_week, week)
+        if 0 <= week_index < horizon:
+            week_type = "current" if week_index == 0 else "next"
+            render_week_message(
+                normalized_group, week, lessons, week_type, week_index, horizon, False, week_hash, group_id
+            )
+
+
+def refresh_schedule_in_background(normalized_group: str, weeks: int = None):
+    """Запускает фоновое обновление устаревшего кэша группы (weeks недель с текущей)"""
+    if parse_flight.in_flight(normalized_group):
+        return
+    logging.info(f"🔄 Фоновое обновление кэша для {normalized_group}")
+    _run_in_background(parse_flight.do_async(
+        normalized_group, parse_and_cache_schedule, normalized_group, Priority.WARM, None, 0, weeks
+    ))
+
+
+async def load_week(normalized_group: str, week_index: int, priority: Priority = Priority.INTERACTIVE):
+    """Парсит одну неделю (week_index недель после текущей) с сохранением в кэш; None при ошибке"""
+    result = await parse_flight.do_async(
+        parse_key(normalized_group, week_index), parse_and_cache_schedule,
+        normalized_group, priority, None, week_index, 1
+    )
+    if not result or result.get('success') is not True:
+        return None
+    weeks = result.get('weeks', [])
+    return weeks[0] if weeks else []
+
+
+def prefetch_week(normalized_group: str, week_index: int):
+    """Заранее загружает неделю, к которой пользователь, скорее всего, перейдет"""
+    if parse_flight.in_flight(parse_key(normalized_group, week_index)):
+        return
+    logging.info(f"📥 Предзагрузка недели +{week_index} для {normalized_group}")
+    _run_in_background(load_week(normalized_group, week_index, Priority.WARM))
+
+
+def _run_in_background(coro):
+    task = asyncio.ensure_future(coro)
+    # Держим ссылку на задачу, пока она не завершится
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def show_queue_position(bot: Bot, chat_id: int, message_id: int, normalized_group: str):
+    """Дописывает в сообщение "Загружаю расписание" место в очереди и время ожидания"""
+    info = parse_scheduler.queue_info(normalized_group)
+    if not info:
+        return
+
+    if info['state'] == 'queued':
+        status = f"📋 Место в очереди: {info['position']}\n⏰ Примерно {info['eta_seconds']} сек"
+    else:
+        status = f"⏰ Осталось примерно {info['eta_seconds']} сек"
+
+    try:
+        # Ответы пользователям в очереди отправки идут раньше
+        with sending_priority(OutboundPriority.PROGRESS):
+            await bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=f"⏳ Загружаю расписание для группы <b>{normalized_group}</b>...\n{status}",
+                parse_mode="HTML"
+            )
+    except Exception as e:
+        logging.warning(f"Не удалось показать место в очереди: {e}")
+
+
+async def show_first_week(bot: Bot, chat_id: int, message_id: int, normalized_group: str,
+                          weeks_stream: WeekStream, parse_task: asyncio.Future, max_weeks: int):
+    """
+    Показывает текущую неделю, как только она разобрана, не дожидаясь остальных.
+    Возвращает id сообщения, которое потом заменится полным расписанием.
+    """
+    if max_weeks <= 1:
+        # Следующих недель не будет: полное расписание придет сразу за первой неделей
+        return message_id
+
+    async for index, lessons in weeks_stream:
+        if index != 0 or parse_task.done():
+            # Парсинг уже закончился - сразу покажем полное расписание
+            return message_id
+
+        response_text = (
+            f"Расписание для группы <b>{normalized_group}</b>\n"
+            f"{get_week_name_with_number('current', 0, 0, 1)}\n\n"
+            f"{format_schedule_for_telegram(lessons)}\n\n"
+            f"⏳ Загружаю следующие недели..."
+        )
+        sent_id = await send_or_edit_schedule_message(
+            bot=bot,
+            chat_id=chat_id,
+            message_id=message_id,
+            text=response_text,
+            keyboard=None
+        )
+        return sent_id or message_id
+
+    return message_id
+
+
 async def send_or_edit_schedule_message(bot: Bot, chat_id: int, message_id: int, 
-                                       text: str, keyboard: InlineKeyboardMarkup):
-    """Отправляет новое сообщение или редактирует существующее"""
+                                       text: str, keyboard: InlineKeyboardMarkup, parts: list = None):
+    """
+    Отправляет новое сообщение или редактирует существующее, возвращает id (первого) сообщения.
+    parts - текст, уже разбитый на части (готовое сообщение из кэша).
+    """
+    if parts is None:
+        parts = split_message(text)
     try:
-        if len(text) > 4000:
-            # Для длинных сообщений разбиваем на части
-            parts = split_message(text)
+        if len(parts) > 1:
+            # Длинное сообщение отправляется частями
             logging.info(f"Разбиваю на {len(parts)} частей")
             
             if message_id:
@@ -200,6 +478,7 @@ async def send_or_edit_schedule_message(bot: Bot, chat_id: int, message_id: int,
                 # Остальные части отправляем новыми сообщениями
                 for part in parts[1:]:
                     await bot.send_message(chat_id, part, parse_mode="HTML")
+                return message_id
             else:
                 # Отправляем первую часть с клавиатурой
                 msg = await bot.send_message(
@@ -211,38 +490,50 @@ async def send_or_edit_schedule_message(bot: Bot, chat_id: int, message_id: int,
                 # Остальные части отправляем новыми сообщениями
                 for part in parts[1:]:
                     await bot.send_message(chat_id, part, parse_mode="HTML")
+                return msg.message_id
         else:
             if message_id:
                 # Редактируем существующее сообщение
                 await bot.edit_message_text(
                     chat_id=chat_id,
                     message_id=message_id,
-                    text=text,
+                    text=parts[0],
                     parse_mode="HTML",
                     reply_markup=keyboard
                 )
+                return message_id
             else:
                 # Отправляем новое сообщение
-                await bot.send_message(
+                msg = await bot.send_message(
                     chat_id,
-                    text,
+                    parts[0],
                     parse_mode="HTML",
                     reply_markup=keyboard
                 )
+                return msg.message_id
+    except TelegramRetryAfter as e:
+        # Повторы уже исчерпаны в очереди отправки - еще одно сообщение только продлит ограничение
+        logging.error(f"Telegram ограничил отправку в чат {chat_id}: {e}")
+        return None
     except Exception as e:
+        if message_id and "message is not modified" in str(e):
+            # Сообщение уже показывает то же самое - новое не нужно
+            return message_id
         logging.error(f"Ошибка при отправке/редактировании сообщения: {e}")
         # Если не удалось отредактировать (например, сообщение слишком старое),
         # отправляем новое
         if message_id:
             try:
-                await bot.send_message(
+                msg = await bot.send_message(
                     chat_id,
                     text,
                     parse_mode="HTML",
                     reply_markup=keyboard
                 )
+                return msg.message_id
             except Exception as e2:
                 logging.error(f"Не удалось отправить новое сообщение: {e2}")
+    return None
 
 
 def calculate_week_index(week_type: str, offset: int, total_weeks: int, user_id: int, group_name: str) -> int:
@@ -256,8 +547,9 @@ def calculate_week_index(week_type: str, offset: int, total_weeks: int, user_id:
     return update_user_week_position(user_id, group_name, offset, total_weeks)
 
 
-def get_week_name_with_number(week_type: str, offset: int, week_index: int, total_weeks: int) -> str:
-    """Получить название недели с номером"""
+def get_week_name_with_number(week_type: str, offset: int, week_index: int, total_weeks: int,
+                              week: str = None) -> str:
+    """Получить название недели с номером (и датами, если известен ключ недели)"""
     week_names = {
         "current": "📅 Текущая неделя",
         "next": "➡️ Следующая неделя", 
@@ -265,6 +557,10 @@ def get_week_name_with_number(week_type: str, offset: int, week_index: int, tota
     }
     
     base_name = week_names.get(week_type, f"Неделя {week_index + 1}")
+    if week:
+        monday = week_monday(week)
+        sunday = monday + timedelta(days=6)
+        return f"{base_name} ({monday:%d.%m} - {sunday:%d.%m})"
     return f"{base_name}"
 
 
@@ -312,6 +608,29 @@ def format_schedule_for_telegram(schedule: list) -> str:
     return "\n".join(result_lines)
 
 
+def format_day_for_telegram(group_name: str, day, day_offset: int, lessons: list) -> str:
+    """Короткое расписание на день для Telegram"""
+    title = "Сегодня" if day_offset == 0 else "Завтра"
+    lines = [f"📅 <b>{title}</b>, {DAY_NAMES[day.weekday()]} {day:%d.%m} · <b>{group_name}</b>", ""]
+    
+    if not lessons:
+        lines.append("🎉 Занятий нет")
+    
+    for lesson in lessons:
+        lines.append(f"<b>{lesson.get('Время', '')}</b> {lesson.get('Дисциплина', 'Не указано')}")
+        details = " · ".join(
+            value for value in (lesson.get('Аудитория'), lesson.get('Тип занятия'), lesson.get('Преподаватель'))
+            if value
+        )
+        if details:
+            lines.append(details)
+        webinar_link = lesson.get('Ссылка на вебинар')
+        if webinar_link:
+            lines.append(f"Вебинар: {webinar_link}")
+    
+    return "\n".join(lines)
+
+
 def split_message(text: str, max_length: int = 4000) -> list:
     """Разделение длинного сообщения на части"""
     if len(text) <= max_length:
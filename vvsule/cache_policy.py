@@ -0,0 +1,213 @@
+"""
+Свежесть кэша расписания (stale-while-revalidate) и формат записи кэша.
+До мягкого TTL кэш отдается как есть, между мягким и жестким TTL -
+отдается сразу, но помечается устаревшим и обновляется в фоне,
+после жесткого TTL считается отсутствующим.
+
+Каждая неделя хранится отдельной строкой schedule_cache (week_type - ключ недели
+"2025-W36") со своим временем обновления, ее занятия - в таблице lessons.
+Расписание группы собирается из подряд идущих недель, начиная с текущей.
+
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from config import config
+from vvsule.schedule_calendar import ScheduleIndex, current_week_key, schedule_week_keys, week_keys
+
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+def serialize_schedule(schedule_data: dict):
+    """JSON расписания для БД, число недель и хэш содержимого"""
+    blob = json.dumps(schedule_data, ensure_ascii=False)
+    return blob, len(schedule_data.get('weeks', [])), content_hash(blob)
+
+
+def content_hash(blob: str) -> str:
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class StoredSchedule:
+    """
+    Запись кэша: готовый JSON из БД и лениво разобранный словарь.
+    Веб-приложение отдает JSON как есть, бот разбирает его один раз на запись.
+    """
+
+    def __init__(self, blob: str, last_updated: datetime, weeks_count: int = None, content_hash: str = None,
+                 modified_at: datetime = None, week_hashes: dict = None):
+        self.blob = blob
+        self.body = blob.encode("utf-8")
+        self.last_updated = last_updated  # По нему считается свежесть
+        self.modified_at = modified_at or last_updated  # Последнее изменение (для Last-Modified)
+        self._data = None
+        self._weeks_count = weeks_count
+        self._content_hash = content_hash
+        self._response_prefix = None
+        self._index = None
+        self._week_hashes = week_hashes or {}  # {ключ недели: хэш JSON ее занятий}
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = json.loads(self.blob)
+        return self._data
+
+    @property
+    def index(self) -> ScheduleIndex:
+        """Занятия по неделям и датам (строится один раз на запись)"""
+        if self._index is None:
+            self._index = ScheduleIndex.from_schedule(self.data)
+        return self._index
+
+    def week_hash(self, key: str) -> Optional[str]:
+        """Хэш занятий недели (как в schedule_cache.content_hash), None если недели нет"""
+        if key not in self._week_hashes:
+            lessons = self.index.week(key)
+            if lessons is None:
+                return None
+            self._week_hashes[key] = content_hash(json.dumps(lessons, ensure_ascii=False))
+        return self._week_hashes[key]
+
+    @property
+    def weeks_count(self) -> int:
+        # Для записей, сохраненных до появления колонки
+        if self._weeks_count is None:
+            self._weeks_count = len(self.data.get('weeks', []))
+        return self._weeks_count
+
+    @property
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.body).hexdigest()
+        return self._content_hash
+
+    @property
+    def size(self) -> int:
+        """Примерный размер записи в памяти (байт)"""
+        return len(self.body) * 2
+
+    def response_bytes(self, group_name: str, stale: bool) -> bytes:
+        """Ответ /api/schedule без разбора и повторной сериализации расписания"""
+        if self._response_prefix is None:
+            meta = json.dumps({
+                'group': group_name,
+                'weeks_count': self.weeks_count,
+                'max_weeks': config.parser.max_weeks,
+                'source': 'cache',
+                'cached_at': self.last_updated.isoformat(),
+                'content_hash': self.content_hash,
+            }, ensure_ascii=False)
+            self._response_prefix = b'{"success": true, "schedule": ' + self.body + b', ' + meta[1:-1].encode("utf-8")
+        return self._response_prefix + (b', "stale": true}' if stale else b', "stale": false}')
+
+
+@dataclass
+class CachedSchedule:
+    """Расписание из кэша с его состоянием"""
+    stored: StoredSchedule
+    state: str  # FRESH или STALE
+    age_seconds: float
+
+    @property
+    def data(self) -> dict:
+        return self.stored.data
+
+    @property
+    def last_updated(self) -> datetime:
+        return self.stored.last_updated
+
+    @property
+    def is_stale(self) -> bool:
+        return self.state == STALE
+
+
+def cache_state(last_updated: datetime, now: datetime = None) -> str:
+    """Состояние кэша по времени последнего обновления"""
+    age = ((now or datetime.utcnow()) - last_updated).total_seconds()
+    if age < config.cache.soft_ttl:
+        return FRESH
+    if age < config.cache.hard_ttl:
+        return STALE
+    return EXPIRED
+
+
+def make_cached_schedule(stored: StoredSchedule, now: datetime = None) -> Optional[CachedSchedule]:
+    """CachedSchedule для записи кэша или None, если она истекла"""
+    now = now or datetime.utcnow()
+    state = cache_state(stored.last_updated, now)
+    if state == EXPIRED:
+        return None
+    return CachedSchedule(
+        stored=stored,
+        state=state,
+        age_seconds=(now - stored.last_updated).total_seconds()
+    )
+
+
+def week_rows(schedule_data: dict, now: datetime = None) -> list:
+    """
+    Распарсенные недели для сохранения: [(ключ недели, занятия, хэш JSON занятий)].
+    Ключ недели берется из дат занятий, для недель без дат - по позиции.
+    """
+    rows = []
+    for key, lessons in zip(schedule_week_keys(schedule_data, now), schedule_data.get('weeks', [])):
+        blob = json.dumps(lessons, ensure_ascii=False)
+        rows.append((key, lessons, content_hash(blob)))
+    return rows
+
+
+def parsed_content_hash(group_name: str, schedule_data: dict, now: datetime = None) -> Optional[str]:
+    """
+    Хэш записи кэша, которая соберется из только что распарсенных недель
+    (так же, как при чтении из БД); None, если среди них нет текущей недели.
+    """
+    now = now or datetime.utcnow()
+    rows = {
+        key: (json.dumps(lessons, ensure_ascii=False), now)
+        for key, lessons, _hash in week_rows(schedule_data, now)
+    }
+    stored = assemble_schedule(group_name, rows, now)
+    return stored.content_hash if stored else None
+
+
+def assemble_schedule(group_name: str, rows: dict, now: datetime = None) -> Optional[StoredSchedule]:
+    """
+    Расписание группы из недельных строк кэша {ключ недели: (JSON занятий, время обновления)}.
+    Берутся подряд идущие неистекшие недели, начиная с текущей; None, если текущей нет.
+    Свежесть расписания - по самой старой из взятых недель.
+    """
+    now = now or datetime.utcnow()
+    keys = []
+    blobs = []
+    updated = []
+    for key in week_keys(current_week_key(now), config.parser.max_weeks):
+        row = rows.get(key)
+        if row is None or cache_state(row[1], now) == EXPIRED:
+            break
+        keys.append(key)
+        blobs.append(row[0])
+        updated.append(row[1])
+
+    if not keys:
+        return None
+
+    # Недели уже хранятся в JSON, собираем ответ без их разбора
+    blob = (
+        '{"success": true, "group_name": ' + json.dumps(group_name, ensure_ascii=False)
+        + ', "weeks": [' + ', '.join(blobs) + ']'
+        + ', "week_keys": ' + json.dumps(keys)
+        + ', "total_weeks": ' + str(len(keys)) + '}'
+    )
+    return StoredSchedule(
+        blob,
+        last_updated=min(updated),
+        weeks_count=len(keys),
+        modified_at=max(updated),
+        week_hashes={key: content_hash(week_blob) for key, week_blob in zip(keys, blobs)}
+    )
@@ -0,0 +1,148 @@
+"""
+Фоновый прогрев кэша расписания.
+Периодически находит группы активных пользователей и обновляет их кэш
+до того, как он устареет, чтобы запрос пользователя не ждал парсинга.
+Обновления распределяются по времени и идут через планировщик с приоритетом WARM.
+
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from config import config
+from vvsule.database.crud import crud
+from vvsule.database.database import database
+from vvsule.parse_scheduler import Priority
+from vvsule.parser import parse_flight
+from vvsule.background_tasks import parse_and_cache_schedule
+from vvsule.schedule_calendar import VLADIVOSTOK_TZ
+
+
+SPREAD_FRACTION = 0.8  # Какую часть интервала занимают обновления одного цикла
+
+
+class CacheWarmer:
+    """Периодическое обновление кэша групп с активными пользователями"""
+
+    def __init__(
+            self,
+            interval: int,
+            active_days: int,
+            soft_ttl: int,
+            refresh_margin: int,
+            peak_hours: tuple,
+            peak_refresh_age: int
+    ):
+        self.interval = interval
+        self.active_days = active_days
+        self.soft_ttl = soft_ttl
+        self.refresh_margin = refresh_margin
+        self.peak_hours = peak_hours
+        self.peak_refresh_age = peak_refresh_age
+
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_cycle_at = None
+
+
+    def is_peak(self, now: datetime) -> bool:
+        """Идут ли сейчас часы перед занятиями (по Владивостоку)"""
+        start, end = self.peak_hours
+        return start <= now.astimezone(VLADIVOSTOK_TZ).hour < end
+
+
+    def refresh_age(self, now: datetime) -> int:
+        """С какого возраста кэш пора обновлять (сек)"""
+        regular = max(0, self.soft_ttl - self.refresh_margin)
+        if self.is_peak(now):
+            # Перед занятиями обновляем заранее, чтобы утром кэш был свежим
+            return min(regular, self.peak_refresh_age)
+        return regular
+
+
+    def select_due(self, groups: list, now: datetime) -> list:
+        """Группы, кэш которых отсутствует или скоро устареет"""
+        threshold = self.refresh_age(now)
+        naive_now = now.astimezone(timezone.utc).replace(tzinfo=None)
+        due = []
+        for group in groups:
+            last_updated = group['last_updated']
+            if last_updated is None or (naive_now - last_updated).total_seconds() >= threshold:
+                due.append(group['group_name'])
+        return due
+
+
+    async def warm_cycle(self) -> int:
+        """Один проход: находит группы и распределяет их обновление по интервалу"""
+        now = datetime.now(timezone.utc)
+        since = now.replace(tzinfo=None) - timedelta(days=self.active_days)
+
+        groups = []
+        async for session in database.get_session():
+            groups = await crud.get_active_groups(session, since)
+
+        due = [group for group in self.select_due(groups, now) if not parse_flight.in_flight(group)]
+        self.cycles += 1
+        self.last_cycle_at = now.isoformat()
+        if not due:
+            return 0
+
+        logging.info(f"🔥 Прогрев кэша: {len(due)} из {len(groups)} активных групп")
+        spacing = self.interval * SPREAD_FRACTION / len(due)
+        tasks = []
+        for group_name in due:
+            tasks.append(asyncio.ensure_future(self._refresh(group_name)))
+            # Случайный сдвиг, чтобы обновления не шли пачкой
+            await asyncio.sleep(spacing * random.uniform(0.5, 1.5))
+
+        results = await asyncio.gather(*tasks)
+        return sum(results)
+
+
+    async def run(self):
+        """Бесконечный цикл прогрева"""
+        logging.info(f"Прогрев кэша запущен, интервал {self.interval} сек")
+        while True:
+            try:
+                await self.warm_cycle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Ошибка прогрева кэша: {e}", exc_info=True)
+            await asyncio.sleep(self.interval * random.uniform(0.9, 1.1))
+
+
+    def stats(self) -> dict:
+        """Статистика прогрева"""
+        return {
+            'cycles': self.cycles,
+            'refreshed': self.refreshed,
+            'failed': self.failed,
+            'last_cycle_at': self.last_cycle_at,
+        }
+
+
+    async def _refresh(self, group_name: str) -> int:
+        try:
+            result = await parse_flight.do_async(group_name, parse_and_cache_schedule, group_name, Priority.WARM)
+        except Exception as e:
+            logging.error(f"Не удалось прогреть кэш {group_name}: {e}")
+            self.failed += 1
+            return 0
+
+        if result and result.get('success') is True:
+            self.refreshed += 1
+            return 1
+        self.failed += 1
+        return 0
+
+
+cache_warmer = CacheWarmer(
+    interval=config.warmer.interval,
+    active_days=config.warmer.active_days,
+    soft_ttl=config.cache.soft_ttl,
+    refresh_margin=config.warmer.refresh_margin,
+    peak_hours=config.warmer.peak_hours,
+    peak_refresh_age=config.warmer.peak_refresh_age
+)
@@ -0,0 +1,128 @@
+"""
+Компактные callback data кнопок расписания.
+Вместо имени группы (кириллица - по 2 байта на букву при лимите Telegram в 64 байта)
+кнопка несет id группы из справочника: '~' и base64 от нескольких байт
+(версия формата, действие, id группы, неделя). Разбор - один struct.unpack.
+
+Кнопки старых форматов (schedule_next_ГРУППА, schedule_next_ГРУППА@2025W38,
+main_menu_ГРУППА) продолжают работать: в уже отправленных сообщениях они живут до 48 часов.
+Новый формат кодируется с новым номером версии, а декодеры старых версий остаются.
+
+"""
+import base64
+import binascii
+import logging
+import struct
+from dataclasses import dataclass
+from typing import Optional, Union
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+
+PREFIX = "~"
+VERSION = 1
+
+PREV = "prev"
+CURRENT = "current"
+NEXT = "next"
+MAIN_MENU = "menu"
+
+ACTION_CODES = {PREV: 1, CURRENT: 2, NEXT: 3, MAIN_MENU: 4}
+ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+
+_V1 = struct.Struct(">BBIHB")  # версия, действие, id группы, ISO-год (0 - без недели), номер недели
+
+
+@dataclass(frozen=True)
+class ScheduleCallback:
+    """Разобранная кнопка: у новых кнопок известен id группы, у старых - имя"""
+    action: str
+    group_id: Optional[int] = None
+    group_name: Optional[str] = None
+    week: Optional[str] = None  # Ключ недели '2025-W38'
+
+
+def encode_week(week: str) -> str:
+    """Запись ключа недели в старых кнопках: '2025-W37' -> '2025W37'"""
+    return week.replace("-", "")
+
+
+def decode_week(value: str) -> str:
+    """Ключ недели из старых кнопок: '2025W37' -> '2025-W37'"""
+    year, number = value.split("W")
+    return f"{int(year):04d}-W{int(number):02d}"
+
+
+def encode_callback(action: str, group_id: int, week: str = None) -> str:
+    """Callback data новой кнопки (13 байт)"""
+    year, number = (int(part) for part in week.split("-W")) if week else (0, 0)
+    raw = _V1.pack(VERSION, ACTION_CODES[action], group_id, year, number)
+    return PREFIX + base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _decode_v1(raw: bytes) -> Optional[ScheduleCallback]:
+    if len(raw) != _V1.size:
+        return None
+    _version, code, group_id, year, number = _V1.unpack(raw)
+    action = ACTIONS.get(code)
+    if action is None:
+        return None
+    week = f"{year:04d}-W{number:02d}" if year else None
+    return ScheduleCallback(action=action, group_id=group_id, week=week)
+
+
+DECODERS = {1: _decode_v1}  # {версия: декодер}; декодеры прошлых версий не удаляются
+
+
+def _decode_legacy(data: str) -> Optional[ScheduleCallback]:
+    """Кнопки с именем группы в тексте"""
+    if data.startswith("main_menu_"):
+        return ScheduleCallback(action=MAIN_MENU, group_name=data[len("main_menu_"):])
+
+    # schedule_[direction]_[group]@[неделя] (еще более старые - без недели)
+    _schedule, _sep, rest = data.partition("_")
+    action, _sep, group_name = rest.partition("_")
+    if action not in (PREV, CURRENT, NEXT) or not group_name:
+        return None
+
+    week = None
+    if "@" in group_name:
+        group_name, target = group_name.rsplit("@", 1)
+        try:
+            week = decode_week(target)
+        except ValueError:
+            logging.warning(f"Неверная неделя в callback data: {data}")
+    return ScheduleCallback(action=action, group_name=group_name, week=week)
+
+
+def decode_callback(data: str) -> Optional[ScheduleCallback]:
+    """Кнопка расписания из callback data любого формата, None если это не она"""
+    if not data:
+        return None
+    if data.startswith(PREFIX):
+        encoded = data[len(PREFIX):]
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        except (binascii.Error, ValueError):
+            return None
+        decoder = DECODERS.get(raw[0]) if raw else None
+        if decoder is None:
+            logging.warning(f"Неизвестная версия callback data: {data}")
+            return None
+        return decoder(raw)
+    if data.startswith("schedule_") or data.startswith("main_menu_"):
+        return _decode_legacy(data)
+    return None
+
+
+class ScheduleCallbackFilter(Filter):
+    """Фильтр кнопок расписания с нужными действиями, передает обработчику schedule_callback"""
+
+    def __init__(self, *actions: str):
+        self.actions = set(actions)
+
+    async def __call__(self, callback: CallbackQuery) -> Union[bool, dict]:
+        decoded = decode_callback(callback.data)
+        if decoded is None or decoded.action not in self.actions:
+            return False
+        return {'schedule_callback': decoded}
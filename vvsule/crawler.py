@@ -0,0 +1,284 @@
+"""
+Ночной обход всех групп с сайта расписания.
+Собирает список групп через автодополнение поля input#gr, парсит каждую
+в пуле процессов и сохраняет в schedule_cache. Прогресс пишется в файл,
+поэтому прерванный обход продолжается с того же места.
+Обход запускается отдельно от бота и не использует его планировщик парсинга:
+число процессов с браузерами задает --workers (по умолчанию - по свободной памяти).
+
+Запуск: python -m vvsule.crawler --checkpoint crawl.json
+
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from vvsule.schedule_calendar import VLADIVOSTOK_TZ
+
+
+GROUP_ALPHABET = "АБВГДЕЖЗИКЛМНОПРСТУФХЦЧШЭЮЯ"
+PREFIX_ALPHABET = GROUP_ALPHABET + "0123456789-"
+GROUP_PATTERN = re.compile(r"^[А-ЯЁA-Z]+(-[А-ЯЁA-Z0-9]+)+$")
+SUGGEST_LIMIT = 10  # Столько подсказок и больше - список обрезан, уточняем префикс
+REPORT_EVERY = 10  # Как часто писать промежуточный отчет (групп)
+
+
+def collect_suggestions(driver, prefix: str, timeout: float) -> list:
+    """Группы из автодополнения для введенного префикса"""
+    from vvsule.parser import timed_wait
+
+    group_input = timed_wait(
+        driver, "page_input", timeout,
+        EC.presence_of_element_located((By.CSS_SELECTOR, "input#gr"))
+    )
+    group_input.clear()
+    group_input.send_keys(prefix)
+
+    def suggestions(d):
+        found = [
+            button.text.strip() for button in d.find_elements(By.TAG_NAME, "button")
+            if button.text.strip().startswith(prefix) and GROUP_PATTERN.match(button.text.strip())
+        ]
+        return found or False
+
+    try:
+        return timed_wait(driver, "crawl_autocomplete", timeout, suggestions)
+    except TimeoutException:
+        return []
+
+
+def enumerate_groups(driver, timeout: float = 3, suggest_limit: int = SUGGEST_LIMIT) -> list:
+    """Все группы сайта: обход префиксов, пока подсказки не перестанут обрезаться"""
+    groups = set()
+    prefixes = list(GROUP_ALPHABET)
+    while prefixes:
+        prefix = prefixes.pop(0)
+        found = collect_suggestions(driver, prefix, timeout)
+        groups.update(found)
+        if len(found) >= suggest_limit:
+            prefixes.extend(prefix + char for char in PREFIX_ALPHABET)
+    logging.info(f"🔎 Найдено групп: {len(groups)}")
+    return sorted(groups)
+
+
+def crawl_group(group_name: str):
+    """Парсинг одной группы в процессе пула: (группа, результат, длительность)"""
+    from vvsule.parser import parse_vvsu_timetable
+
+    started = time.monotonic()
+    try:
+        result = parse_vvsu_timetable(group_name)
+    except Exception as e:
+        result = {'success': False, 'error': str(e), 'weeks': []}
+    return group_name, result, time.monotonic() - started
+
+
+class CrawlCheckpoint:
+    """Прогресс обхода в JSON-файле"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.groups = []
+        self.done = set()
+        self.failed = {}  # {группа: ошибка}
+
+    def load(self) -> bool:
+        """Читает прогресс; False, если файла еще нет"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.groups = data.get("groups", [])
+        self.done = set(data.get("done", []))
+        self.failed = data.get("failed", {})
+        return True
+
+    def save(self):
+        """Атомарно записывает прогресс"""
+        data = {
+            "groups": self.groups,
+            "done": sorted(self.done),
+            "failed": self.failed,
+            "updated_at": datetime.now().isoformat(),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def pending(self, retry_failed: bool = False) -> list:
+        """Группы, которые еще не обработаны"""
+        return [
+            group for group in self.groups
+            if group not in self.done and (retry_failed or group not in self.failed)
+        ]
+
+    def mark(self, group_name: str, error: str = None):
+        if error is None:
+            self.done.add(group_name)
+            self.failed.pop(group_name, None)
+        else:
+            self.failed[group_name] = error
+
+
+class CrawlReport:
+    """Пропускная способность обхода"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.started = time.monotonic()
+        self.completed = 0
+        self.failed = 0
+        self.parse_seconds = 0.0
+
+    def record(self, success: bool, duration: float):
+        if success:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.parse_seconds += duration
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        processed = self.completed + self.failed
+        per_minute = processed / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = self.total - processed
+        return {
+            'processed': processed,
+            'total': self.total,
+            'completed': self.completed,
+            'failed': self.failed,
+            'elapsed_seconds': round(elapsed, 1),
+            'groups_per_minute': round(per_minute, 2),
+            'avg_parse_seconds': round(self.parse_seconds / processed, 2) if processed else 0.0,
+            'eta_minutes': round(remaining / per_minute, 1) if per_minute else None,
+        }
+
+    def log(self):
+        s = self.summary()
+        logging.info(
+            f"📊 Обход: {s['processed']}/{s['total']}, ошибок {s['failed']}, "
+            f"{s['groups_per_minute']} групп/мин, осталось ~{s['eta_minutes']} мин"
+        )
+
+
+def crawl_hour(now: datetime = None) -> int:
+    """Час по Владивостоку, в котором задается --stop-at (не зависит от зоны сервера)"""
+    return (now or datetime.now(timezone.utc)).astimezone(VLADIVOSTOK_TZ).hour
+
+
+async def crawl(
+        checkpoint: CrawlCheckpoint,
+        executor,
+        workers: int,
+        save_fn,
+        parse_fn=crawl_group,
+        retry_failed: bool = False,
+        stop_at_hour: Optional[int] = None
+) -> CrawlReport:
+    """Парсит необработанные группы в executor и сохраняет результаты через save_fn"""
+    loop = asyncio.get_running_loop()
+    pending = checkpoint.pending(retry_failed)
+    report = CrawlReport(len(pending))
+    logging.info(f"🕷 Обход: {len(pending)} групп, {workers} процессов")
+
+    in_progress = set()
+    next_report = REPORT_EVERY
+    while pending or in_progress:
+        while pending and len(in_progress) < workers:
+            if stop_at_hour is not None and crawl_hour() == stop_at_hour:
+                logging.info("⏹ Время обхода закончилось, продолжу в следующий запуск")
+                pending = []
+                break
+            in_progress.add(loop.run_in_executor(executor, parse_fn, pending.pop(0)))
+        if not in_progress:
+            break
+
+        done, in_progress = await asyncio.wait(in_progress, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            group_name, result, duration = future.result()
+            success = bool(result and result.get('success') is True)
+            if success:
+                try:
+                    await save_fn(group_name, result)
+                except Exception as e:
+                    logging.error(f"Не удалось сохранить {group_name}: {e}")
+                    success = False
+                    result = {'error': f"Ошибка сохранения: {e}"}
+            checkpoint.mark(group_name, None if success else (result or {}).get('error', 'Пустой результат'))
+            report.record(success, duration)
+        checkpoint.save()
+
+        if report.completed + report.failed >= next_report:
+            next_report += REPORT_EVERY
+            report.log()
+
+    report.log()
+    return report
+
+
+async def save_to_cache(group_name: str, schedule_data: dict):
+    """Сохраняет расписание группы в schedule_cache"""
+    from vvsule.database.crud import crud
+    from vvsule.database.database import database
+
+    async for session in database.get_session():
+        await crud.save_schedule_cache(
+            session=session,
+            group_name=group_name,
+            week_type="all_weeks",
+            schedule_data=schedule_data
+        )
+
+
+async def main(args):
+    from vvsule.parser import driver_pool
+    from vvsule.parse_scheduler import workers_for_memory
+    from config import config
+
+    checkpoint = CrawlCheckpoint(args.checkpoint)
+    if not checkpoint.load() or args.refresh_groups:
+        with driver_pool.driver() as driver:
+            if driver is None:
+                raise RuntimeError("Не удалось запустить браузер для списка групп")
+            checkpoint.groups = enumerate_groups(driver, suggest_limit=args.suggest_limit)
+        checkpoint.save()
+
+    workers = workers_for_memory(args.workers, os.cpu_count() or 1, config.parser.browser_memory_mb)
+    # spawn: у каждого процесса свой браузер и свое подключение к БД
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        report = await crawl(
+            checkpoint,
+            executor,
+            workers,
+            save_to_cache,
+            retry_failed=args.retry_failed,
+            stop_at_hour=args.stop_at
+        )
+    print(json.dumps(report.summary(), ensure_ascii=False, indent=2))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Обход всех групп сайта расписания ВВГУ")
+    parser.add_argument("--checkpoint", default="crawl_checkpoint.json", help="Файл прогресса")
+    parser.add_argument("--workers", type=int, default=0, help="Процессов парсинга, 0 - по свободной памяти")
+    parser.add_argument("--retry-failed", action="store_true", help="Повторить группы с ошибками")
+    parser.add_argument("--refresh-groups", action="store_true", help="Заново собрать список групп")
+    parser.add_argument("--suggest-limit", type=int, default=SUGGEST_LIMIT, help="Размер списка подсказок сайта")
+    parser.add_argument("--stop-at", type=int, default=None, help="Час по Владивостоку, в который прекратить обход")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parse_args()))
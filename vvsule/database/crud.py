@@ -4,11 +4,16 @@ CRUD операции.
 
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, func, and_
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from .models import User, ScheduleCache, UserRequest
-import json
+from typing import Optional
+from .models import User, ScheduleCache, Lesson, Group, UserRequest
+from vvsule.cache_policy import CachedSchedule, make_cached_schedule, assemble_schedule, week_rows
+from vvsule.lessons import make_lessons, week_blobs
+from vvsule.memory_cache import schedule_memory_cache
+from vvsule.schedule_calendar import current_week_key, week_keys
+from config import config
 
 
 class CRUD:
@@ -82,23 +87,49 @@ class CRUD:
             group_name: str,
             week_type: str
     ) -> dict:
-        """Получение кэшированного расписания для всех недель"""
+        """Получение свежего кэшированного расписания для всех недель"""
+        entry = await self.get_cached_schedule_entry(session, group_name, week_type)
+        if entry and not entry.is_stale:
+            return entry.data
+
+        return None
+
+
+    async def get_cached_schedule_entry(
+            self,
+            session: AsyncSession,
+            group_name: str,
+            week_type: str
+    ) -> Optional[CachedSchedule]:
+        """
+        Кэш расписания со свежестью (свежий или устаревший), None если текущей недели нет.
+        Собирается из недельных строк, week_type оставлен для совместимости.
+        """
         normalized_group = group_name.upper()
 
+        # Сначала кэш в памяти процесса, без запроса к БД и разбора JSON
+        stored = schedule_memory_cache.get(normalized_group)
+        if stored:
+            return make_cached_schedule(stored)
+
+        keys = week_keys(current_week_key(), config.parser.max_weeks)
         result = await session.execute(
-            select(ScheduleCache)
+            select(ScheduleCache.week_type, ScheduleCache.last_updated, Lesson)
+            .outerjoin(
+                Lesson,
+                and_(Lesson.group_name == ScheduleCache.group_name, Lesson.week_key == ScheduleCache.week_type)
+            )
             .where(
                 ScheduleCache.group_name == normalized_group,
-                ScheduleCache.week_type == "all_weeks"
+                ScheduleCache.week_type.in_(keys)
             )
+            .order_by(ScheduleCache.week_type, Lesson.position)
         )
-        cache = result.scalar_one_or_none()
 
-        if cache:
-            # Проверяем, не устарели ли данные
-            time_diff = datetime.utcnow() - cache.last_updated
-            if time_diff.total_seconds() < 21600:  # 6 часов
-                return json.loads(cache.schedule_data)
+        stored = assemble_schedule(normalized_group, week_blobs(result.all()))
+        if stored:
+            schedule_memory_cache.put(normalized_group, stored, size=stored.size)
+            return make_cached_schedule(stored)
 
         return None
 
@@ -110,30 +141,111 @@ class CRUD:
             week_type: str,
             schedule_data: dict
     ):
-        """Сохранение всех недель расписания в кэш"""
+        """Сохранение распарсенных недель в кэш: строка недели и ее занятия в lessons"""
         normalized_group = group_name.upper()
+        rows = week_rows(schedule_data)
+        if not rows:
+            return
 
+        keys = [key for key, _lessons, _hash in rows]
         result = await session.execute(
             select(ScheduleCache)
             .where(
                 ScheduleCache.group_name == normalized_group,
-                ScheduleCache.week_type == "all_weeks"
+                ScheduleCache.week_type.in_(keys)
             )
         )
-        cache = result.scalar_one_or_none()
+        existing = {cache.week_type: cache for cache in result.scalars().all()}
+        # Занятия недель заменяются целиком
+        await session.execute(
+            delete(Lesson).where(Lesson.group_name == normalized_group, Lesson.week_key.in_(keys))
+        )
 
-        if cache:
-            cache.schedule_data = json.dumps(schedule_data, ensure_ascii=False)
-            cache.last_updated = datetime.utcnow()
-        else:
-            cache = ScheduleCache(
-                group_name=normalized_group,
-                week_type="all_weeks",
-                schedule_data=json.dumps(schedule_data, ensure_ascii=False)
-            )
-            session.add(cache)
+        now = datetime.utcnow()
+        for key, lessons, lessons_hash in rows:
+            cache = existing.get(key)
+            if cache:
+                cache.schedule_data = None
+                cache.weeks_count = 1
+                cache.content_hash = lessons_hash
+                cache.last_updated = now
+            else:
+                session.add(ScheduleCache(
+                    group_name=normalized_group,
+                    week_type=key,
+                    weeks_count=1,
+                    content_hash=lessons_hash
+                ))
+            session.add_all(make_lessons(normalized_group, key, lessons))
 
         await session.commit()
+        schedule_memory_cache.invalidate(normalized_group)
+
+
+    async def get_active_groups(
+            self,
+            session: AsyncSession,
+            since: datetime
+    ) -> list:
+        """
+        Группы пользователей, активных с момента since, с временем обновления кэша
+        текущей недели. Сначала группы с большим числом пользователей.
+        """
+        group = func.upper(User.group_name)
+        result = await session.execute(
+            select(group, func.count(User.id), func.max(ScheduleCache.last_updated))
+            .outerjoin(
+                ScheduleCache,
+                and_(ScheduleCache.group_name == group, ScheduleCache.week_type == current_week_key())
+            )
+            .where(User.group_name.isnot(None), User.last_activity >= since)
+            .group_by(group)
+            .order_by(func.count(User.id).desc())
+        )
+        return [
+            {'group_name': group_name, 'users': users, 'last_updated': last_updated}
+            for group_name, users, last_updated in result.all()
+        ]
+
+
+    async def get_or_create_group(
+            self,
+            session: AsyncSession,
+            group_name: str
+    ) -> Group:
+        """Запись справочника групп, новая группа получает следующий id"""
+        result = await session.execute(
+            select(Group).where(Group.name == group_name)
+        )
+        group = result.scalar_one_or_none()
+        if group:
+            return group
+
+        group = Group(name=group_name)
+        session.add(group)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Группу одновременно добавил другой запрос
+            await session.rollback()
+            result = await session.execute(
+                select(Group).where(Group.name == group_name)
+            )
+            return result.scalar_one()
+        await session.refresh(group)
+        return group
+
+
+    async def get_group_by_id(
+            self,
+            session: AsyncSession,
+            group_id: int
+    ) -> Optional[Group]:
+        """Группа по id из справочника"""
+        result = await session.execute(
+            select(Group).where(Group.id == group_id)
+        )
+        return result.scalar_one_or_none()
 
 
     async def log_user_request(
@@ -150,6 +262,12 @@ class CRUD:
             group_name=group_name
         )
         session.add(request)
+        # По активности прогреватель кэша выбирает группы
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(last_activity=datetime.utcnow())
+        )
         await session.commit()
 
 
@@ -6,10 +6,27 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from config import config
+from sqlalchemy import text
 from .models import Base
 import logging
 
 
+# Колонки, добавленные после первого релиза (create_all не меняет существующие таблицы)
+MIGRATIONS = [
+    "ALTER TABLE schedule_cache ADD COLUMN IF NOT EXISTS weeks_count INTEGER",
+    "ALTER TABLE schedule_cache ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    # Кэш хранится по неделям, записи со всеми неделями сразу больше не читаются
+    "DELETE FROM schedule_cache WHERE week_type = 'all_weeks'",
+    # Занятия хранятся в lessons: недели, сохраненные JSON-строкой, парсятся заново
+    "DELETE FROM schedule_cache WHERE schedule_data IS NOT NULL",
+    # Текст с сайта может не влезть в VARCHAR: длинное название или список преподавателей
+    *(
+        f"ALTER TABLE lessons ALTER COLUMN {column} TYPE TEXT"
+        for column in ('date_text', 'time_text', 'discipline', 'room', 'teacher', 'lesson_type', 'webinar_url')
+    ),
+]
+
+
 class Database:
     def __init__(self):
         # Для PostgreSQL используем asyncpg
@@ -32,6 +49,8 @@ class Database:
         try:
             async with self.engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                for statement in MIGRATIONS:
+                    await conn.execute(text(statement))
             logging.info("✅ Таблицы созданы успешно")
         except Exception as e:
             logging.error(f"❌ Ошибка при создании таблиц: {e}")
@@ -1,11 +1,13 @@
 """
 Определяет таблицы PostgreSQL как Python-классы.
 User - пользователи бота
-ScheduleCache - кэш расписания
+ScheduleCache - недели в кэше расписания (время обновления, хэш)
+Lesson - занятия недель из кэша
+Group - справочник групп (короткие id для callback data)
 UserRequest - логи запросов.
 
 """
-from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, BigInteger, DateTime, Date, Time, Boolean, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -40,8 +42,10 @@ class ScheduleCache(Base):
     
     id = Column(Integer, primary_key=True)
     group_name = Column(String(50), nullable=False)
-    week_type = Column(String(20), nullable=False)  # 'current', 'next', 'prev'
-    schedule_data = Column(String)  # JSON строка с расписанием
+    week_type = Column(String(20), nullable=False)  # Ключ недели: '2025-W36'
+    schedule_data = Column(String)  # Устарело: занятия хранятся в lessons
+    weeks_count = Column(Integer)  # Число недель в строке (1)
+    content_hash = Column(String(64))  # sha256 от JSON занятий недели
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Уникальное ограничение на комбинацию group_name и week_type
@@ -53,6 +57,45 @@ class ScheduleCache(Base):
         return f"<ScheduleCache(group='{self.group_name}', week_type='{self.week_type}')>"
 
 
+class Lesson(Base):
+    __tablename__ = "lessons"
+    
+    id = Column(Integer, primary_key=True)
+    group_name = Column(String(50), nullable=False)
+    week_key = Column(String(10), nullable=False)  # Ключ недели: '2025-W36'
+    position = Column(Integer, nullable=False)  # Порядок занятия в неделе
+    lesson_date = Column(Date)
+    start_time = Column(Time)
+    end_time = Column(Time)
+    # Текст ячеек берется с сайта как есть, длина ничем не ограничена
+    date_text = Column(Text)  # Как на сайте: 'Понедельник\n01.09.2025'
+    time_text = Column(Text)  # Как на сайте: '09:00 - 10:30'
+    discipline = Column(Text)
+    room = Column(Text, index=True)
+    teacher = Column(Text, index=True)
+    lesson_type = Column(Text)
+    webinar_url = Column(Text)
+    
+    __table_args__ = (
+        Index('ix_lessons_group_date', 'group_name', 'lesson_date'),
+        Index('ix_lessons_group_week', 'group_name', 'week_key'),
+    )
+    
+    def __repr__(self):
+        return f"<Lesson(group='{self.group_name}', date='{self.lesson_date}', discipline='{self.discipline}')>"
+
+
+class Group(Base):
+    __tablename__ = "groups"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), unique=True, nullable=False)  # Нормализованное имя (верхний регистр)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Group(id={self.id}, name='{self.name}')>"
+
+
 class UserRequest(Base):
     __tablename__ = "user_requests"
     
@@ -0,0 +1,285 @@
+"""
+Пул прогретых браузеров Firefox для парсера.
+Выдает драйвер на один парсинг, сбрасывает его между использованиями,
+проверяет работоспособность и перезапускает после N использований или M минут.
+
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+from selenium.webdriver.common.by import By
+
+# Очистка localStorage/sessionStorage текущей страницы (на about:blank доступа к ним нет)
+CLEAR_STORAGE_SCRIPT = """
+try {
+    window.localStorage.clear();
+    window.sessionStorage.clear();
+} catch (e) {}
+"""
+
+
+class PooledDriver:
+    """Драйвер из пула со счетчиком использований"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+    @property
+    def age(self) -> float:
+        """Возраст драйвера в секундах"""
+        return time.monotonic() - self.created_at
+
+
+class DriverPool:
+    """Потокобезопасный пул браузеров"""
+
+    def __init__(
+            self,
+            factory: Callable,
+            size: int,
+            max_uses: int,
+            max_age: float,
+            home_url: str,
+            acquire_timeout: float = 60
+    ):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.home_url = home_url
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = []  # Свободные драйверы, последним вернули - первым выдадим
+        self._total = 0  # Всего живых драйверов (свободные + выданные)
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self.created = 0
+        self.recycled = 0
+        self.broken = 0
+        self.acquired = 0
+
+
+    def acquire(self) -> Optional[PooledDriver]:
+        """Берет драйвер из пула или запускает новый"""
+        deadline = time.monotonic() + self.acquire_timeout
+
+        while True:
+            pooled = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Пул драйверов закрыт")
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        # Резервируем место, сам запуск - вне блокировки
+                        self._total += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Нет свободного браузера в пуле")
+                    self._condition.wait(remaining)
+
+            if pooled is None:
+                pooled = self._create()
+                if pooled is None:
+                    return None
+            elif self._is_expired(pooled):
+                self._count('recycled')
+                self._quit(pooled, reason="истек срок")
+                continue
+            elif not self._is_healthy(pooled):
+                self._count('broken')
+                self._quit(pooled, reason="не отвечает")
+                continue
+
+            pooled.uses += 1
+            self._count('acquired')
+            return pooled
+
+
+    def release(self, pooled: PooledDriver, broken: bool = False):
+        """Возвращает драйвер в пул, сбрасывая его состояние"""
+        if broken:
+            self._count('broken')
+            self._quit(pooled, reason="ошибка во время парсинга")
+            return
+
+        if self._is_expired(pooled):
+            self._count('recycled')
+            self._quit(pooled, reason=f"{pooled.uses} использований, {int(pooled.age)} сек")
+            return
+
+        if not self._reset(pooled):
+            self._count('broken')
+            self._quit(pooled, reason="не удалось сбросить")
+            return
+
+        with self._condition:
+            if self._closed:
+                self._total -= 1
+                self._safe_quit(pooled.driver)
+                return
+            self._idle.append(pooled)
+            self._condition.notify()
+
+
+    @contextmanager
+    def driver(self, healthy_errors: tuple = ()):
+        """
+        Контекстный менеджер: выдает драйвер (или None) и возвращает его в пул.
+        После исключений из healthy_errors (ошибки данных, а не браузера)
+        драйвер остается в пуле, после остальных - закрывается.
+        """
+        pooled = self.acquire()
+        if pooled is None:
+            yield None
+            return
+
+        broken = False
+        try:
+            yield pooled.driver
+        except GeneratorExit:
+            # Генератор недель закрыли раньше времени: браузер исправен, release() его сбросит
+            raise
+        except healthy_errors:
+            raise
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+
+    def warm_up(self, count: int = None):
+        """Заранее запускает браузеры, чтобы первый запрос не ждал старта"""
+        count = self.size if count is None else min(count, self.size)
+        warmed = 0
+        for _ in range(count):
+            with self._condition:
+                if self._closed or self._total >= self.size or len(self._idle) >= count:
+                    break
+                self._total += 1
+            try:
+                pooled = self._create()
+            except Exception as e:
+                logging.error(f"Не удалось прогреть браузер: {e}")
+                break
+            if pooled is None:
+                break
+            # release() откроет страницу расписания и положит браузер в пул
+            self.release(pooled)
+            warmed += 1
+        logging.info(f"🔥 Прогрето браузеров: {warmed}")
+
+
+    def close(self):
+        """Закрывает все свободные браузеры и запрещает выдачу новых"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._safe_quit(pooled.driver)
+        if idle:
+            logging.info(f"Пул драйверов закрыт, остановлено браузеров: {len(idle)}")
+
+
+    def stats(self) -> dict:
+        """Статистика пула"""
+        with self._condition:
+            return {
+                'size': self.size,
+                'alive': self._total,
+                'idle': len(self._idle),
+                'in_use': self._total - len(self._idle),
+                'created': self.created,
+                'acquired': self.acquired,
+                'recycled': self.recycled,
+                'broken': self.broken,
+            }
+
+
+    def _create(self) -> Optional[PooledDriver]:
+        """Запускает новый браузер, место в пуле уже зарезервировано"""
+        try:
+            driver = self.factory()
+        except Exception:
+            self._release_slot()
+            raise
+
+        if not driver:
+            self._release_slot()
+            return None
+
+        self._count('created')
+        return PooledDriver(driver)
+
+
+    def _is_expired(self, pooled: PooledDriver) -> bool:
+        """Пора ли перезапустить браузер"""
+        if self.max_uses and pooled.uses >= self.max_uses:
+            return True
+        if self.max_age and pooled.age >= self.max_age:
+            return True
+        return False
+
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        """Проверка, что браузер жив и отвечает"""
+        try:
+            pooled.driver.execute_script("return document.readyState")
+            return True
+        except Exception as e:
+            logging.warning(f"Браузер не прошел проверку: {e}")
+            return False
+
+
+    def _reset(self, pooled: PooledDriver) -> bool:
+        """
+        Возвращает браузер на страницу расписания с пустым полем ввода.
+        Куки и хранилища сайта очищаются, чтобы страница не восстановила прошлую группу.
+        """
+        try:
+            pooled.driver.execute_script(CLEAR_STORAGE_SCRIPT)
+            pooled.driver.delete_all_cookies()
+            pooled.driver.get(self.home_url)
+            for group_input in pooled.driver.find_elements(By.CSS_SELECTOR, "input#gr"):
+                group_input.clear()
+            return True
+        except Exception as e:
+            logging.warning(f"Не удалось сбросить браузер: {e}")
+            return False
+
+
+    def _quit(self, pooled: PooledDriver, reason: str):
+        """Закрывает драйвер и освобождает место в пуле"""
+        logging.info(f"♻️ Браузер выведен из пула: {reason}")
+        self._safe_quit(pooled.driver)
+        self._release_slot()
+
+
+    def _count(self, name: str):
+        with self._condition:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+    def _release_slot(self):
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+
+    @staticmethod
+    def _safe_quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            logging.warning("Не удалось закрыть драйвер")
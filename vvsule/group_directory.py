@@ -0,0 +1,64 @@
+"""
+Справочник групп: короткий числовой id для каждой группы.
+Кнопки передают id вместо имени группы, а id и имена держатся в памяти,
+так что БД спрашивается только для новой группы или после перезапуска.
+
+"""
+import logging
+from typing import Optional
+from vvsule.database.crud import crud
+from vvsule.database.database import database
+
+
+class GroupDirectory:
+    """id и имена групп из таблицы groups с кэшем в памяти (групп единицы сотен)"""
+
+    def __init__(self):
+        self._ids = {}  # {имя группы: id}
+        self._names = {}  # {id: имя группы}
+
+
+    def remember(self, group_id: int, group_name: str):
+        self._ids[group_name] = group_id
+        self._names[group_id] = group_name
+
+
+    async def resolve_id(self, group_name: str) -> Optional[int]:
+        """id группы (регистрирует новую), None если БД недоступна"""
+        group_id = self._ids.get(group_name)
+        if group_id is not None:
+            return group_id
+        try:
+            async for session in database.get_session():
+                group = await crud.get_or_create_group(session, group_name)
+                group_id = int(group.id)
+        except Exception as e:
+            logging.warning(f"Не удалось получить id группы {group_name}: {e}")
+            return None
+        if group_id is not None:
+            self.remember(group_id, group_name)
+        return group_id
+
+
+    async def resolve_name(self, group_id: int) -> Optional[str]:
+        """Имя группы по id, None если такой группы нет"""
+        group_name = self._names.get(group_id)
+        if group_name is not None:
+            return group_name
+        try:
+            async for session in database.get_session():
+                group = await crud.get_group_by_id(session, group_id)
+                group_name = group.name if group else None
+        except Exception as e:
+            logging.warning(f"Не удалось найти группу с id {group_id}: {e}")
+            return None
+        if group_name is not None:
+            self.remember(group_id, group_name)
+        return group_name
+
+
+    def stats(self) -> dict:
+        return {'groups': len(self._ids)}
+
+
+group_directory = GroupDirectory()
@@ -2,11 +2,13 @@
 
 from aiogram import Router, types, F, Bot
 from aiogram.filters import Command
-import asyncio
 from vvsule.database.crud import crud
 from vvsule.database.database import database
 from vvsule.keyboards import get_main_menu_keyboard, get_schedule_keyboard
-from vvsule.background_tasks import parse_and_send_schedule
+from vvsule.callback_codec import CURRENT, NEXT, PREV, ScheduleCallback, ScheduleCallbackFilter
+from vvsule.group_directory import group_directory
+from vvsule.task_manager import task_manager
+from vvsule.background_tasks import parse_and_send_schedule, send_day_schedule
 import logging
 
 
@@ -24,17 +26,10 @@ async def process_current_week(callback: types.CallbackQuery, bot: Bot):
         user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
         
         if user and user.group_name:
-            # Редактируем сообщение на "Загрузка..."
             normalized_group = user.group_name.upper()
-
-            await callback.message.edit_text(
-                f"⏳ Загружаю расписание для группы <b>{normalized_group}</b>...\n"
-                f"⏰ Это может занять некоторое время",
-                parse_mode="HTML"
-            )
             
             # Запускаем парсинг в фоне, передаем ID сообщения для редактирования
-            asyncio.create_task(
+            task_manager.spawn(
                 parse_and_send_schedule(
                     bot=bot,
                     chat_id=callback.message.chat.id,
@@ -43,7 +38,9 @@ async def process_current_week(callback: types.CallbackQuery, bot: Bot):
                     week_type="current",
                     offset=0,
                     message_id=callback.message.message_id  # Передаем ID сообщения для редактирования
-                )
+                ),
+                key=(callback.message.chat.id, callback.message.message_id),
+                name="current_week"
             )
         else:
             await callback.message.edit_text(
@@ -53,43 +50,93 @@ async def process_current_week(callback: types.CallbackQuery, bot: Bot):
             )
 
 
-@router.callback_query(F.data.startswith("schedule_"))
-async def process_schedule_navigation(callback: types.CallbackQuery, bot: Bot):
-    """Обработчик навигации по расписанию"""
-    # НЕМЕДЛЕННО отвечаем
-    await callback.answer("⌛")
+DAY_OFFSETS = {"today": 0, "tomorrow": 1}
+
+
+@router.message(Command("today", "tomorrow"))
+async def cmd_day(message: types.Message, bot: Bot):
+    """Обработчик команд /today и /tomorrow"""
+    day_offset = DAY_OFFSETS[message.text.split()[0].split("@")[0].lstrip("/").lower()]
     
-    # Формат данных: schedule_[direction]_[group]
-    parts = callback.data.split("_")
-    if len(parts) >= 3:
-        direction = parts[1]  # current, next, prev
-        group_name = "_".join(parts[2:])  # восстанавливаем группу
-        
-        normalized_group = group_name.upper()
+    user = None
+    async for session in database.get_session():
+        user = await crud.get_user_by_telegram_id(session, message.from_user.id)
+    
+    if not user or not user.group_name:
+        await message.answer("❌ У вас не сохранена группа.\nНажмите /start и введите группу")
+        return
+    
+    task_manager.spawn(
+        send_day_schedule(
+            bot=bot,
+            chat_id=message.chat.id,
+            group_name=user.group_name,
+            day_offset=day_offset
+        ),
+        name="day_command"
+    )
 
-        offset = 0
-        if direction == "prev":
-            offset = -1
-        elif direction == "next":
-            offset = 1
-        elif direction == "current":
-            offset = 0
-        
-        # Редактируем сообщение на "Загрузка..."
+
+@router.callback_query(F.data.startswith("day_"))
+async def process_day(callback: types.CallbackQuery, bot: Bot):
+    """Обработчик кнопок 'Сегодня' и 'Завтра'"""
+    await callback.answer("⌛")
+    day_offset = DAY_OFFSETS.get(callback.data.replace("day_", ""), 0)
+    
+    user = None
+    async for session in database.get_session():
+        user = await crud.get_user_by_telegram_id(session, callback.from_user.id)
+    
+    if not user or not user.group_name:
         await callback.message.edit_text(
-            f"⏳ Загружаю расписание для группы <b>{normalized_group}</b>...",
-            parse_mode="HTML"
+            "❌ У вас не сохранена группа.\n"
+            "Введите название группы:",
+            reply_markup=None
         )
-        
-        # Запускаем парсинг в фоне, передаем ID сообщения для редактирования
-        asyncio.create_task(
-            parse_and_send_schedule(
-                bot=bot,
-                chat_id=callback.message.chat.id,
-                group_name=normalized_group,
-                user_id=callback.from_user.id,
-                week_type=direction,
-                offset=offset,
-                message_id=callback.message.message_id  # Передаем ID сообщения для редактирования
-            )
-        )
\ No newline at end of file
+        return
+    
+    task_manager.spawn(
+        send_day_schedule(
+            bot=bot,
+            chat_id=callback.message.chat.id,
+            group_name=user.group_name,
+            day_offset=day_offset,
+            message_id=callback.message.message_id
+        ),
+        key=(callback.message.chat.id, callback.message.message_id),
+        name="day"
+    )
+
+
+@router.callback_query(ScheduleCallbackFilter(PREV, CURRENT, NEXT))
+async def process_schedule_navigation(callback: types.CallbackQuery, bot: Bot, schedule_callback: ScheduleCallback):
+    """Обработчик навигации по расписанию (кнопки любого формата, см. callback_codec)"""
+    # НЕМЕДЛЕННО отвечаем
+    await callback.answer("⌛")
+    
+    group_name = schedule_callback.group_name
+    if group_name is None:
+        group_name = await group_directory.resolve_name(schedule_callback.group_id)
+        if group_name is None:
+            await callback.message.edit_text("❌ Кнопка устарела, нажмите /start", reply_markup=None)
+            return
+    
+    normalized_group = group_name.upper()
+    direction = schedule_callback.action
+    offset = {PREV: -1, CURRENT: 0, NEXT: 1}[direction]
+    
+    # Запускаем парсинг в фоне; более новое нажатие на этом сообщении отменит эту задачу
+    task_manager.spawn(
+        parse_and_send_schedule(
+            bot=bot,
+            chat_id=callback.message.chat.id,
+            group_name=normalized_group,
+            user_id=callback.from_user.id,
+            week_type=direction,
+            offset=offset,
+            message_id=callback.message.message_id,  # Передаем ID сообщения для редактирования
+            week=schedule_callback.week
+        ),
+        key=(callback.message.chat.id, callback.message.message_id),
+        name="schedule_navigation"
+    )
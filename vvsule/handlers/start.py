@@ -11,6 +11,8 @@ from aiogram.fsm.state import State, StatesGroup
 from vvsule.database.crud import crud
 from vvsule.database.database import database
 from vvsule.keyboards import get_welcome_keyboard, get_main_menu_keyboard
+from vvsule.callback_codec import MAIN_MENU, ScheduleCallback, ScheduleCallbackFilter
+from vvsule.group_directory import group_directory
 
 
 router = Router()
@@ -42,6 +44,9 @@ async def cmd_start(message: types.Message):
 
 🎓 Этот бот для вывода расписания занятий ВВГУ
 
+/today - занятия на сегодня
+/tomorrow - занятия на завтра
+
     """
 
     # Отправляем сообщение с кнопкой для ввода группы
@@ -91,10 +96,12 @@ async def process_change_group(callback: types.CallbackQuery, state: FSMContext)
     await process_input_group(callback, state)
 
 
-@router.callback_query(F.data.startswith("main_menu_"))
-async def process_main_menu(callback: types.CallbackQuery):
+@router.callback_query(ScheduleCallbackFilter(MAIN_MENU))
+async def process_main_menu(callback: types.CallbackQuery, schedule_callback: ScheduleCallback):
     """Обработчик возврата из расписания в главное меню"""
-    group_name = callback.data.replace("main_menu_", "")
+    group_name = schedule_callback.group_name
+    if group_name is None:
+        group_name = await group_directory.resolve_name(schedule_callback.group_id) or ""
     
     await callback.message.edit_text(
         f"✅ Группа: <b>{group_name}</b>\n\n"
@@ -0,0 +1,289 @@
+"""
+Парсинг расписания vvsu.ru без браузера.
+Забирает серверную страницу расписания группы по HTTP (aiohttp с общим пулом
+соединений) и разбирает таблицы недель встроенным HTML-парсером.
+
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import List, Optional
+from urllib.parse import urljoin
+import aiohttp
+from vvsule.timetable_rows import build_lessons_from_rows
+
+
+# Теги, которые в innerText начинаются с новой строки
+BLOCK_TAGS = {"div", "p", "li", "ul", "ol", "tr", "table", "h1", "h2", "h3", "h4", "h5", "h6", "section"}
+VOID_TAGS = {"br", "img", "input", "meta", "link", "hr", "source", "col", "wbr", "area", "base", "embed", "track"}
+
+
+class Node:
+    """Элемент HTML-дерева"""
+
+    def __init__(self, tag: str, attrs: dict, parent: "Node" = None):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []  # Node или str
+
+    @property
+    def classes(self) -> set:
+        return set((self.attrs.get("class") or "").split())
+
+    def iter(self):
+        """Обход потомков в порядке документа"""
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.iter()
+
+    def find_all(self, tag: str, **attrs) -> List["Node"]:
+        """Все потомки с тегом и совпадающими атрибутами"""
+        return [
+            node for node in self.iter()
+            if node.tag == tag and all(node.attrs.get(k) == v for k, v in attrs.items())
+        ]
+
+    def find(self, tag: str, **attrs) -> Optional["Node"]:
+        """Первый потомок с тегом и совпадающими атрибутами"""
+        found = self.find_all(tag, **attrs)
+        return found[0] if found else None
+
+    @property
+    def text(self) -> str:
+        """Видимый текст, как его отдает innerText/WebElement.text"""
+        parts = []
+        self._collect_text(parts)
+        lines = []
+        for line in "".join(parts).split("\n"):
+            line = " ".join(line.split())
+            if line:
+                lines.append(line)
+        return "\n".join(lines)
+
+    def _collect_text(self, parts: list):
+        if self.tag in ("script", "style"):
+            return
+        if self.tag == "br":
+            parts.append("\n")
+            return
+        block = self.tag in BLOCK_TAGS
+        if block:
+            parts.append("\n")
+        for child in self.children:
+            if isinstance(child, Node):
+                child._collect_text(parts)
+            else:
+                parts.append(child)
+        if block:
+            parts.append("\n")
+
+
+class TreeBuilder(HTMLParser):
+    """Строит дерево Node из HTML"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("document", {})
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: (value if value is not None else "") for name, value in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        node = Node(tag, {name: (value if value is not None else "") for name, value in attrs}, self.current)
+        self.current.children.append(node)
+
+    def handle_endtag(self, tag):
+        # Поднимаемся до ближайшего открытого элемента с этим тегом
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def parse_html(html: str) -> Node:
+    """Разбирает HTML в дерево"""
+    builder = TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def read_table_rows(table: Node, base_url: str = "") -> list:
+    """Строки таблицы недели в формате build_lessons_from_rows"""
+    rows = []
+    # Браузер сам достраивает tbody, в исходном HTML его может не быть
+    for tbody in table.find_all("tbody") or [table]:
+        for row in tbody.find_all("tr"):
+            cells = {}
+            for td in row.find_all("td"):
+                header = td.attrs.get("data-th")
+                if header and header not in cells:
+                    cells[header] = td
+
+            date = cells.get("Дата")
+            discipline = cells.get("Дисциплина")
+            discipline_cell = None
+            if discipline is not None:
+                discipline_cell = {"text": discipline.text}
+                link = discipline.find("a")
+                if link is not None:
+                    href = link.attrs.get("href")
+                    discipline_cell["link"] = None if href is None else _absolute_url(base_url, href)
+
+            rows.append({
+                "date": {"text": date.text, "rowspan": date.attrs.get("rowspan")} if date is not None else None,
+                "time": cells["Время"].text if "Время" in cells else None,
+                "discipline": discipline_cell,
+                "room": cells["Аудитория"].text if "Аудитория" in cells else None,
+                "teacher": cells["Преподаватель"].text if "Преподаватель" in cells else None,
+                "type": cells["Занятие"].text if "Занятие" in cells else None,
+            })
+    return rows
+
+
+def extract_week_tables(document: Node) -> List[Node]:
+    """Таблицы недель карусели, начиная с активной (текущей) недели"""
+    items = [node for node in document.iter() if node.tag == "div" and "carousel-item" in node.classes]
+    active_index = next((i for i, item in enumerate(items) if "active" in item.classes), None)
+    if active_index is None:
+        return []
+
+    tables = []
+    for item in items[active_index:]:
+        table = next(
+            (node for node in item.iter() if node.tag == "table" and "table-no-transform" in node.classes),
+            None
+        )
+        if table is None:
+            break
+        tables.append(table)
+    return tables
+
+
+def build_timetable_result(html: str, normalized_group: str, max_weeks: int, base_url: str = "",
+                           on_progress=None, start_week: int = 0) -> dict:
+    """Результат парсинга в том же формате, что у Selenium-парсера"""
+    tables = extract_week_tables(parse_html(html))
+    if not tables:
+        return {"success": False, "error": f"Группа {normalized_group} не найдена", "weeks": []}
+
+    all_weeks_schedule = []
+    # Как и в Selenium-парсере: первая неделя отдается даже пустой (или если ее нет на сайте),
+    # пустая следующая неделя означает конец расписания
+    for table in tables[start_week:start_week + max_weeks] or [None]:
+        week_schedule = build_lessons_from_rows(read_table_rows(table, base_url)) if table is not None else []
+        if all_weeks_schedule and not week_schedule:
+            break
+        all_weeks_schedule.append(week_schedule)
+        if on_progress:
+            on_progress("week", index=len(all_weeks_schedule) - 1, lessons=week_schedule)
+
+    return {
+        'success': True,
+        'group_name': normalized_group,
+        'weeks': all_weeks_schedule,
+        'start_week': start_week,
+        'parsed_at': datetime.now().isoformat(),
+        'total_weeks': len(all_weeks_schedule)
+    }
+
+
+def _absolute_url(base_url: str, href: str) -> str:
+    return urljoin(base_url, href) if base_url else href
+
+
+class HttpTimetableClient:
+    """HTTP-клиент расписания с общим пулом соединений и собственным event loop"""
+
+    def __init__(self, timetable_url: str, group_param: str, timeout: float, connection_limit: int):
+        self.timetable_url = timetable_url
+        self.group_param = group_param
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self._session = None
+        self._loop = None
+        self._lock = threading.Lock()
+
+
+    async def fetch_html(self, group_name: str) -> str:
+        """Загружает страницу расписания группы"""
+        session = await self._get_session()
+        async with session.get(self.timetable_url, params={self.group_param: group_name}) as response:
+            response.raise_for_status()
+            return await response.text()
+
+
+    async def parse(self, group_name: str, max_weeks: int = 3, on_progress=None, start_week: int = 0) -> dict:
+        """Парсинг расписания группы без браузера"""
+        normalized_group = group_name.upper()
+        try:
+            html = await self.fetch_html(normalized_group)
+            if on_progress:
+                on_progress("page_loaded")
+            return build_timetable_result(
+                html, normalized_group, max_weeks, base_url=self.timetable_url,
+                on_progress=on_progress, start_week=start_week
+            )
+        except Exception as e:
+            logging.error(f"Ошибка HTTP-парсинга для {normalized_group}: {e}")
+            return {"success": False, "error": f"Ошибка HTTP-парсинга: {e}", "weeks": []}
+
+
+    def parse_sync(self, group_name: str, max_weeks: int = 3, on_progress=None, start_week: int = 0) -> dict:
+        """Синхронная обертка: выполняет parse в event loop клиента"""
+        future = asyncio.run_coroutine_threadsafe(
+            self.parse(group_name, max_weeks, on_progress, start_week), self._get_loop()
+        )
+        try:
+            return future.result(timeout=self.timeout + 5)
+        except Exception as e:
+            future.cancel()
+            logging.error(f"HTTP-парсинг не завершился: {e}")
+            return {"success": False, "error": f"Ошибка HTTP-парсинга: {e}", "weeks": []}
+
+
+    def close(self):
+        """Закрывает сессию и останавливает event loop клиента"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=5)
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": "Mozilla/5.0 (VVSUle timetable bot)"}
+            )
+        return self._session
+
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop в отдельном потоке, к которому привязана сессия aiohttp"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="http-timetable-loop",
+                    daemon=True
+                ).start()
+            return self._loop
@@ -3,6 +3,8 @@ Inline-keyboards для бота.
 """
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from vvsule.callback_codec import CURRENT, MAIN_MENU, NEXT, PREV, encode_callback, encode_week
+from vvsule.schedule_calendar import shift_week
 
 
 def get_welcome_keyboard() -> InlineKeyboardMarkup:
@@ -22,22 +24,62 @@ def get_main_menu_keyboard(group_name: str = None) -> InlineKeyboardMarkup:
     """Основное меню с выбором недели"""
     builder = InlineKeyboardBuilder()
     
+    builder.button(text="☀️ Сегодня", callback_data="day_today")
+    builder.button(text="🌙 Завтра", callback_data="day_tomorrow")
     builder.button(text="📅 Текущая неделя", callback_data="current_week")
     builder.button(text="Назад", callback_data="input_group")
     
-    builder.adjust(1, 1)
+    builder.adjust(2, 1, 1)
     return builder.as_markup()
 
 
-def get_schedule_keyboard(group_name: str, week_type: str = "current") -> InlineKeyboardMarkup:
-    """Клавиатура при просмотре расписания"""
+def main_menu_callback(group_name: str, group_id: int = None) -> str:
+    """Callback data кнопки 'Назад': id группы из справочника или, если он неизвестен, имя"""
+    if group_id is not None:
+        return encode_callback(MAIN_MENU, group_id)
+    return f"main_menu_{group_name}"
+
+
+def get_day_keyboard(group_name: str, group_id: int = None) -> InlineKeyboardMarkup:
+    """Клавиатура при просмотре расписания на день"""
     builder = InlineKeyboardBuilder()
     
+    builder.button(text="☀️ Сегодня", callback_data="day_today")
+    builder.button(text="🌙 Завтра", callback_data="day_tomorrow")
+    builder.button(text="📅 Неделя", callback_data="current_week")
+    builder.button(text="Назад", callback_data=main_menu_callback(group_name, group_id))
+    
+    builder.adjust(2, 1, 1)
+    return builder.as_markup()
+
+
+def get_schedule_keyboard(group_name: str, week_type: str = "current", week: str = None,
+                          group_id: int = None) -> InlineKeyboardMarkup:
+    """
+    Клавиатура при просмотре расписания.
+    Если известна показанная неделя, кнопки несут соседние недели,
+    и для навигации не нужно хранить позицию пользователя.
+    С id группы кнопки кодируются компактно (callback_codec), без него - в старом формате.
+    """
+    builder = InlineKeyboardBuilder()
+    
+    prev_week = shift_week(week, -1) if week else None
+    next_week = shift_week(week, 1) if week else None
+    
+    if group_id is not None:
+        prev_data = encode_callback(PREV, group_id, prev_week)
+        current_data = encode_callback(CURRENT, group_id)
+        next_data = encode_callback(NEXT, group_id, next_week)
+    else:
+        prev_data = f"schedule_prev_{group_name}" + (f"@{encode_week(prev_week)}" if prev_week else "")
+        current_data = f"schedule_current_{group_name}"
+        next_data = f"schedule_next_{group_name}" + (f"@{encode_week(next_week)}" if next_week else "")
+    
     # Кнопки навигации по неделям
-    builder.button(text="⏪", callback_data=f"schedule_prev_{group_name}")
-    builder.button(text="Текущая", callback_data=f"schedule_current_{group_name}")
-    builder.button(text="⏩", callback_data=f"schedule_next_{group_name}")
-    builder.button(text="Назад", callback_data=f"main_menu_{group_name}")
+    builder.button(text="⏪", callback_data=prev_data)
+    builder.button(text="Текущая", callback_data=current_data)
+    builder.button(text="⏩", callback_data=next_data)
+    builder.button(text="Назад", callback_data=main_menu_callback(group_name, group_id))
     
     builder.adjust(3, 1)
     return builder.as_markup()
\ No newline at end of file
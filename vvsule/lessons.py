@@ -0,0 +1,75 @@
+"""
+Занятия расписания в таблице lessons.
+Парсер отдает занятия словарями с подписями колонок сайта ('Дата', 'Время', ...).
+При сохранении дата и время разбираются в типизированные колонки, при чтении
+строки собираются обратно в те же словари для бота и веб-API.
+
+"""
+import json
+from vvsule.database.models import Lesson
+from vvsule.schedule_calendar import parse_lesson_date, parse_time_range
+
+
+# Колонка lessons и ключ словаря занятия (в порядке парсера)
+TEXT_FIELDS = (
+    ('discipline', 'Дисциплина'),
+    ('webinar_url', 'Ссылка на вебинар'),
+    ('room', 'Аудитория'),
+    ('teacher', 'Преподаватель'),
+    ('lesson_type', 'Тип занятия'),
+)
+
+
+def make_lessons(group_name: str, week_key: str, lessons: list) -> list:
+    """Строки lessons для занятий одной недели"""
+    records = []
+    for position, lesson in enumerate(lessons):
+        date_text = lesson.get('Дата')
+        time_text = lesson.get('Время')
+        start_time, end_time = parse_time_range(time_text)
+        records.append(Lesson(
+            group_name=group_name,
+            week_key=week_key,
+            position=position,
+            lesson_date=parse_lesson_date(date_text),
+            start_time=start_time,
+            end_time=end_time,
+            date_text=date_text,
+            time_text=time_text,
+            **{column: lesson.get(field) for column, field in TEXT_FIELDS}
+        ))
+    return records
+
+
+def lesson_dict(record: Lesson) -> dict:
+    """
+    Словарь занятия в формате парсера: те же ключи, что были при сохранении
+    (NULL - ключа не было), чтобы хэш недели не менялся после чтения из БД
+    """
+    lesson = {}
+    if record.date_text is not None:
+        lesson['Дата'] = record.date_text
+    if record.time_text is not None:
+        lesson['Время'] = record.time_text
+    for column, field in TEXT_FIELDS:
+        value = getattr(record, column)
+        if value is not None:
+            lesson[field] = value
+    return lesson
+
+
+def week_blobs(rows) -> dict:
+    """
+    Недели для assemble_schedule из строк запроса
+    (ключ недели, время обновления, Lesson или None для недели без занятий),
+    упорядоченных по неделе и position: {ключ недели: (JSON занятий, время обновления)}.
+    """
+    weeks = {}
+    for key, last_updated, record in rows:
+        _updated, lessons = weeks.setdefault(key, (last_updated, []))
+        if record is not None:
+            lessons.append(lesson_dict(record))
+    return {
+        key: (json.dumps(lessons, ensure_ascii=False), last_updated)
+        for key, (last_updated, lessons) in weeks.items()
+    }
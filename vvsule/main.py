@@ -1,15 +1,23 @@
 """
 Инициализирует бота, диспетчер, подключает роутеры.
-Запускает polling для получения сообщений от Telegram.
+Получает обновления от Telegram через polling или webhook (BOT_MODE).
 
 """
 from aiogram import Bot, Dispatcher
+from aiogram.types import BotCommand
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 import asyncio
 import logging
 from config import config
 from vvsule.database.database import database
+from vvsule.cache_warmer import cache_warmer
+from vvsule.message_cache import message_digests
+from vvsule.outbound import outbound_dispatcher
+from vvsule.task_manager import task_manager
+from vvsule.webhook import run_webhook
 
 # Импортируем роутеры
 from vvsule.handlers.start import router as start_router
@@ -22,6 +30,15 @@ logging.basicConfig(
 )
 
 
+def create_storage():
+    """Хранилище состояний диалогов: в Redis для нескольких реплик, иначе в памяти"""
+    if not config.webhook.fsm_redis_url:
+        return MemoryStorage()
+    # Пакет redis нужен только при нескольких репликах
+    from aiogram.fsm.storage.redis import RedisStorage
+    return RedisStorage.from_url(config.webhook.fsm_redis_url)
+
+
 async def main():
     """Основная функция запуска бота"""
 
@@ -30,20 +47,53 @@ async def main():
     logging.info("База данных инициализирована")
 
     # Инициализируем бота и диспетчер
+    session = None
+    if config.telegram.api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(config.telegram.api_url))
     bot = Bot(
         token=config.telegram.token,
+        session=session,
         default=DefaultBotProperties(parse_mode="HTML")
     )
-    storage = MemoryStorage()
+    # Одинаковые правки сообщений не отправляются в Bot API,
+    # остальные запросы к чатам ждут своей очереди по лимитам Telegram
+    bot.session.middleware(message_digests)
+    bot.session.middleware(outbound_dispatcher)
+    storage = create_storage()
     dp = Dispatcher(storage=storage)
 
     # Регистрируем роутеры
     dp.include_router(start_router)
     dp.include_router(schedule_router)
 
+    # Команды в меню Telegram
+    await bot.set_my_commands([
+        BotCommand(command="start", description="Начать работу и выбрать группу"),
+        BotCommand(command="today", description="Занятия на сегодня"),
+        BotCommand(command="tomorrow", description="Занятия на завтра"),
+    ])
+
+    # Прогреваем кэш групп активных пользователей
+    warmer_task = None
+    if config.warmer.enabled:
+        warmer_task = asyncio.create_task(cache_warmer.run())
+
     # Запускаем бота
-    logging.info("Бот запущен...")
-    await dp.start_polling(bot)
+    try:
+        if config.webhook.enabled:
+            logging.info("Бот запущен (webhook)...")
+            await run_webhook(dp, bot)
+        else:
+            logging.info("Бот запущен...")
+            # После работы в режиме webhook getUpdates недоступен, пока webhook не удален
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        if warmer_task:
+            warmer_task.cancel()
+        # Начатые ответы дописываются до закрытия очереди отправки
+        await task_manager.drain(config.tasks.drain_timeout)
+        await outbound_dispatcher.close()
 
 
 if __name__ == "__main__":
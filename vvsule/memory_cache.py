@@ -0,0 +1,125 @@
+"""
+Кэш расписания в памяти процесса перед кэшем в PostgreSQL.
+LRU с TTL и ограничением по размеру, общий для бота и веб-приложения.
+
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from config import config
+
+
+class MemoryCache:
+    """Потокобезопасный LRU-кэш с TTL и лимитом по байтам"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # {key: (value, size, expires_at)}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+
+    def get(self, key: str) -> Optional[Any]:
+        """Значение по ключу или None (промах или истек TTL)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def put(self, key: str, value: Any, size: int):
+        """Сохраняет значение; size - примерный размер в байтах"""
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+
+            # Вытесняем давно не использованные записи
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry[2]
+
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+    def invalidate(self, key: str):
+        """Удаляет запись (после записи нового расписания в БД)"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+    def stats(self) -> dict:
+        """Статистика кэша"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+    def _remove(self, key: str):
+        _value, size, _expires_at = self._entries.pop(key)
+        self._bytes -= size
+
+
+# Кэш расписаний групп: {группа: (данные, время обновления в БД)}
+schedule_memory_cache = MemoryCache(
+    max_entries=config.cache.memory_max_entries,
+    max_bytes=config.cache.memory_max_bytes,
+    ttl=config.cache.memory_ttl
+)
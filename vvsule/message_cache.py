@@ -0,0 +1,118 @@
+"""
+Готовые сообщения бота с расписанием недели.
+Текст, уже разбитый на части по лимиту Telegram, и клавиатура хранятся по группе,
+ключу недели и хэшу ее занятий: когда расписание меняется, меняется и хэш,
+поэтому старое сообщение больше не находится и вытесняется LRU.
+
+Для отправленных сообщений запоминается хэш последнего содержимого:
+правка, которая ничего не меняет, до Bot API не доходит. Хэши хранятся в памяти
+процесса, поэтому в режиме webhook (несколько реплик) пропуск выключен: правку
+могла сделать другая реплика, и хэш этой может быть устаревшим.
+
+"""
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Optional
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText, Response, SendMessage, TelegramMethod
+from aiogram.types import InlineKeyboardMarkup, Message
+from config import config
+from vvsule.memory_cache import MemoryCache
+
+
+EDIT_WINDOW = 48 * 3600  # Telegram разрешает править сообщения бота 48 часов
+SENT_MESSAGES_MAX = 50000  # Сколько сообщений помнить
+DIGEST_SIZE = 128  # Примерный размер записи о сообщении (байт)
+
+
+@dataclass
+class RenderedMessage:
+    """Готовое сообщение: части текста и клавиатура"""
+    parts: list
+    keyboard: InlineKeyboardMarkup
+
+    @property
+    def size(self) -> int:
+        """Примерный размер в памяти (байт)"""
+        return sum(len(part) for part in self.parts) * 2
+
+
+def message_key(group_name: str, week: str, week_hash: str, variant: str) -> str:
+    """Ключ сообщения; variant - все, что кроме занятий влияет на текст (заголовок, пометка stale)"""
+    return f"{group_name}|{week}|{week_hash}|{variant}"
+
+
+rendered_messages = MemoryCache(
+    max_entries=config.cache.rendered_max_entries,
+    max_bytes=config.cache.rendered_max_bytes,
+    ttl=config.cache.rendered_ttl
+)
+
+
+def message_digest(text: str, keyboard: Optional[InlineKeyboardMarkup]) -> str:
+    """Хэш содержимого сообщения: текст и клавиатура"""
+    markup = keyboard.model_dump_json(exclude_none=True) if keyboard else ""
+    return hashlib.sha256(f"{text}\0{markup}".encode("utf-8")).hexdigest()
+
+
+class MessageDigests(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: помнит хэш последнего содержимого каждого сообщения.
+    Правка с тем же содержимым не отправляется (если skip_unchanged), а ответ
+    "message is not modified" считается успехом. Другие изменения сообщения сбрасывают запись.
+    """
+
+    def __init__(self, max_entries: int = SENT_MESSAGES_MAX, ttl: float = EDIT_WINDOW,
+                 skip_unchanged: bool = True):
+        self.sent = MemoryCache(max_entries=max_entries, max_bytes=max_entries * DIGEST_SIZE, ttl=ttl)
+        self.skip_unchanged = skip_unchanged
+        self.skipped = 0
+
+    async def __call__(self, make_request, bot: Bot, method: TelegramMethod):
+        if isinstance(method, EditMessageText) and method.message_id:
+            return await self._edit(make_request, bot, method)
+
+        message_id = getattr(method, 'message_id', None)
+        if message_id:
+            # Сообщение меняется не текстом (клавиатура, удаление) - прежний хэш неверен
+            self.sent.invalidate(f"{method.chat_id}:{message_id}")
+
+        response = await make_request(bot, method)
+        if isinstance(method, SendMessage) and isinstance(response.result, Message):
+            self.remember(method.chat_id, response.result.message_id, method.text, method.reply_markup)
+        return response
+
+    def remember(self, chat_id, message_id: int, text: str, keyboard):
+        self.sent.put(f"{chat_id}:{message_id}", message_digest(text, keyboard), size=DIGEST_SIZE)
+
+    def stats(self) -> dict:
+        return {
+            'messages': self.sent.stats()['entries'],
+            'skip_unchanged': self.skip_unchanged,
+            'skipped_edits': self.skipped,
+        }
+
+    async def _edit(self, make_request, bot: Bot, method: EditMessageText):
+        key = f"{method.chat_id}:{method.message_id}"
+        digest = message_digest(method.text, method.reply_markup)
+        if self.skip_unchanged and self.sent.get(key) == digest:
+            self.skipped += 1
+            return Response(ok=True, result=True)
+
+        try:
+            response = await make_request(bot, method)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in e.message:
+                self.sent.invalidate(key)
+                raise
+            logging.info(f"Сообщение {key} не изменилось")
+            response = Response(ok=True, result=True)
+        self.sent.put(key, digest, size=DIGEST_SIZE)
+        return response
+
+
+# Хэши есть только у своей реплики, при нескольких репликах (webhook) правки не пропускаются
+message_digests = MessageDigests(skip_unchanged=not config.webhook.enabled)
@@ -0,0 +1,227 @@
+"""
+Исходящие запросы бота к Bot API.
+Все запросы к чатам (отправка, правка, удаление сообщений) проходят через одну
+очередь с ведрами токенов: общее на бота и по одному на чат. Очередь разбирается
+по приоритету (ответ пользователю раньше промежуточных сообщений), за один проход
+пропускаются все запросы, для которых есть токены. Ответ 429 (RetryAfter)
+приостанавливает чат на указанное время, а запрос повторяется.
+
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Optional
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from config import config
+from vvsule.memory_cache import MemoryCache
+
+
+CHATS_MAX = 20000  # Сколько чатов помнить
+CHAT_BUCKET_TTL = 3600  # Ведро чата без отправок забывается (сек)
+BUCKET_SIZE = 96  # Примерный размер ведра в памяти (байт)
+
+
+class OutboundPriority(IntEnum):
+    """Приоритет отправки: меньше значение - раньше"""
+    INTERACTIVE = 0  # Ответ на действие пользователя
+    PROGRESS = 1  # Промежуточные сообщения (место в очереди)
+
+
+outbound_priority = ContextVar("outbound_priority", default=OutboundPriority.INTERACTIVE)
+
+
+@contextmanager
+def sending_priority(priority: OutboundPriority):
+    """Запросы внутри блока (и созданных в нем задач) идут с этим приоритетом"""
+    token = outbound_priority.set(priority)
+    try:
+        yield
+    finally:
+        outbound_priority.reset(token)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate: float, capacity: int, now: float = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+        self.paused_until = 0.0  # До этого момента отправлять нельзя (RetryAfter)
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Через сколько секунд появится токен (0 - уже есть)"""
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.paused_until - now)
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, now: float, seconds: float):
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class OutboundDispatcher(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: запросы с chat_id ждут токенов в очереди по приоритету.
+    Ответы на кнопки, getUpdates и настройки бота в лимиты сообщений не входят
+    и отправляются сразу.
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: int, group_chat_rate: float,
+                 max_retries: int, max_chats: int = CHATS_MAX):
+        self.global_bucket = TokenBucket(global_rate, max(1, int(global_rate)))
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_chat_rate = group_chat_rate
+        self.max_retries = max_retries
+        self.chats = MemoryCache(max_entries=max_chats, max_bytes=max_chats * BUCKET_SIZE, ttl=CHAT_BUCKET_TTL)
+        self._queue = []  # Куча [(приоритет, порядок, чат, future, время постановки)]
+        self._seq = itertools.count()
+        self._worker = None
+        self._wakeup = None
+        self.sent = 0
+        self.retried = 0
+        self.granted = 0
+        self.passes = 0  # Проходов очереди, в которых кто-то был пропущен
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def __call__(self, make_request, bot: Bot, method: TelegramMethod):
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = outbound_priority.get()
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(chat_id, priority)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retried += 1
+                self._chat_bucket(chat_id).pause(time.monotonic(), e.retry_after)
+                logging.warning(f"⏳ Telegram просит подождать {e.retry_after} сек (чат {chat_id})")
+                if attempt == self.max_retries:
+                    raise
+                continue
+            self.sent += 1
+            return response
+
+    async def acquire(self, chat_id, priority: OutboundPriority = OutboundPriority.INTERACTIVE):
+        """Ждет, пока запрос в чат можно отправить"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), chat_id, future, time.monotonic()))
+        self._wakeup.set()
+        await future
+
+    def stats(self) -> dict:
+        queue = list(self._queue)
+        depth = Counter(OutboundPriority(item[0]).name.lower() for item in queue)
+        return {
+            'queued': len(queue),
+            'queued_by_priority': dict(depth),
+            'sent': self.sent,
+            'retry_after': self.retried,
+            'batches': self.passes,
+            'wait_avg_ms': round(self.wait_total / self.granted * 1000, 1) if self.granted else 0.0,
+            'wait_max_ms': round(self.wait_max * 1000, 1),
+            'chats': self.chats.stats()['entries'],
+        }
+
+    async def close(self):
+        """Останавливает очередь (при остановке бота)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            for item in self._queue:
+                item[3].cancel()
+            self._queue = []
+            self._worker = None
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        key = str(chat_id)
+        bucket = self.chats.get(key)
+        if bucket is None:
+            # У личных чатов id положительный, у групп и каналов - отрицательный или @username
+            private = isinstance(chat_id, int) and chat_id > 0
+            bucket = TokenBucket(self.chat_rate if private else self.group_chat_rate, self.chat_burst)
+            self.chats.put(key, bucket, size=BUCKET_SIZE)
+        return bucket
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._worker.get_loop() is not loop:
+            # Цикл событий сменился (перезапуск бота) - старые ожидающие ему не принадлежат
+            self._queue = []
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            delay = self._grant(time.monotonic())
+            self._wakeup.clear()
+            if delay is None:
+                await self._wakeup.wait()
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _grant(self, now: float) -> Optional[float]:
+        """
+        Пропускает по порядку приоритетов всех, для кого есть токены.
+        Возвращает, через сколько секунд появится токен для следующего (None - очередь пуста).
+        """
+        waiting = []
+        next_delay = None
+        granted = 0
+        for item in sorted(self._queue):
+            _priority, _seq, chat_id, future, queued_at = item
+            if future.done():
+                continue  # Ожидавший запрос отменен
+            bucket = self._chat_bucket(chat_id)
+            delay = max(self.global_bucket.delay(now), bucket.delay(now))
+            if delay > 0:
+                waiting.append(item)
+                next_delay = delay if next_delay is None else min(next_delay, delay)
+                continue
+            self.global_bucket.take(now)
+            bucket.take(now)
+            self.wait_total += now - queued_at
+            self.wait_max = max(self.wait_max, now - queued_at)
+            granted += 1
+            future.set_result(None)
+        if granted:
+            self.granted += granted
+            self.passes += 1
+        self._queue = waiting  # Отсортированный список - уже куча
+        return next_delay
+
+
+outbound_dispatcher = OutboundDispatcher(
+    global_rate=config.outbound.global_rate,
+    chat_rate=config.outbound.chat_rate,
+    chat_burst=config.outbound.chat_burst,
+    group_chat_rate=config.outbound.group_chat_rate,
+    max_retries=config.outbound.max_retries
+)
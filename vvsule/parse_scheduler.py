@@ -0,0 +1,313 @@
+"""
+Планировщик парсинга расписания.
+Ограничивает число одновременных парсингов (по памяти контейнера) и выполняет
+задачи по приоритету: запросы пользователей, затем прогрев кэша.
+Ночной обход групп (vvsule/crawler.py) идет отдельным процессом со своим пулом
+и через этот планировщик не проходит.
+Для каждой задачи можно узнать место в очереди и примерное время ожидания,
+а на ход парсинга можно подписаться, даже если задачу поставил кто-то другой.
+
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Optional
+
+
+DEFAULT_PARSE_SECONDS = 15.0  # Оценка длительности парсинга, пока нет замеров
+DURATION_SMOOTHING = 0.3  # Вес нового замера в скользящем среднем
+
+
+class Priority(IntEnum):
+    """Приоритет задачи: меньше значение - раньше выполнение"""
+    INTERACTIVE = 0  # Пользователь ждет ответа
+    WARM = 1  # Прогрев кэша
+
+
+class ParseJob:
+    """Задача парсинга в очереди планировщика"""
+
+    def __init__(self, job_id: int, seq: int, key: str, priority: Priority, fn, args: tuple, kwargs: dict):
+        self.id = job_id
+        self.seq = seq  # Порядок постановки, для FIFO внутри приоритета
+        self.key = key
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.state = 'queued'  # queued, running, done
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.listeners = []  # Подписчики на ход парсинга: listener(event, **data)
+        self.history = []  # [(событие, данные)] - для тех, кто подпишется позже
+        self._lock = threading.Lock()
+
+
+    def subscribe(self, listener):
+        """Подписывает на ход задачи; уже прошедшие события отдаются сразу"""
+        with self._lock:
+            for event, data in self.history:
+                self._notify(listener, event, data)
+            self.listeners.append(listener)
+
+
+    def progress(self, event: str, **data):
+        """on_progress для fn: рассылает событие всем подписчикам"""
+        with self._lock:
+            self.history.append((event, data))
+            for listener in self.listeners:
+                self._notify(listener, event, data)
+
+
+    def _notify(self, listener, event: str, data: dict):
+        try:
+            listener(event, **data)
+        except Exception as e:
+            # Ошибка подписчика не должна прерывать парсинг и других подписчиков
+            logging.error(f"Ошибка подписчика парсинга {self.key or self.id}: {e}")
+
+
+def available_memory_mb() -> Optional[int]:
+    """Свободная память с учетом лимита cgroup контейнера (МБ) или None"""
+    available = []
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available.append(int(line.split()[1]) // 1024)
+                    break
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            with open("/sys/fs/cgroup/memory.current") as f:
+                current = int(f.read().strip())
+            available.append((int(limit) - current) // (1024 * 1024))
+    except (OSError, ValueError):
+        pass
+
+    return min(available) if available else None
+
+
+def workers_for_memory(max_workers: int, pool_size: int, browser_memory_mb: int) -> int:
+    """Число воркеров: явно заданное или по свободной памяти, но не больше пула браузеров"""
+    if max_workers > 0:
+        return max_workers
+
+    memory = available_memory_mb()
+    if memory is None or browser_memory_mb <= 0:
+        return max(1, pool_size)
+    return max(1, min(pool_size, memory // browser_memory_mb))
+
+
+class ParseScheduler:
+    """Очередь с приоритетами и фиксированным числом потоков-воркеров"""
+
+    def __init__(self, workers: int, name: str = "parse"):
+        self.workers = max(1, workers)
+        self.name = name
+
+        self._queue = []  # Куча (priority, seq, job)
+        self._jobs = {}  # {key: job} - задачи в очереди и в работе
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._threads = []
+        self._running = 0
+        self._closed = False
+
+        self.avg_duration = DEFAULT_PARSE_SECONDS
+        self.completed = 0
+        self.failed = 0
+        self.promoted = 0
+
+
+    def submit(self, fn, *args, key: str = None, priority: Priority = Priority.INTERACTIVE,
+               progress: bool = False, on_progress=None, **kwargs) -> ParseJob:
+        """
+        Ставит fn(*args, **kwargs) в очередь. Если задача с тем же ключом уже есть,
+        возвращает ее, при необходимости повышая приоритет.
+        С progress=True (или с on_progress) fn получает on_progress=job.progress,
+        а on_progress подписывается на ход задачи - новой или уже поставленной.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Планировщик парсинга остановлен")
+
+            job = self._jobs.get(key) if key is not None else None
+            if job is not None:
+                if job.state == 'queued' and priority < job.priority:
+                    job.priority = priority
+                    # Старая запись в куче останется и будет пропущена
+                    heapq.heappush(self._queue, (priority, job.seq, job))
+                    self.promoted += 1
+                if on_progress is not None:
+                    job.subscribe(on_progress)
+                return job
+
+            job = ParseJob(next(self._ids), next(self._seq), key, priority, fn, args, kwargs)
+            if progress or on_progress is not None:
+                kwargs['on_progress'] = job.progress
+            if on_progress is not None:
+                job.subscribe(on_progress)
+            if key is not None:
+                self._jobs[key] = job
+            heapq.heappush(self._queue, (priority, job.seq, job))
+            self._start_workers()
+            self._condition.notify()
+
+        logging.info(f"📥 Парсинг {key or job.id} в очереди ({priority.name}), задач: {len(self._queue)}")
+        return job
+
+
+    def run(self, fn, *args, key: str = None, priority: Priority = Priority.INTERACTIVE, timeout: float = None,
+            **kwargs):
+        """Синхронно дождаться результата задачи (kwargs - как у submit)"""
+        return self.submit(fn, *args, key=key, priority=priority, **kwargs).future.result(timeout)
+
+
+    async def run_async(self, fn, *args, key: str = None, priority: Priority = Priority.INTERACTIVE, **kwargs):
+        """Асинхронно дождаться результата задачи (kwargs - как у submit)"""
+        job = self.submit(fn, *args, key=key, priority=priority, **kwargs)
+        return await asyncio.wrap_future(job.future)
+
+
+    def queue_info(self, key: str) -> Optional[dict]:
+        """Место задачи в очереди и примерное время до результата (сек)"""
+        with self._condition:
+            job = self._jobs.get(key)
+            if job is None:
+                return None
+
+            if job.state == 'running':
+                elapsed = time.monotonic() - job.started_at
+                return {
+                    'job_id': job.id,
+                    'state': 'running',
+                    'position': 0,
+                    'eta_seconds': max(1, math.ceil(self.avg_duration - elapsed)),
+                }
+
+            position = 1 + sum(1 for entry in self._pending() if entry < (job.priority, job.seq))
+            # Сколько задач должно начаться раньше, сверх свободных воркеров
+            ahead = self._running + position - 1
+            rounds = math.ceil(max(0, ahead - self.workers + 1) / self.workers)
+            return {
+                'job_id': job.id,
+                'state': 'queued',
+                'position': position,
+                'eta_seconds': math.ceil((rounds + 1) * self.avg_duration),
+            }
+
+
+    def stats(self) -> dict:
+        """Статистика планировщика"""
+        with self._condition:
+            queued = {priority.name.lower(): 0 for priority in Priority}
+            for priority, _seq in self._pending():
+                queued[Priority(priority).name.lower()] += 1
+            return {
+                'workers': self.workers,
+                'running': self._running,
+                'queued': queued,
+                'completed': self.completed,
+                'failed': self.failed,
+                'promoted': self.promoted,
+                'avg_duration': round(self.avg_duration, 2),
+            }
+
+
+    def close(self):
+        """Останавливает воркеров и отменяет задачи, которые еще не начались"""
+        with self._condition:
+            self._closed = True
+            pending = [job for _p, _s, job in self._queue if job.state == 'queued']
+            self._queue = []
+            for job in pending:
+                job.state = 'done'
+                self._jobs.pop(job.key, None)
+            self._condition.notify_all()
+        for job in pending:
+            job.future.cancel()
+
+
+    def _pending(self):
+        """(priority, seq) задач, которые еще ждут в очереди"""
+        return [
+            (priority, seq) for priority, seq, job in self._queue
+            if job.state == 'queued' and priority == job.priority
+        ]
+
+
+    def _start_workers(self):
+        """Запускает воркеров при первой задаче (вызывается под блокировкой)"""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"{self.name}-worker-{len(self._threads) + 1}",
+                daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+
+    def _next_job(self) -> Optional[ParseJob]:
+        """Ждет и забирает задачу с наивысшим приоритетом"""
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+                while self._queue:
+                    priority, _seq, job = heapq.heappop(self._queue)
+                    if job.state != 'queued' or priority != job.priority:
+                        continue  # Запись устарела после повышения приоритета
+                    if not job.future.set_running_or_notify_cancel():
+                        job.state = 'done'
+                        self._jobs.pop(job.key, None)
+                        continue
+                    job.state = 'running'
+                    job.started_at = time.monotonic()
+                    self._running += 1
+                    return job
+                self._condition.wait()
+
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                self._finish(job, failed=True)
+                job.future.set_exception(e)
+            else:
+                self._finish(job, failed=False)
+                job.future.set_result(result)
+
+
+    def _finish(self, job: ParseJob, failed: bool):
+        duration = time.monotonic() - job.started_at
+        with self._condition:
+            job.state = 'done'
+            self._running -= 1
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self.avg_duration += DURATION_SMOOTHING * (duration - self.avg_duration)
+        logging.info(f"✅ Парсинг {job.key or job.id} завершен за {duration:.1f} сек")
@@ -4,7 +4,10 @@ Selenium-скрипт для парсинга расписания с сайта
 """
 
 import time
+import asyncio
+import atexit
 import logging
+import threading
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -13,6 +16,130 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service as FirefoxService
+from config import config
+from vvsule.driver_pool import DriverPool
+from vvsule.http_parser import HttpTimetableClient
+from vvsule.timetable_rows import build_lessons_from_rows
+from vvsule.single_flight import SingleFlight
+from vvsule.parse_scheduler import ParseScheduler, Priority, workers_for_memory
+
+
+TIMETABLE_URL = "https://www.vvsu.ru/timetable/"
+WAIT_POLL_FREQUENCY = 0.1  # Как часто проверять условия ожидания (сек)
+
+# Фиксированные паузы, которые раньше стояли на месте каждого ожидания (сек)
+LEGACY_SLEEPS = {
+    'page_input': 3.0,
+    'autocomplete': 1.0,
+    'schedule_table': 2.0,
+    'slide_change': 1.0,
+}
+
+ACTIVE_TABLE_SELECTOR = "div.carousel-item.active table.table-no-transform"
+
+# Количество строк в таблице активной недели (0, пока таблица не загрузилась)
+ACTIVE_TABLE_ROWS_SCRIPT = """
+return document.querySelectorAll("div.carousel-item.active table.table-no-transform tbody tr").length;
+"""
+
+# Индекс активного слайда карусели или -1, пока идет анимация перелистывания
+ACTIVE_SLIDE_SCRIPT = """
+if (document.querySelector("div.carousel-item-next, div.carousel-item-prev")) {
+    return -1;
+}
+const items = Array.from(document.querySelectorAll("div.carousel-item"));
+return items.findIndex(item => item.classList.contains("active"));
+"""
+
+
+class WaitStats:
+    """Сколько на самом деле длились ожидания парсера"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name: str, seconds: float, timed_out: bool = False):
+        with self._lock:
+            stat = self._stats.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+            stat['count'] += 1
+            stat['total'] += seconds
+            stat['max'] = max(stat['max'], seconds)
+            stat['last'] = seconds
+            if timed_out:
+                stat['timeouts'] += 1
+
+    def snapshot(self) -> dict:
+        """Средняя длительность каждого ожидания и экономия против фиксированных пауз"""
+        with self._lock:
+            result = {}
+            for name, stat in self._stats.items():
+                avg = stat['total'] / stat['count']
+                legacy = LEGACY_SLEEPS.get(name)
+                result[name] = {
+                    'count': stat['count'],
+                    'avg_seconds': round(avg, 3),
+                    'max_seconds': round(stat['max'], 3),
+                    'last_seconds': round(stat['last'], 3),
+                    'timeouts': stat['timeouts'],
+                    'legacy_sleep_seconds': legacy,
+                    'saved_seconds_total': round(legacy * stat['count'] - stat['total'], 3) if legacy else None,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+wait_stats = WaitStats()
+
+
+def timed_wait(driver, name: str, timeout: float, condition):
+    """
+    WebDriverWait с замером фактического времени ожидания.
+    Элемент, устаревший из-за перерисовки страницы, не прерывает ожидание -
+    условие просто проверяется снова на следующем опросе.
+    """
+    started = time.perf_counter()
+    try:
+        result = WebDriverWait(
+            driver, timeout, poll_frequency=WAIT_POLL_FREQUENCY,
+            ignored_exceptions=(StaleElementReferenceException,)
+        ).until(condition)
+    except TimeoutException:
+        elapsed = time.perf_counter() - started
+        wait_stats.record(name, elapsed, timed_out=True)
+        logging.info(f"⏱ Ожидание {name}: таймаут через {elapsed:.2f} сек")
+        raise
+    elapsed = time.perf_counter() - started
+    wait_stats.record(name, elapsed)
+    logging.debug(f"⏱ Ожидание {name}: {elapsed:.2f} сек")
+    return result
+
+
+def find_group_button(driver, normalized_group):
+    """Кнопка группы в списке автодополнения или None"""
+    for button in driver.find_elements(By.TAG_NAME, "button"):
+        if normalized_group in button.text:
+            return button
+    return None
+
+
+def schedule_replaced(previous_tables):
+    """
+    Условие ожидания таблицы выбранной группы: таблицы, которые были на странице
+    до клика (например, прошлой группы в браузере из пула), исчезли,
+    а в таблице активной недели появились строки
+    """
+    stale_checks = [EC.staleness_of(table) for table in previous_tables]
+
+    def condition(driver):
+        if not all(check(driver) for check in stale_checks):
+            return False
+        return driver.execute_script(ACTIVE_TABLE_ROWS_SCRIPT)
+
+    return condition
 
 
 def setup_driver():
@@ -51,9 +178,10 @@ def setup_driver():
 
         logging.info("✅ Firefox драйвер успешно инициализирован")
         
-        # Устанавливаем таймауты
+        # Устанавливаем таймауты. Неявное ожидание отключено: парсер ждет
+        # явными условиями, а с implicitly_wait каждая отсутствующая ячейка стоила бы секунды
         driver.set_page_load_timeout(5)
-        driver.implicitly_wait(3)
+        driver.implicitly_wait(0)
         
         return driver
         
@@ -62,135 +190,401 @@ def setup_driver():
         return None
 
 
-def parse_vvsu_timetable(group_name):
-    """Парсинг ВСЕХ доступных недель расписания"""
+def create_driver_pool() -> DriverPool:
+    """Создает пул браузеров по настройкам из конфигурации"""
+    return DriverPool(
+        # setup_driver ищется при каждом вызове, чтобы его можно было подменить
+        factory=lambda: setup_driver(),
+        size=config.parser.pool_size,
+        max_uses=config.parser.driver_max_uses,
+        max_age=config.parser.driver_max_age_minutes * 60,
+        home_url=TIMETABLE_URL,
+        acquire_timeout=config.parser.pool_acquire_timeout
+    )
+
+
+# Общий пул браузеров для веб-приложения и бота
+driver_pool = create_driver_pool()
+atexit.register(driver_pool.close)
+
+# Общий HTTP-клиент для парсинга без браузера
+http_client = HttpTimetableClient(
+    timetable_url=config.parser.http_timetable_url,
+    group_param=config.parser.http_group_param,
+    timeout=config.parser.http_timeout,
+    connection_limit=config.parser.http_connection_limit
+)
+atexit.register(http_client.close)
+
+# Одновременные парсинги одной группы (бот и веб-приложение) объединяются в один
+parse_flight = SingleFlight("parse")
+
+# Все парсинги идут через очередь с приоритетами и ограниченным числом воркеров
+parse_scheduler = ParseScheduler(
+    workers=workers_for_memory(
+        max_workers=config.parser.max_workers,
+        pool_size=config.parser.pool_size,
+        browser_memory_mb=config.parser.browser_memory_mb
+    )
+)
+atexit.register(parse_scheduler.close)
+
+
+def parse_key(group_name: str, start_week: int = 0) -> str:
+    """Ключ парсинга для объединения запросов и очереди: группа или группа и дальняя неделя"""
+    return group_name if start_week == 0 else f"{group_name}#{start_week}"
+
+
+class TimetableParseError(Exception):
+    """Расписание группы получить не удалось"""
+
+
+class WeekStream:
+    """
+    Недели по мере парсинга как асинхронный итератор (index, lessons).
+    on_progress передается парсеру и может вызываться из потока воркера;
+    finish вызывается в event loop по окончании парсинга. Недели, которые
+    не пришли через on_progress (например, задачу с тем же ключом поставили без progress), берутся из результата.
+    """
+
+    _END = object()
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._next_index = 0
+        self._finished = False
+
+
+    def on_progress(self, event, **data):
+        if event == "week":
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, (data['index'], data['lessons']))
+
+
+    def finish(self, result=None):
+        """Завершает поток; result - итог парсинга (словарь) или None"""
+        if not self._finished:
+            self._finished = True
+            self._queue.put_nowait((self._END, result))
+
+
+    def finish_task(self, task):
+        """Колбэк для задачи парсинга"""
+        if task.cancelled() or task.exception() is not None:
+            self.finish(None)
+        else:
+            self.finish(task.result())
+
+
+    def __aiter__(self):
+        return self
+
+
+    async def __anext__(self):
+        while True:
+            item = await self._queue.get()
+            if item[0] is self._END:
+                # Оставляем маркер в очереди, чтобы повторные вызовы тоже завершались
+                self._queue.put_nowait(item)
+                result = item[1]
+                weeks = result.get('weeks', []) if result and result.get('success') is True else []
+                if self._next_index >= len(weeks):
+                    raise StopAsyncIteration
+                index = self._next_index
+                self._next_index += 1
+                return index, weeks[index]
+
+            index, lessons = item
+            if index < self._next_index:
+                continue
+            self._next_index = index + 1
+            return index, lessons
+
+
+def parse_vvsu_timetable(group_name, on_progress=None, start_week=0, max_weeks=None):
+    """
+    Парсинг недель расписания: max_weeks недель (по умолчанию весь горизонт),
+    начиная со start_week недель после текущей.
+    on_progress(event, **data) вызывается по ходу парсинга: browser_ready / page_loaded,
+    затем week (index, lessons) для каждой разобранной недели.
+    """
+    normalized_group = group_name.upper()
+    max_weeks = max_weeks or config.parser.max_weeks
+
+    if config.parser.backend == "http":
+        result = http_client.parse_sync(normalized_group, max_weeks, on_progress, start_week)
+        if result.get('success') or not config.parser.http_fallback:
+            return result
+        logging.warning(f"HTTP-парсинг не удался ({result.get('error')}), переключаюсь на Selenium")
+
+    return parse_vvsu_timetable_selenium(
+        normalized_group, on_progress=on_progress, start_week=start_week, max_weeks=max_weeks
+    )
+
+
+def parse_vvsu_timetable_selenium(group_name, on_progress=None, start_week=0, max_weeks=None):
+    """Парсинг недель расписания через браузер"""
     normalized_group = group_name.upper()
 
     logging.info(f"=== НАЧАЛО парсинга ВСЕХ недель для {normalized_group} ===")
 
-    driver = None
     try:
-        driver = setup_driver()
+        with driver_pool.driver() as driver:
+            if not driver:
+                return {"success": False, "error": "Не удалось инициализировать драйвер", "weeks": []}
+            if on_progress:
+                on_progress("browser_ready")
+            return parse_with_driver(driver, normalized_group, on_progress, start_week, max_weeks)
+
+    except Exception as e:
+        logging.error(f"=== КРИТИЧЕСКАЯ ошибка парсинга: {e} ===", exc_info=True)
+        return {"success": False, "error": str(e), "weeks": []}
+
+
+def parse_with_driver(driver, normalized_group, on_progress=None, start_week=0, max_weeks=None):
+    """Парсинг расписания группы в уже запущенном браузере (собирает недели iter_weeks)"""
+    all_weeks_schedule = []
+    try:
+        for week_schedule in iter_weeks(driver, normalized_group, start_week, max_weeks):
+            all_weeks_schedule.append(week_schedule)
+            if on_progress:
+                on_progress("week", index=len(all_weeks_schedule) - 1, lessons=week_schedule)
+    except TimetableParseError as e:
+        return {"success": False, "error": str(e), "weeks": []}
+
+    # Возвращаем результат
+    result = {
+        'success': True,
+        'group_name': normalized_group,
+        'weeks': all_weeks_schedule,
+        'start_week': start_week,
+        'parsed_at': datetime.now().isoformat(),
+        'total_weeks': len(all_weeks_schedule)
+    }
+
+    logging.info(f"=== УСПЕШНО завершен парсинг: {len(all_weeks_schedule)} недель для {normalized_group} ===")
+    return result
+
+
+def iter_vvsu_timetable(group_name, on_progress=None, start_week=0, max_weeks=None):
+    """
+    Генератор недель расписания: каждая неделя отдается, как только разобрана.
+    Браузер из пула занят, пока генератор не исчерпан или не закрыт.
+    При ошибке бросает TimetableParseError.
+    """
+    normalized_group = group_name.upper()
+    max_weeks = max_weeks or config.parser.max_weeks
+
+    if config.parser.backend == "http":
+        # Страница со всеми неделями приходит одним запросом
+        result = http_client.parse_sync(normalized_group, max_weeks, on_progress, start_week)
+        if result.get('success'):
+            yield from result['weeks']
+            return
+        if not config.parser.http_fallback:
+            raise TimetableParseError(result.get('error', 'Ошибка HTTP-парсинга'))
+        logging.warning(f"HTTP-парсинг не удался ({result.get('error')}), переключаюсь на Selenium")
+
+    # Группа не найдена и т.п. - браузер исправен и возвращается в пул
+    with driver_pool.driver(healthy_errors=(TimetableParseError,)) as driver:
         if not driver:
-            return {"success": False, "error": "Не удалось инициализировать драйвер", "weeks": []}
-        
-        # Открываем страницу
-        logging.info("Открываю страницу расписания...")
-        time.sleep(1)
-        try:
-            driver.get("https://www.vvsu.ru/timetable/")
-            logging.info("Страница открыта")
-        except Exception as e:
-            logging.error(f"Ошибка при открытии страницы: {e}")
-            return {"success": False, "error": f"Не удалось открыть страницу: {e}", "weeks": []}
-        
-        # Находим и заполняем поле
-        logging.info("Ищу поле для ввода группы...")
-        time.sleep(1)
+            raise TimetableParseError("Не удалось инициализировать драйвер")
+        if on_progress:
+            on_progress("browser_ready")
+        yield from iter_weeks(driver, normalized_group, start_week, max_weeks)
+
+
+async def aiter_vvsu_timetable(group_name, priority: Priority = Priority.INTERACTIVE):
+    """
+    Асинхронный итератор недель расписания. Парсинг идет в очереди планировщика,
+    недели отдаются по мере готовности. При ошибке бросает TimetableParseError.
+    """
+    normalized_group = group_name.upper()
+    weeks_stream = WeekStream()
+    parse_task = asyncio.ensure_future(parse_scheduler.run_async(
+        parse_vvsu_timetable, normalized_group,
+        key=normalized_group, priority=priority, on_progress=weeks_stream.on_progress
+    ))
+    parse_task.add_done_callback(weeks_stream.finish_task)
+    try:
+        async for _index, lessons in weeks_stream:
+            yield lessons
+        result = await parse_task
+    finally:
+        # Итерацию прервали: парсинг доработает в планировщике, ждать его не нужно
+        if not parse_task.done():
+            parse_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    if not result or result.get('success') is not True:
+        raise TimetableParseError((result or {}).get('error', 'Пустой результат'))
+
+
+def iter_weeks(driver, normalized_group, start_week=0, max_weeks=None):
+    """
+    Генератор недель расписания группы в уже запущенном браузере.
+    Первая неделя (start_week недель после текущей) отдается, даже если она пустая,
+    дальше парсинг идет до первой пустой недели, но не больше max_weeks недель.
+    """
+    # Открываем страницу (браузер из пула уже стоит на ней после сброса)
+    logging.info("Открываю страницу расписания...")
+    try:
+        if driver.current_url != TIMETABLE_URL:
+            driver.get(TIMETABLE_URL)
+        logging.info("Страница открыта")
+    except Exception as e:
+        logging.error(f"Ошибка при открытии страницы: {e}")
+        raise TimetableParseError(f"Не удалось открыть страницу: {e}")
+
+    # Находим и заполняем поле
+    logging.info("Ищу поле для ввода группы...")
+    try:
+        group_input = timed_wait(
+            driver, "page_input", config.parser.wait_input_timeout,
+            EC.presence_of_element_located((By.CSS_SELECTOR, "input#gr"))
+        )
+        group_input.clear()
+        group_input.send_keys(normalized_group)
+        logging.info(f"Ввел группу: {normalized_group}")
+    except TimeoutException:
+        logging.error("Таймаут при поиске поля ввода")
+        raise TimetableParseError("Не удалось найти поле ввода")
+
+    # Ищем и кликаем по группе
+    logging.info("Ищу группу в списке...")
+    try:
+        # Ждем появления кнопки с группой в списке автодополнения
         try:
-            # Ждем загрузки страницы
-            time.sleep(1)
-            group_input = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input#gr"))
+            group_button = timed_wait(
+                driver, "autocomplete", config.parser.wait_autocomplete_timeout,
+                lambda d: find_group_button(d, normalized_group)
             )
-            group_input.clear()
-            group_input.send_keys(normalized_group)
-            logging.info(f"Ввел группу: {normalized_group}")
-            time.sleep(1)  # Ждем появления списка
         except TimeoutException:
-            logging.error("Таймаут при поиске поля ввода")
-            return {"success": False, "error": "Не удалось найти поле ввода", "weeks": []}
-        
-        # Ищем и кликаем по группе
-        logging.info("Ищу группу в списке...")
-        try:
-            # Ищем кнопку с точным текстом
             group_button = None
-            buttons = driver.find_elements(By.TAG_NAME, "button")
-            for button in buttons:
-                if normalized_group in button.text:
-                    group_button = button
-                    break
-            
-            if group_button:
-                driver.execute_script("arguments[0].click();", group_button)
-                logging.info(f"Кликнул по группе {normalized_group}")
-                time.sleep(2)  # Ждем загрузки расписания
-            else:
-                logging.error(f"Кнопка группы {normalized_group} не найдена")
-                return {"success": False, "error": f"Группа {normalized_group} не найдена", "weeks": []}
-        except Exception as e:
-            logging.error(f"Ошибка при выборе группы: {e}")
-            return {"success": False, "error": f"Ошибка при выборе группы: {e}", "weeks": []}
-        
-        # Парсим ВСЕ доступные недели
-        all_weeks_schedule = []
-        max_weeks_to_parse = 3  # Максимальное количество недель для парсинга
-        
-        # Парсим текущую (активную) неделю
-        try:
-            current_schedule = parse_current_week(driver)
-            if current_schedule:
-                all_weeks_schedule.append(current_schedule)
-                logging.info(f"Текущая неделя: {len(current_schedule)} занятий")
-        except Exception as e:
-            logging.error(f"Ошибка при парсинге текущей недели: {e}")
-        
-        # Парсим следующие недели
-        weeks_parsed = 1
-        while weeks_parsed < max_weeks_to_parse:
+
+        if group_button:
+            previous_tables = driver.find_elements(By.CSS_SELECTOR, ACTIVE_TABLE_SELECTOR)
+            driver.execute_script("arguments[0].click();", group_button)
+            logging.info(f"Кликнул по группе {normalized_group}")
+            # Ждем, пока старая таблица сменится таблицей группы со строками
             try:
-                if go_to_next_week(driver):
-                    time.sleep(1)  # Ждем загрузки
-                    week_schedule = parse_current_week(driver)
-                    if week_schedule:
-                        all_weeks_schedule.append(week_schedule)
-                        logging.info(f"Неделя {weeks_parsed + 1}: {len(week_schedule)} занятий")
-                        weeks_parsed += 1
-                    else:
-                        # Если неделя пустая, возможно, это конец расписания
-                        logging.info(f"Неделя {weeks_parsed + 1} пустая, прекращаю парсинг")
-                        break
-                else:
-                    # Не удалось перейти на следующую неделю
-                    logging.info("Не удалось перейти на следующую неделю, прекращаю парсинг")
-                    break
-            except Exception as e:
-                logging.error(f"Ошибка при парсинге недели {weeks_parsed + 1}: {e}")
-                break
-        
-        # Возвращаем результат
-        result = {
-            'success': True,
-            'group_name': normalized_group,
-            'weeks': all_weeks_schedule,
-            'parsed_at': datetime.now().isoformat(),
-            'total_weeks': len(all_weeks_schedule)
-        }
-        
-        logging.info(f"=== УСПЕШНО завершен парсинг: {len(all_weeks_schedule)} недель для {normalized_group} ===")
-        return result
+                timed_wait(
+                    driver, "schedule_table", config.parser.wait_schedule_timeout,
+                    schedule_replaced(previous_tables)
+                )
+            except TimeoutException:
+                logging.info("В таблице текущей недели нет строк")
+        else:
+            logging.error(f"Кнопка группы {normalized_group} не найдена")
+            raise TimetableParseError(f"Группа {normalized_group} не найдена")
+    except TimetableParseError:
+        raise
+    except Exception as e:
+        logging.error(f"Ошибка при выборе группы: {e}")
+        raise TimetableParseError(f"Ошибка при выборе группы: {e}")
 
+    max_weeks_to_parse = max_weeks or config.parser.max_weeks
+
+    # Листаем до первой нужной недели, не разбирая промежуточные
+    for skipped in range(start_week):
+        if not go_to_next_week(driver):
+            # Расписание на сайте кончилось раньше - занятий в этой неделе нет
+            logging.info(f"Недели +{skipped + 1} на сайте нет")
+            yield []
+            return
+
+    # Парсим первую неделю (пустая неделя - тоже результат: занятий нет)
+    try:
+        first_schedule = parse_current_week(driver)
     except Exception as e:
-        logging.error(f"=== КРИТИЧЕСКАЯ ошибка парсинга: {e} ===", exc_info=True)
-        return {"success": False, "error": str(e), "weeks": []}
-        
-    finally:
-        if driver:
-            try:
-                driver.quit()
-                logging.info("Драйвер закрыт")
-            except:
-                logging.warning("Не удалось закрыть драйвер")
-                pass
+        logging.error(f"Ошибка при парсинге недели +{start_week}: {e}")
+        first_schedule = []
+    logging.info(f"Неделя +{start_week}: {len(first_schedule)} занятий")
+    yield first_schedule
+
+    # Парсим следующие недели
+    weeks_parsed = 1
+    while weeks_parsed < max_weeks_to_parse:
+        try:
+            if not go_to_next_week(driver):
+                # Не удалось перейти на следующую неделю
+                logging.info("Не удалось перейти на следующую неделю, прекращаю парсинг")
+                break
+            week_schedule = parse_current_week(driver)
+        except Exception as e:
+            logging.error(f"Ошибка при парсинге недели +{start_week + weeks_parsed}: {e}")
+            break
+
+        if not week_schedule:
+            # Если неделя пустая, возможно, это конец расписания
+            logging.info(f"Неделя +{start_week + weeks_parsed} пустая, прекращаю парсинг")
+            break
+        logging.info(f"Неделя +{start_week + weeks_parsed}: {len(week_schedule)} занятий")
+        weeks_parsed += 1
+        yield week_schedule
+
+
+
+# Скрипт извлекает всю таблицу активной недели за один запрос к браузеру.
+# Возвращает null, пока таблица не появилась, иначе {rows: [...]} в формате
+# build_lessons_from_rows (объект, а не массив, чтобы пустая неделя была truthy).
+EXTRACT_WEEK_SCRIPT = """
+const table = document.querySelector("div.carousel-item.active table.table-no-transform");
+if (!table) {
+    return null;
+}
+const cell = (row, th) => row.querySelector(`td[data-th='${th}']`);
+const text = (row, th) => {
+    const found = cell(row, th);
+    return found ? found.innerText : null;
+};
+const rows = Array.from(table.querySelectorAll("tbody tr")).map(row => {
+    const date = cell(row, "Дата");
+    const discipline = cell(row, "Дисциплина");
+    const link = discipline ? discipline.querySelector("a") : null;
+    const disciplineCell = discipline ? {text: discipline.innerText} : null;
+    if (disciplineCell && link) {
+        disciplineCell.link = link.getAttribute("href") === null ? null : link.href;
+    }
+    return {
+        date: date ? {text: date.innerText, rowspan: date.getAttribute("rowspan")} : null,
+        time: text(row, "Время"),
+        discipline: disciplineCell,
+        room: text(row, "Аудитория"),
+        teacher: text(row, "Преподаватель"),
+        type: text(row, "Занятие")
+    };
+});
+return {rows: rows};
+"""
 
 
 def parse_current_week(driver):
     """Парсит текущую активную неделю"""
+    if config.parser.extraction_mode == "elements":
+        return parse_current_week_by_elements(driver)
+
+    try:
+        # Ждем таблицу и сразу забираем все строки одним вызовом
+        extracted = timed_wait(
+            driver, "week_table", config.parser.wait_table_timeout,
+            lambda d: d.execute_script(EXTRACT_WEEK_SCRIPT)
+        )
+        return build_lessons_from_rows(extracted.get('rows') or [])
+    except TimeoutException:
+        logging.warning("Таблица текущей недели не найдена")
+        return []
+    except Exception as e:
+        logging.error(f"Ошибка при извлечении таблицы текущей недели: {e}")
+        return []
+
+
+def parse_current_week_by_elements(driver):
+    """Парсит текущую неделю поячеечно через WebElement (медленный режим)"""
     try:
         # Ищем активную таблицу
-        schedule_table = WebDriverWait(driver, 3).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.carousel-item.active table.table-no-transform"))
+        schedule_table = timed_wait(
+            driver, "week_table", config.parser.wait_table_timeout,
+            EC.presence_of_element_located((By.CSS_SELECTOR, ACTIVE_TABLE_SELECTOR))
         )
         return parse_schedule_table(schedule_table)
     except TimeoutException:
@@ -208,12 +602,23 @@ def go_to_next_week(driver):
         next_button = driver.find_element(By.CSS_SELECTOR, "button.arrow-button.right[data-bs-slide='next']")
         
         # Проверяем, активна ли кнопка
-        if next_button.is_enabled():
-            driver.execute_script("arguments[0].click();", next_button)
-            return True
-        else:
+        if not next_button.is_enabled():
             logging.info("Кнопка следующей недели неактивна")
             return False
+
+        previous_slide = driver.execute_script(ACTIVE_SLIDE_SCRIPT)
+        driver.execute_script("arguments[0].click();", next_button)
+
+        # Ждем, пока карусель перелистнется на другой слайд
+        try:
+            timed_wait(
+                driver, "slide_change", config.parser.wait_slide_timeout,
+                lambda d: d.execute_script(ACTIVE_SLIDE_SCRIPT) not in (-1, previous_slide)
+            )
+        except TimeoutException:
+            logging.info("Карусель не перелистнулась, следующей недели нет")
+            return False
+        return True
     except NoSuchElementException:
         logging.info("Кнопка следующей недели не найдена")
         return False
@@ -224,86 +629,57 @@ def go_to_next_week(driver):
 
 def parse_schedule_table(schedule_table):
     """Парсит данные из таблицы расписания"""
-    lessons = []
+    rows = []
     try:
-        rows = schedule_table.find_elements(By.CSS_SELECTOR, "tbody tr")
-        current_date = None
-        
-        for row in rows:
-            lesson_data = {}
-            
-            # Пытаемся найти дату
-            try:
-                date_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Дата']")
-                date_text = date_cell.text.strip()
-                if date_text:
-                    # Если у ячейки есть rowspan или текущая дата None, это новая дата
-                    if date_cell.get_attribute("rowspan") or not current_date:
-                        current_date = date_text
-                    lesson_data['Дата'] = current_date
-            except NoSuchElementException:
-                if current_date:
-                    lesson_data['Дата'] = current_date
-            
-            # Пытаемся найти время
-            try:
-                time_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Время']")
-                time_text = time_cell.text.strip()
-                if time_text:
-                    lesson_data['Время'] = time_text
-                else:
-                    continue  # Пропускаем строки без времени
-            except NoSuchElementException:
-                continue  # Пропускаем строки без времени
-            
-            # Получаем дисциплину
-            try:
-                discipline_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Дисциплина']")
-                discipline_text = discipline_cell.text.strip()
-                if discipline_text:
-                    # Берем первую строку (основное название)
-                    lesson_data['Дисциплина'] = discipline_text.split('\n')[0]
-                    
-                    # Проверяем наличие ссылки на вебинар
-                    try:
-                        webinar_link = discipline_cell.find_element(By.TAG_NAME, "a")
-                        lesson_data['Ссылка на вебинар'] = webinar_link.get_attribute("href")
-                    except NoSuchElementException:
-                        pass
-            except NoSuchElementException:
-                pass
-            
-            # Получаем аудиторию
-            try:
-                classroom_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Аудитория']")
-                classroom_text = classroom_cell.text.strip()
-                if classroom_text:
-                    lesson_data['Аудитория'] = classroom_text
-            except NoSuchElementException:
-                pass
-            
-            # Получаем преподавателя
-            try:
-                teacher_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Преподаватель']")
-                teacher_text = teacher_cell.text.strip()
-                if teacher_text:
-                    lesson_data['Преподаватель'] = teacher_text
-            except NoSuchElementException:
-                pass
-            
-            # Получаем тип занятия
+        for row in schedule_table.find_elements(By.CSS_SELECTOR, "tbody tr"):
+            rows.append(read_row_cells(row))
+    except Exception as e:
+        logging.error(f"Ошибка парсинга таблицы: {e}")
+
+    return build_lessons_from_rows(rows)
+
+
+def read_row_cells(row) -> dict:
+    """Читает ячейки строки таблицы в формате build_lessons_from_rows"""
+    cells = {'date': None, 'time': None, 'discipline': None, 'room': None, 'teacher': None, 'type': None}
+
+    try:
+        date_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Дата']")
+        date_text = date_cell.text.strip()
+        cells['date'] = {
+            'text': date_text,
+            'rowspan': date_cell.get_attribute("rowspan") if date_text else None
+        }
+    except NoSuchElementException:
+        pass
+
+    try:
+        time_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Время']")
+        cells['time'] = time_cell.text.strip()
+    except NoSuchElementException:
+        pass
+
+    if not cells['time']:
+        return cells  # Строки без времени пропускаются, остальные ячейки не нужны
+
+    try:
+        discipline_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Дисциплина']")
+        discipline_text = discipline_cell.text.strip()
+        cells['discipline'] = {'text': discipline_text}
+        if discipline_text:
+            # Проверяем наличие ссылки на вебинар
             try:
-                type_cell = row.find_element(By.CSS_SELECTOR, "td[data-th='Занятие']")
-                type_text = type_cell.text.strip()
-                if type_text:
-                    lesson_data['Тип занятия'] = type_text
+                webinar_link = discipline_cell.find_element(By.TAG_NAME, "a")
+                cells['discipline']['link'] = webinar_link.get_attribute("href")
             except NoSuchElementException:
                 pass
-            
-            if lesson_data:
-                lessons.append(lesson_data)
-    
-    except Exception as e:
-        logging.error(f"Ошибка парсинга таблицы: {e}")
-    
-    return lessons
\ No newline at end of file
+    except NoSuchElementException:
+        pass
+
+    for key, header in (('room', 'Аудитория'), ('teacher', 'Преподаватель'), ('type', 'Занятие')):
+        try:
+            cells[key] = row.find_element(By.CSS_SELECTOR, f"td[data-th='{header}']").text.strip()
+        except NoSuchElementException:
+            pass
+
+    return cells
@@ -0,0 +1,162 @@
+"""
+Календарь расписания.
+Неделя обозначается ISO-годом и номером недели ("2025-W36") по времени Владивостока:
+так недели в кэше не сдвигаются, когда наступает новая неделя.
+Даты и время занятий разбираются из строк сайта ("Понедельник 01.09.2025",
+"09:00 - 10:30") один раз, дальше поиск недели или дня идет по ScheduleIndex.
+
+"""
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+
+VLADIVOSTOK_TZ = timezone(timedelta(hours=10))  # Занятия ВВГУ идут по Владивостоку
+
+DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+MONTH_DATE_RE = re.compile(r"(\d{1,2})\s+([а-яё]+)\s+(\d{4})", re.IGNORECASE)
+TIME_RANGE_RE = re.compile(r"(\d{1,2})[:.](\d{2})\s*[-–—]\s*(\d{1,2})[:.](\d{2})")
+
+MONTHS = {
+    'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4, 'мая': 5, 'июня': 6,
+    'июля': 7, 'августа': 8, 'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12,
+}
+
+
+def week_key(day: date) -> str:
+    """Ключ недели, в которую входит день"""
+    year, week, _weekday = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def week_monday(key: str) -> date:
+    """Понедельник недели по ключу"""
+    year, week = key.split("-W")
+    return date.fromisocalendar(int(year), int(week), 1)
+
+
+def current_date(now: datetime = None) -> date:
+    """Сегодняшняя дата во Владивостоке (datetime без зоны считается UTC)"""
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    return now.astimezone(VLADIVOSTOK_TZ).date()
+
+
+def current_week_key(now: datetime = None) -> str:
+    """Ключ текущей недели во Владивостоке"""
+    return week_key(current_date(now))
+
+
+def shift_week(key: str, weeks: int) -> str:
+    """Ключ недели, отстоящей от key на weeks недель"""
+    return week_key(week_monday(key) + timedelta(weeks=weeks))
+
+
+def weeks_between(start_key: str, key: str) -> int:
+    """На сколько недель key позже start_key"""
+    return (week_monday(key) - week_monday(start_key)).days // 7
+
+
+def week_keys(start_key: str, count: int) -> list:
+    """count ключей подряд, начиная с start_key"""
+    return [shift_week(start_key, offset) for offset in range(count)]
+
+
+def parse_lesson_date(text: str) -> Optional[date]:
+    """Дата из подписи вида 'Понедельник 01.09.2025' или '1 сентября 2025'"""
+    match = DATE_RE.search(text or '')
+    if match:
+        day, month, year = (int(part) for part in match.groups())
+    else:
+        match = MONTH_DATE_RE.search(text or '')
+        if not match or match.group(2).lower() not in MONTHS:
+            return None
+        day, month, year = int(match.group(1)), MONTHS[match.group(2).lower()], int(match.group(3))
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_time_range(text: str):
+    """(начало, конец) из строки вида '09:00 - 10:30', (None, None) если не разобрать"""
+    match = TIME_RANGE_RE.search(text or '')
+    if not match:
+        return None, None
+    start_hour, start_minute, end_hour, end_minute = (int(part) for part in match.groups())
+    try:
+        return time(start_hour, start_minute), time(end_hour, end_minute)
+    except ValueError:
+        return None, None
+
+
+def lessons_week_key(lessons: list) -> Optional[str]:
+    """Ключ недели по датам занятий, None если ни одну дату не разобрать"""
+    for lesson in lessons:
+        day = parse_lesson_date(lesson.get('Дата'))
+        if day:
+            return week_key(day)
+    return None
+
+
+def schedule_week_keys(schedule_data: dict, now: datetime = None) -> list:
+    """
+    Ключи недель результата парсинга по датам занятий. Неделя без дат идет
+    следующей за предыдущей, а первая - по позиции (start_week недель после текущей).
+    """
+    if 'week_keys' in schedule_data:
+        return schedule_data['week_keys']
+    keys = []
+    for lessons in schedule_data.get('weeks', []):
+        key = lessons_week_key(lessons)
+        if key is None:
+            if keys:
+                key = shift_week(keys[-1], 1)
+            else:
+                key = shift_week(current_week_key(now), schedule_data.get('start_week', 0))
+        keys.append(key)
+    return keys
+
+
+class ScheduleIndex:
+    """
+    Занятия группы по ключам недель и датам.
+    Строится один раз на запись кэша, текущая/следующая неделя и день ищутся за O(1).
+    """
+
+    def __init__(self, weeks: dict):
+        self.weeks = weeks  # {ключ недели: [занятия]}
+        self.days = {}  # {дата: [занятия]}
+        for lessons in weeks.values():
+            for lesson in lessons:
+                day = parse_lesson_date(lesson.get('Дата'))
+                if day:
+                    self.days.setdefault(day, []).append(lesson)
+
+    @classmethod
+    def from_schedule(cls, schedule_data: dict, now: datetime = None) -> "ScheduleIndex":
+        keys = schedule_week_keys(schedule_data, now)
+        return cls(dict(zip(keys, schedule_data.get('weeks', []))))
+
+    def week(self, key: str) -> Optional[list]:
+        """Занятия недели, None если неделя не загружена"""
+        return self.weeks.get(key)
+
+    def current_week(self, now: datetime = None) -> Optional[list]:
+        return self.week(current_week_key(now))
+
+    def next_week(self, now: datetime = None) -> Optional[list]:
+        return self.week(shift_week(current_week_key(now), 1))
+
+    def day(self, day: date) -> Optional[list]:
+        """Занятия дня, None если его неделя не загружена"""
+        if week_key(day) not in self.weeks:
+            return None
+        return self.days.get(day, [])
+
+    def today(self, now: datetime = None) -> Optional[list]:
+        return self.day(current_date(now))
+
+    def tomorrow(self, now: datetime = None) -> Optional[list]:
+        return self.day(current_date(now) + timedelta(days=1))
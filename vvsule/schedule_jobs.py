@@ -0,0 +1,146 @@
+"""
+Фоновые задачи загрузки расписания для веб-приложения.
+При промахе кэша /api/schedule сразу возвращает id задачи, а ход парсинга
+(очередь, запуск браузера, каждая готовая неделя, результат) отдается
+потоком Server-Sent Events. Запросы одной группы получают одну задачу.
+
+"""
+import json
+import threading
+import time
+import uuid
+from typing import Optional
+
+
+QUEUED = "queued"
+BROWSER_READY = "browser_ready"
+PAGE_LOADED = "page_loaded"
+WEEK = "week"
+DONE = "done"
+ERROR = "error"
+
+FINAL_EVENTS = (DONE, ERROR)
+
+
+class ScheduleJob:
+    """Задача загрузки расписания группы и журнал ее событий"""
+
+    def __init__(self, group_name: str):
+        self.id = uuid.uuid4().hex
+        self.group_name = group_name
+        self.events = []  # [(номер события, тип, данные)]
+        self.created_at = time.monotonic()
+        self.finished_at = None
+        self._condition = threading.Condition()
+
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+
+    def publish(self, event: str, **data):
+        """Добавляет событие и будит ожидающих (подходит как on_progress парсера)"""
+        with self._condition:
+            if self.finished:
+                return
+            self.events.append((len(self.events) + 1, event, data))
+            if event in FINAL_EVENTS:
+                self.finished_at = time.monotonic()
+            self._condition.notify_all()
+
+
+    def wait_events(self, last_id: int, timeout: float) -> list:
+        """События после last_id; ждет новых не дольше timeout"""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.events) > last_id or self.finished, timeout)
+            return self.events[last_id:]
+
+
+    def stream(self, last_id: int = 0, heartbeat: float = 15.0):
+        """
+        События в формате text/event-stream, начиная после last_id.
+        Пока новых событий нет, каждые heartbeat секунд отдает комментарий,
+        чтобы прокси не закрыли соединение.
+        """
+        yield "retry: 2000\n\n"
+        while True:
+            events = self.wait_events(last_id, heartbeat)
+            if not events:
+                if self.finished:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            for event_id, event, data in events:
+                last_id = event_id
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                if event in FINAL_EVENTS:
+                    return
+
+
+    def snapshot(self) -> dict:
+        """Состояние задачи для опроса без SSE"""
+        with self._condition:
+            last = self.events[-1] if self.events else None
+            result = {
+                'job_id': self.id,
+                'group': self.group_name,
+                'state': last[1] if last else QUEUED,
+                'weeks_parsed': sum(1 for _id, event, _data in self.events if event == WEEK),
+                'events': len(self.events),
+            }
+            if last and last[1] in FINAL_EVENTS:
+                result.update(last[2])
+            return result
+
+
+class ScheduleJobRegistry:
+    """Реестр задач: одна активная задача на группу, завершенные хранятся retention секунд"""
+
+    def __init__(self, retention: float = 300):
+        self.retention = retention
+        self._jobs = {}  # {id: ScheduleJob}
+        self._active = {}  # {группа: ScheduleJob}
+        self._lock = threading.Lock()
+
+
+    def get_or_create(self, group_name: str):
+        """(задача, True если создана) - активная задача группы или новая"""
+        with self._lock:
+            self._purge()
+            job = self._active.get(group_name)
+            if job is not None and not job.finished:
+                return job, False
+            job = ScheduleJob(group_name)
+            self._jobs[job.id] = job
+            self._active[group_name] = job
+            return job, True
+
+
+    def get(self, job_id: str) -> Optional[ScheduleJob]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'jobs': len(self._jobs),
+                'active': sum(1 for job in self._jobs.values() if not job.finished),
+            }
+
+
+    def _purge(self):
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.retention
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._active.get(job.group_name) is job:
+                del self._active[job.group_name]
+
+
+schedule_jobs = ScheduleJobRegistry()
@@ -0,0 +1,116 @@
+"""
+Объединение одновременных запросов (single-flight).
+Пока для ключа выполняется вызов, остальные запросы с тем же ключом
+не запускают свой, а ждут и получают результат первого.
+Работает одновременно для потоков Flask и корутин бота в одном процессе.
+
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Один выполняющийся вызов на ключ, общий результат для всех ожидающих"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}  # {key: (Future, число ожидающих)}
+        self._tasks = set()  # Ссылки на корутины ведущих, чтобы их не собрал GC
+
+        self.executed = 0  # Сколько раз реально вызывалась функция
+        self.coalesced = 0  # Сколько запросов получили чужой результат
+        self.max_waiters = 0  # Наибольшее число запросов, объединенных в один вызов
+
+
+    def do(self, key: str, fn, *args):
+        """Синхронный вызов: выполняет fn(*args) или ждет уже идущий вызов"""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn, args)
+        return future.result()
+
+
+    async def do_async(self, key: str, fn, *args):
+        """
+        Асинхронный вызов. Корутинная fn выполняется в текущем event loop,
+        синхронная - в executor, чтобы не блокировать бота.
+        """
+        future, leader = self._join(key)
+        if leader:
+            if asyncio.iscoroutinefunction(fn):
+                task = asyncio.ensure_future(self._run_async(key, future, fn, args))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                loop = asyncio.get_running_loop()
+                loop.run_in_executor(None, self._run, key, future, fn, args)
+        # shield: отмена одного ожидающего не должна отменять общий вызов
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+
+    def in_flight(self, key: str) -> bool:
+        """Выполняется ли сейчас вызов для ключа"""
+        with self._lock:
+            return key in self._calls
+
+
+    def stats(self) -> dict:
+        """Статистика объединения запросов"""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'max_waiters': self.max_waiters,
+                'in_flight': len(self._calls),
+            }
+
+
+    def _join(self, key: str):
+        """Регистрирует запрос; возвращает (Future, True если этот запрос ведущий)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call:
+                future, waiters = call
+                self._calls[key] = (future, waiters + 1)
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, waiters + 1)
+                logging.info(f"🔗 {self.name}: запрос {key} присоединен к уже идущему ({waiters + 1})")
+                return future, False
+
+            future = Future()
+            self._calls[key] = (future, 1)
+            self.executed += 1
+            self.max_waiters = max(self.max_waiters, 1)
+            return future, True
+
+
+    def _run(self, key: str, future: Future, fn, args):
+        """Выполняет вызов ведущего запроса и раздает результат"""
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+        else:
+            self._forget(key)
+            future.set_result(result)
+
+
+    async def _run_async(self, key: str, future: Future, fn, args):
+        """Выполняет корутину ведущего запроса и раздает результат"""
+        try:
+            result = await fn(*args)
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+        else:
+            self._forget(key)
+            future.set_result(result)
+
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._calls.pop(key, None)
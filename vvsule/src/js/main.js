@@ -2,9 +2,12 @@ function initMainApp() {
     // Переменные для хранения данных
     let currentWeekIndex = 0;
     let allWeeksSchedule = [];
+    let maxWeeks = 1; // Горизонт недель: дальние недели загружаются по запросу
+    const weekRequests = {}; // Загружаемые недели: {"группа#неделя": Promise}
     let currentGroup = '';
     let currentMode = 'schedule'; // 'schedule' или 'weather'
     let swipeEnabled = true;
+    let scheduleEvents = null; // Поток событий загрузки расписания (SSE)
     
     // Элементы DOM
     const searchInput = document.querySelector('.search input');
@@ -41,10 +44,12 @@ function initMainApp() {
         
         // Показать индикатор загрузки
         showLoading();
+        closeScheduleEvents();
         
         try {
             // Запрос к API для парсинга расписания
-            const response = await fetch(`/api/schedule?group=${encodeURIComponent(groupName)}`);
+            // no-cache: браузер перепроверяет ответ по ETag и при 304 берет его из своего кэша
+            const response = await fetch(`/api/schedule?group=${encodeURIComponent(groupName)}`, { cache: 'no-cache' });
             
             if (!response.ok) {
                 throw new Error(`HTTP ошибка: ${response.status}`);
@@ -52,8 +57,12 @@ function initMainApp() {
             
             const data = await response.json();
             
-            if (data.success && data.schedule) {
+            if (data.success && data.pending) {
+                // Расписания нет в кэше: сервер парсит его в фоне и присылает по неделям
+                followScheduleJob(data.events_url);
+            } else if (data.success && data.schedule) {
                 allWeeksSchedule = data.schedule.weeks || [];
+                maxWeeks = Math.max(data.max_weeks || 1, allWeeksSchedule.length);
                 currentWeekIndex = 0;
                 
                 if (allWeeksSchedule.length > 0) {
@@ -71,6 +80,92 @@ function initMainApp() {
         }
     });
 
+    // Ход фоновой загрузки расписания: очередь, запуск браузера, недели по мере готовности
+    function followScheduleJob(eventsUrl) {
+        const group = currentGroup;
+        allWeeksSchedule = [];
+        maxWeeks = 1;
+        currentWeekIndex = 0;
+
+        const source = new EventSource(eventsUrl);
+        scheduleEvents = source;
+        const isCurrent = () => scheduleEvents === source && currentGroup === group && currentMode === 'schedule';
+
+        source.addEventListener('queued', function(event) {
+            const data = JSON.parse(event.data);
+            if (!isCurrent() || allWeeksSchedule.length > 0) return;
+            if (data.position) {
+                const eta = data.eta_seconds ? `, примерно ${Math.ceil(data.eta_seconds)} сек` : '';
+                updateLoadingMessage(`Место в очереди: ${data.position}${eta}...`);
+            }
+        });
+
+        source.addEventListener('browser_ready', function() {
+            if (isCurrent() && allWeeksSchedule.length === 0) {
+                updateLoadingMessage(`Открываем сайт расписания для группы ${group}...`);
+            }
+        });
+
+        source.addEventListener('page_loaded', function() {
+            if (isCurrent() && allWeeksSchedule.length === 0) {
+                updateLoadingMessage(`Разбираем расписание группы ${group}...`);
+            }
+        });
+
+        source.addEventListener('week', function(event) {
+            const data = JSON.parse(event.data);
+            if (!isCurrent()) return;
+            allWeeksSchedule[data.index] = data.lessons;
+            maxWeeks = Math.max(maxWeeks, allWeeksSchedule.length);
+            // Первую неделю показываем сразу, остальные догружаются
+            if (data.index === 0) {
+                displaySchedule(allWeeksSchedule[0]);
+            }
+            updateWeekButtons();
+        });
+
+        source.addEventListener('done', function(event) {
+            const data = JSON.parse(event.data);
+            // closeScheduleEvents обнуляет scheduleEvents, поэтому проверяем до закрытия
+            const current = isCurrent();
+            closeScheduleEvents(source);
+            if (!current) return;
+            const weeks = data.schedule.weeks || [];
+            const rendered = allWeeksSchedule.length > 0;
+            allWeeksSchedule = weeks;
+            maxWeeks = Math.max(data.max_weeks || 1, weeks.length);
+            currentWeekIndex = Math.min(currentWeekIndex, Math.max(weeks.length - 1, 0));
+            if (weeks.length === 0) {
+                showNoSchedule();
+            } else if (!rendered) {
+                displaySchedule(allWeeksSchedule[currentWeekIndex]);
+            }
+            updateWeekButtons();
+        });
+
+        // Ошибка парсинга приходит событием error с данными, обрыв соединения - без них
+        source.addEventListener('error', function(event) {
+            const current = isCurrent();
+            if (event.data) {
+                const data = JSON.parse(event.data);
+                closeScheduleEvents(source);
+                if (current) showError(data.message || 'Не удалось загрузить расписание');
+            } else if (source.readyState === EventSource.CLOSED) {
+                closeScheduleEvents(source);
+                if (current && allWeeksSchedule.length === 0) {
+                    showError('Соединение с сервером прервано');
+                }
+            }
+        });
+    }
+
+    function closeScheduleEvents(source) {
+        if (scheduleEvents && (!source || scheduleEvents === source)) {
+            scheduleEvents.close();
+            scheduleEvents = null;
+        }
+    }
+
     // Обработчик погоды (иконка облака)
     cloudIcon.parentElement.addEventListener('click', async function() {
         if (currentMode === 'weather') {
@@ -148,7 +243,7 @@ function initMainApp() {
         prevWeekBtn.addEventListener('click', function() {
             if (currentWeekIndex > 0 && allWeeksSchedule.length > 0) {
                 currentWeekIndex--;
-                displaySchedule(allWeeksSchedule[currentWeekIndex]);
+                showWeek(currentWeekIndex);
                 updateWeekButtons();
             }
         });
@@ -157,13 +252,60 @@ function initMainApp() {
     // Обработчик следующей недели
     if (nextWeekBtn) {
         nextWeekBtn.addEventListener('click', function() {
-            if (currentWeekIndex < allWeeksSchedule.length - 1 && allWeeksSchedule.length > 0) {
+            if (currentWeekIndex < maxWeeks - 1 && allWeeksSchedule.length > 0) {
                 currentWeekIndex++;
-                displaySchedule(allWeeksSchedule[currentWeekIndex]);
+                showWeek(currentWeekIndex);
                 updateWeekButtons();
+                // Пока пользователь смотрит неделю, загружаем следующую
+                if (currentWeekIndex + 1 < maxWeeks) {
+                    loadWeek(currentGroup, currentWeekIndex + 1).catch(() => {});
+                }
             }
         });
     }
+
+    // Показ недели: загруженная - сразу, остальные - после запроса к /api/schedule/week
+    async function showWeek(index) {
+        if (allWeeksSchedule[index] !== undefined) {
+            displaySchedule(allWeeksSchedule[index]);
+            return;
+        }
+        const group = currentGroup;
+        showLoading();
+        updateLoadingMessage(`Загружаем неделю ${index + 1} для группы ${group}...`);
+        try {
+            const lessons = await loadWeek(group, index);
+            if (currentGroup === group && currentWeekIndex === index && currentMode === 'schedule') {
+                displaySchedule(lessons);
+            }
+        } catch (error) {
+            console.error('Ошибка:', error);
+            if (currentGroup === group && currentWeekIndex === index) {
+                showError(`Не удалось загрузить неделю: ${error.message}`);
+            }
+        }
+    }
+
+    // Загрузка одной недели; повторные запросы той же недели ждут первый
+    function loadWeek(group, index) {
+        const key = `${group}#${index}`;
+        if (!weekRequests[key]) {
+            weekRequests[key] = fetch(`/api/schedule/week?group=${encodeURIComponent(group)}&offset=${index}`)
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ошибка: ${response.status}`);
+                    return response.json();
+                })
+                .then(data => {
+                    if (!data.success) throw new Error(data.message || 'Ошибка загрузки недели');
+                    if (currentGroup === group) allWeeksSchedule[index] = data.lessons;
+                    return data.lessons;
+                })
+                .finally(() => {
+                    delete weekRequests[key];
+                });
+        }
+        return weekRequests[key];
+    }
     
     // Обработка Enter в поле ввода
     searchInput.addEventListener('keypress', function(e) {
@@ -189,6 +331,11 @@ function initMainApp() {
         if (footer) footer.style.display = 'flex';
     }
 
+    function updateLoadingMessage(message) {
+        const loadingText = scheduleContainer.querySelector('.loading p');
+        if (loadingText) loadingText.textContent = message;
+    }
+
     function showWeatherLoading() {
         scheduleContainer.innerHTML = `
             <div class="loading">
@@ -203,7 +350,12 @@ function initMainApp() {
     
     function displaySchedule(scheduleData) {
         if (!scheduleData || scheduleData.length === 0) {
-            showNoSchedule();
+            // Пустая неделя у найденной группы - не повод прятать навигацию
+            if (allWeeksSchedule.length > 0) {
+                showEmptyWeek();
+            } else {
+                showNoSchedule();
+            }
             return;
         }
 
@@ -310,6 +462,17 @@ function initMainApp() {
         if (footer) footer.style.display = 'none';
     }
 
+    function showEmptyWeek() {
+        scheduleContainer.innerHTML = `
+            <div class="no-schedule">
+                <p>📭 На этой неделе занятий нет</p>
+            </div>
+        `;
+
+        scheduleContainer.style.display = 'block';
+        if (footer) footer.style.display = 'flex';
+    }
+
     function showNoWeather() {
         scheduleContainer.innerHTML = `
             <div class="no-schedule">
@@ -346,7 +509,7 @@ function initMainApp() {
         
         // Обновляем состояние кнопок навигации
         prevWeekBtn.disabled = currentWeekIndex === 0;
-        nextWeekBtn.disabled = currentWeekIndex === allWeeksSchedule.length - 1;
+        nextWeekBtn.disabled = currentWeekIndex >= maxWeeks - 1;
         
         // Визуальная обратная связь
         prevWeekBtn.style.opacity = prevWeekBtn.disabled ? '0.5' : '1';
@@ -0,0 +1,131 @@
+"""
+Фоновые задачи обработчиков бота.
+Обработчик отвечает на нажатие сразу, а загрузку и отправку расписания запускает
+задачей. Менеджер держит ссылки на задачи, логирует их ошибки и ограничивает число
+одновременно выполняемых. Задача с тем же ключом (чат и сообщение) отменяет
+предыдущую: из пяти быстрых нажатий ⏩ до конца доходит только последнее.
+При остановке бота задачи дорабатывают, оставшиеся после таймаута отменяются.
+
+"""
+import asyncio
+import logging
+import time
+from typing import Hashable, Optional
+from config import config
+
+
+class TaskManager:
+    """Запуск и учет фоновых задач с вытеснением по ключу и ограничением параллельности"""
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self._tasks = set()
+        self._by_key = {}  # {ключ: последняя задача с этим ключом}
+        self._slots = None
+        self._loop = None
+        self.running = 0
+        self.closing = False
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.superseded = 0
+        self.duration_total = 0.0
+        self.duration_max = 0.0
+
+
+    def spawn(self, coro, key: Hashable = None, name: str = None) -> Optional[asyncio.Task]:
+        """
+        Запускает корутину задачей. Если по ключу уже есть незавершенная задача,
+        она отменяется. Во время остановки новые задачи не запускаются (None).
+        """
+        if self.closing:
+            coro.close()
+            logging.warning(f"Задача {name or key} не запущена: бот останавливается")
+            return None
+
+        self._bind_loop()
+        if key is not None:
+            previous = self._by_key.get(key)
+            if previous is not None and not previous.done():
+                previous.cancel()
+                self.superseded += 1
+
+        task = asyncio.get_running_loop().create_task(self._supervise(coro), name=name)
+        self._tasks.add(task)
+        if key is not None:
+            self._by_key[key] = task
+        task.add_done_callback(lambda done: self._finished(done, key, coro))
+        return task
+
+
+    async def drain(self, timeout: float) -> int:
+        """Ждет завершения задач не дольше timeout, остальные отменяет; возвращает число отмененных"""
+        self.closing = True
+        if not self._tasks:
+            return 0
+        logging.info(f"⏳ Ожидаю завершения {len(self._tasks)} фоновых задач")
+        _done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logging.warning(f"Отменено {len(pending)} фоновых задач при остановке")
+        return len(pending)
+
+
+    def stats(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            'running': self.running,
+            'queued': len(self._tasks) - self.running,
+            'max_concurrent': self.max_concurrent,
+            'started': self.started,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'superseded': self.superseded,
+            'duration_avg_ms': round(self.duration_total / finished * 1000, 1) if finished else 0.0,
+            'duration_max_ms': round(self.duration_max * 1000, 1),
+        }
+
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Семафор привязан к циклу событий, при перезапуске бота создается заново
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+
+
+    async def _supervise(self, coro):
+        async with self._slots:
+            self.started += 1
+            self.running += 1
+            began = time.monotonic()
+            try:
+                return await coro
+            finally:
+                self.running -= 1
+                duration = time.monotonic() - began
+                self.duration_total += duration
+                self.duration_max = max(self.duration_max, duration)
+
+
+    def _finished(self, task: asyncio.Task, key: Hashable, coro):
+        self._tasks.discard(task)
+        if key is not None and self._by_key.get(key) is task:
+            del self._by_key[key]
+        if task.cancelled():
+            # Отмененная до запуска задача не начинала корутину - закрываем ее
+            coro.close()
+            self.cancelled += 1
+        elif task.exception() is not None:
+            self.failed += 1
+            logging.error(f"Ошибка в фоновой задаче {task.get_name()}: {task.exception()}",
+                          exc_info=task.exception())
+        else:
+            self.completed += 1
+
+
+task_manager = TaskManager(max_concurrent=config.tasks.max_concurrent)
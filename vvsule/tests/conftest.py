@@ -90,4 +90,61 @@ def mock_driver():
     driver.execute_script = Mock()
     driver.quit = Mock()
     
-    return driver
\ No newline at end of file
+    return driver
+
+# Страницы, написанные вручную по разметке vvsu.ru: группа -> файл в fixtures/timetable
+TIMETABLE_FIXTURES = {
+    'БПИ-25-1': 'bpi-25-1.html',
+}
+
+
+@pytest.fixture
+def timetable_fixture_server():
+    """Локальный сервер, отдающий тестовые страницы расписания в разметке vvsu.ru"""
+    import threading
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+
+    fixtures_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'timetable')
+    requests_log = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            group = parse_qs(url.query).get('gr', [''])[0]
+            requests_log.append(group)
+            if url.path != '/timetable/':
+                self.send_error(404)
+                return
+            file_name = TIMETABLE_FIXTURES.get(group.upper(), 'not-found.html')
+            with open(os.path.join(fixtures_dir, file_name), 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/timetable/"
+    server.fixtures_dir = fixtures_dir
+    server.requests_log = requests_log
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def clear_schedule_memory_cache():
+    """Кэш в памяти общий для процесса, тесты не должны видеть данные друг друга"""
+    from vvsule.memory_cache import schedule_memory_cache
+    schedule_memory_cache.clear()
+    yield
+    schedule_memory_cache.clear()
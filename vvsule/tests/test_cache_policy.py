@@ -0,0 +1,140 @@
+"""
+Тесты для свежести кэша vvsule/cache_policy.py
+
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import json
+from vvsule.cache_policy import (
+    cache_state,
+    make_cached_schedule,
+    serialize_schedule,
+    StoredSchedule,
+    week_rows,
+    assemble_schedule,
+    FRESH,
+    STALE,
+    EXPIRED
+)
+
+
+class TestCachePolicy:
+    """Тесты для stale-while-revalidate"""
+
+    def test_cache_states_by_age(self):
+        """Тест состояний кэша между мягким и жестким TTL"""
+        # Arrange
+        now = datetime(2025, 9, 1, 12, 0)
+
+        with patch('vvsule.cache_policy.config.cache.soft_ttl', 3600), \
+                patch('vvsule.cache_policy.config.cache.hard_ttl', 7200):
+            # Act & Assert
+            assert cache_state(now - timedelta(minutes=30), now) == FRESH
+            assert cache_state(now - timedelta(minutes=90), now) == STALE
+            assert cache_state(now - timedelta(hours=3), now) == EXPIRED
+
+    def test_make_cached_schedule(self):
+        """Тест записи кэша с состоянием и возрастом"""
+        # Arrange
+        now = datetime(2025, 9, 1, 12, 0)
+        stale_record = StoredSchedule('{"weeks": [[]]}', now - timedelta(minutes=90))
+        expired_record = StoredSchedule('{"weeks": [[]]}', now - timedelta(hours=3))
+
+        with patch('vvsule.cache_policy.config.cache.soft_ttl', 3600), \
+                patch('vvsule.cache_policy.config.cache.hard_ttl', 7200):
+            # Act
+            stale = make_cached_schedule(stale_record, now)
+            expired = make_cached_schedule(expired_record, now)
+
+        # Assert
+        assert stale.data == {'weeks': [[]]}
+        assert stale.is_stale is True
+        assert stale.age_seconds == 5400
+        assert expired is None
+
+    def test_response_bytes_match_full_serialization(self, sample_schedule_data):
+        """Тест: готовый ответ совпадает с разбором и сериализацией"""
+        # Arrange
+        blob, weeks_count, blob_hash = serialize_schedule(sample_schedule_data)
+        stored = StoredSchedule(blob, datetime(2025, 9, 1, 12, 0), weeks_count=weeks_count, content_hash=blob_hash)
+
+        # Act
+        response = json.loads(stored.response_bytes("БПИ-25-1", stale=True))
+
+        # Assert
+        assert response == {
+            'success': True,
+            'schedule': sample_schedule_data,
+            'group': "БПИ-25-1",
+            'weeks_count': 2,
+            'max_weeks': 3,
+            'source': 'cache',
+            'cached_at': '2025-09-01T12:00:00',
+            'content_hash': blob_hash,
+            'stale': True
+        }
+        assert json.loads(stored.response_bytes("БПИ-25-1", stale=False))['stale'] is False
+
+    def test_legacy_record_computes_metadata(self):
+        """Тест записи без weeks_count и content_hash (до миграции)"""
+        # Arrange
+        blob, weeks_count, blob_hash = serialize_schedule({'weeks': [[], [], []]})
+
+        # Act
+        stored = StoredSchedule(blob, datetime(2025, 9, 1))
+
+        # Assert
+        assert stored.weeks_count == weeks_count == 3
+        assert stored.content_hash == blob_hash
+
+
+class TestWeekRows:
+    """Тесты для хранения недель отдельными строками"""
+
+    def test_week_rows_keyed_from_start_week(self):
+        """Тест ключей недель с учетом start_week"""
+        # Arrange
+        now = datetime(2025, 9, 3, 12, 0)  # Среда, неделя 2025-W36
+
+        # Act
+        rows = week_rows({'weeks': [[{'Дисциплина': 'Физика'}], []], 'start_week': 1}, now)
+
+        # Assert
+        assert [key for key, _lessons, _hash in rows] == ["2025-W37", "2025-W38"]
+        assert rows[0][1] == [{'Дисциплина': 'Физика'}]
+
+    def test_assemble_consecutive_weeks(self):
+        """Тест сборки расписания из подряд идущих неистекших недель"""
+        # Arrange
+        now = datetime(2025, 9, 3, 12, 0)
+        rows = {
+            "2025-W36": ('[{"Дисциплина": "Физика"}]', now - timedelta(minutes=90)),
+            "2025-W37": ('[]', now - timedelta(minutes=10)),
+            "2025-W39": ('[]', now),  # После пропуска не берется
+        }
+
+        with patch('vvsule.cache_policy.config.cache.soft_ttl', 3600), \
+                patch('vvsule.cache_policy.config.cache.hard_ttl', 7200), \
+                patch('vvsule.cache_policy.config.parser.max_weeks', 4):
+            # Act
+            stored = assemble_schedule("БПИ-25-1", rows, now)
+            cached = make_cached_schedule(stored, now)
+
+        # Assert
+        assert stored.data['weeks'] == [[{'Дисциплина': 'Физика'}], []]
+        assert stored.data['week_keys'] == ["2025-W36", "2025-W37"]
+        assert stored.weeks_count == 2
+        assert stored.modified_at == now - timedelta(minutes=10)
+        assert cached.is_stale is True
+
+    def test_assemble_without_current_week(self):
+        """Тест: без текущей недели расписания нет"""
+        # Arrange
+        now = datetime(2025, 9, 3, 12, 0)
+
+        # Act
+        stored = assemble_schedule("БПИ-25-1", {"2025-W37": ('[]', now)}, now)
+
+        # Assert
+        assert stored is None
@@ -0,0 +1,105 @@
+"""
+Тесты для прогрева кэша vvsule/cache_warmer.py
+
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from vvsule.cache_warmer import CacheWarmer
+
+
+class TestCacheWarmer:
+    """Тесты для класса CacheWarmer"""
+
+    @pytest.fixture
+    def warmer(self):
+        return CacheWarmer(
+            interval=600,
+            active_days=14,
+            soft_ttl=6 * 3600,
+            refresh_margin=1800,
+            peak_hours=(6, 9),
+            peak_refresh_age=3 * 3600
+        )
+
+    def at_vladivostok(self, hour):
+        """Момент времени в UTC, когда во Владивостоке hour:00"""
+        return datetime(2025, 9, 1, hour, 0, tzinfo=timezone(timedelta(hours=10))).astimezone(timezone.utc)
+
+    def groups(self, now, **ages_hours):
+        naive_now = now.replace(tzinfo=None)
+        return [
+            {
+                'group_name': name,
+                'users': 1,
+                'last_updated': None if age is None else naive_now - timedelta(hours=age)
+            }
+            for name, age in ages_hours.items()
+        ]
+
+    def test_is_peak_uses_vladivostok_time(self, warmer):
+        """Тест часов перед занятиями по местному времени"""
+        assert warmer.is_peak(self.at_vladivostok(7)) is True
+        assert warmer.is_peak(self.at_vladivostok(9)) is False
+        assert warmer.is_peak(self.at_vladivostok(23)) is False
+
+    def test_select_due_regular_hours(self, warmer):
+        """Тест: вне пика обновляются группы, чей кэш скоро устареет"""
+        # Arrange
+        now = self.at_vladivostok(14)
+        groups = self.groups(now, FRESH=1, OLD=4, NEAR=5.6, MISSING=None)
+
+        # Act
+        due = warmer.select_due(groups, now)
+
+        # Assert
+        assert due == ['NEAR', 'MISSING']
+
+    def test_select_due_peak_hours(self, warmer):
+        """Тест: перед занятиями обновляются и не слишком старые записи"""
+        # Arrange
+        now = self.at_vladivostok(7)
+        groups = self.groups(now, FRESH=1, OLD=4, NEAR=5.6)
+
+        # Act
+        due = warmer.select_due(groups, now)
+
+        # Assert
+        assert due == ['OLD', 'NEAR']
+
+    @pytest.mark.asyncio
+    async def test_warm_cycle_spreads_refreshes(self, warmer):
+        """Тест распределения обновлений по интервалу с низким приоритетом"""
+        # Arrange
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        active = [
+            {'group_name': 'БПИ-25-1', 'users': 3, 'last_updated': None},
+            {'group_name': 'БПИ-25-2', 'users': 1, 'last_updated': now - timedelta(hours=7)},
+            {'group_name': 'БПИ-25-3', 'users': 1, 'last_updated': now},
+        ]
+
+        async def get_session():
+            yield AsyncMock()
+
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        with patch('vvsule.cache_warmer.database.get_session', get_session), \
+                patch('vvsule.cache_warmer.crud.get_active_groups', AsyncMock(return_value=active)), \
+                patch('vvsule.cache_warmer.asyncio.sleep', fake_sleep), \
+                patch('vvsule.cache_warmer.parse_flight.do_async',
+                      AsyncMock(return_value={'success': True})) as mock_refresh:
+            # Act
+            refreshed = await warmer.warm_cycle()
+
+        # Assert
+        assert refreshed == 2
+        assert [c.args[0] for c in mock_refresh.call_args_list] == ['БПИ-25-1', 'БПИ-25-2']
+        assert all(c.args[3].name == 'WARM' for c in mock_refresh.call_args_list)
+        # Интервал 600 сек * 0.8 на 2 группы, со случайным сдвигом
+        assert len(sleeps) == 2
+        assert all(120 <= delay <= 360 for delay in sleeps)
+        assert warmer.stats()['refreshed'] == 2
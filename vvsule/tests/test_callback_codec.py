@@ -0,0 +1,144 @@
+"""
+Тесты для компактных callback data vvsule/callback_codec.py и справочника групп vvsule/group_directory.py
+
+"""
+
+import base64
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from vvsule.callback_codec import (
+    PREFIX,
+    ScheduleCallback,
+    ScheduleCallbackFilter,
+    decode_callback,
+    encode_callback
+)
+from vvsule.group_directory import GroupDirectory
+from vvsule.keyboards import get_schedule_keyboard
+
+
+class TestCallbackCodec:
+    """Тесты кодирования и разбора кнопок расписания"""
+
+    def test_roundtrip(self):
+        """Тест: кнопка разбирается в то же действие, группу и неделю"""
+        # Act
+        data = encode_callback("next", 1234, "2025-W38")
+        decoded = decode_callback(data)
+
+        # Assert
+        assert decoded == ScheduleCallback(action="next", group_id=1234, week="2025-W38")
+        assert data.startswith(PREFIX)
+
+    def test_fits_limit_for_long_group(self):
+        """Тест: длина кнопок не зависит от имени группы"""
+        # Arrange
+        long_group = "МАГИСТРАТУРА-ИНФОРМАТИКА-25-1"
+
+        # Act
+        keyboard = get_schedule_keyboard(long_group, "next", "2025-W52", group_id=70000)
+        legacy = get_schedule_keyboard(long_group, "next", "2025-W52")
+
+        # Assert
+        compact = [button.callback_data for row in keyboard.inline_keyboard for button in row]
+        assert all(len(data.encode("utf-8")) == 13 for data in compact)
+        assert decode_callback(compact[2]).week == "2026-W01"
+        assert len(legacy.inline_keyboard[0][2].callback_data.encode("utf-8")) > 64
+
+    def test_menu_without_week(self):
+        """Тест кнопки 'Назад' без недели"""
+        # Act
+        decoded = decode_callback(encode_callback("menu", 5))
+
+        # Assert
+        assert decoded == ScheduleCallback(action="menu", group_id=5)
+
+    @pytest.mark.parametrize("data, expected", [
+        ("schedule_next_БПИ-25-1", ScheduleCallback(action="next", group_name="БПИ-25-1")),
+        ("schedule_prev_БПИ_25_1@2025W37",
+         ScheduleCallback(action="prev", group_name="БПИ_25_1", week="2025-W37")),
+        ("main_menu_БПИ-25-1", ScheduleCallback(action="menu", group_name="БПИ-25-1")),
+    ])
+    def test_legacy_formats(self, data, expected):
+        """Тест кнопок старых форматов из уже отправленных сообщений"""
+        # Act & Assert
+        assert decode_callback(data) == expected
+
+    @pytest.mark.parametrize("data", [
+        "current_week",
+        "day_today",
+        "schedule_unknown_БПИ-25-1",
+        PREFIX + "!!!",
+        PREFIX + base64.urlsafe_b64encode(bytes([99, 1, 0, 0, 0, 1, 0, 0, 0])).decode(),
+    ])
+    def test_rejects_other_data(self, data):
+        """Тест: чужие кнопки и неизвестные версии формата не разбираются"""
+        # Act & Assert
+        assert decode_callback(data) is None
+
+    @pytest.mark.asyncio
+    async def test_filter_passes_decoded_callback(self):
+        """Тест: фильтр пропускает только нужные действия и передает разобранную кнопку"""
+        # Arrange
+        navigation = ScheduleCallbackFilter("prev", "current", "next")
+        callback = Mock(data=encode_callback("current", 3))
+        menu = Mock(data=encode_callback("menu", 3))
+
+        # Act
+        passed = await navigation(callback)
+        rejected = await navigation(menu)
+
+        # Assert
+        assert passed == {'schedule_callback': ScheduleCallback(action="current", group_id=3)}
+        assert rejected is False
+
+
+class TestGroupDirectory:
+    """Тесты справочника групп"""
+
+    @pytest.mark.asyncio
+    async def test_ids_are_cached(self):
+        """Тест: id группы запрашивается из БД один раз, имя по id берется из памяти"""
+        # Arrange
+        directory = GroupDirectory()
+        session = AsyncMock()
+
+        async def get_session():
+            yield session
+
+        with patch('vvsule.group_directory.database.get_session', get_session), \
+                patch('vvsule.group_directory.crud.get_or_create_group',
+                      AsyncMock(return_value=Mock(id=7))) as mock_create, \
+                patch('vvsule.group_directory.crud.get_group_by_id', AsyncMock()) as mock_get:
+            # Act
+            first = await directory.resolve_id("БПИ-25-1")
+            second = await directory.resolve_id("БПИ-25-1")
+            name = await directory.resolve_name(7)
+
+        # Assert
+        assert first == second == 7
+        assert name == "БПИ-25-1"
+        mock_create.assert_awaited_once_with(session, "БПИ-25-1")
+        mock_get.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_unknown_id_after_restart(self):
+        """Тест: имя по id ищется в БД, неизвестный id дает None"""
+        # Arrange
+        directory = GroupDirectory()
+
+        async def get_session():
+            yield AsyncMock()
+
+        with patch('vvsule.group_directory.database.get_session', get_session), \
+                patch('vvsule.group_directory.crud.get_group_by_id',
+                      AsyncMock(side_effect=[SimpleNamespace(name="БПИ-25-1"), None])):
+            # Act
+            known = await directory.resolve_name(7)
+            unknown = await directory.resolve_name(8)
+
+        # Assert
+        assert known == "БПИ-25-1"
+        assert unknown is None
+        assert directory.stats() == {'groups': 1}
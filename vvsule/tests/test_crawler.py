@@ -0,0 +1,142 @@
+"""
+Тесты для обхода групп vvsule/crawler.py
+
+"""
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+from vvsule.crawler import enumerate_groups, crawl, crawl_hour, CrawlCheckpoint
+
+
+class FakeButton:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeInput:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def clear(self):
+        self.driver.typed = ''
+
+    def send_keys(self, value):
+        self.driver.typed += value
+
+
+class FakeAutocompleteDriver:
+    """Страница с автодополнением, которое показывает не больше limit групп"""
+
+    def __init__(self, groups, limit):
+        self.groups = groups
+        self.limit = limit
+        self.typed = ''
+        self.prefixes = []
+
+    def find_element(self, by, value):
+        return FakeInput(self)
+
+    def find_elements(self, by, value):
+        self.prefixes.append(self.typed)
+        found = [g for g in self.groups if g.startswith(self.typed)][:self.limit]
+        return [FakeButton("Показать")] + [FakeButton(g) for g in found]
+
+
+def fake_parse(group_name):
+    if group_name == "ОШИБКА-25-1":
+        return group_name, {'success': False, 'error': 'Группа не найдена', 'weeks': []}, 0.01
+    return group_name, {'success': True, 'weeks': [[]]}, 0.01
+
+
+class TestCrawler:
+    """Тесты для обхода всех групп"""
+
+    def test_enumerate_groups_expands_truncated_prefixes(self):
+        """Тест уточнения префикса, когда подсказки обрезаны"""
+        # Arrange
+        groups = ["БПИ-25-1", "БПИ-25-2", "БПИ-24-1", "БИН-25-1", "ДЛГ-23-1"]
+        driver = FakeAutocompleteDriver(groups, limit=3)
+
+        # Act
+        with patch('vvsule.parser.WAIT_POLL_FREQUENCY', 0.001):
+            result = enumerate_groups(driver, timeout=0.01, suggest_limit=3)
+
+        # Assert
+        assert result == sorted(groups)
+        assert "БП" in driver.prefixes
+
+    def test_checkpoint_roundtrip(self, tmp_path):
+        """Тест сохранения и загрузки прогресса"""
+        # Arrange
+        path = str(tmp_path / "crawl.json")
+        checkpoint = CrawlCheckpoint(path)
+        checkpoint.groups = ["А-25-1", "Б-25-1", "В-25-1"]
+        checkpoint.mark("А-25-1")
+        checkpoint.mark("Б-25-1", "Таймаут")
+
+        # Act
+        checkpoint.save()
+        loaded = CrawlCheckpoint(path)
+        loaded.load()
+
+        # Assert
+        assert loaded.done == {"А-25-1"}
+        assert loaded.failed == {"Б-25-1": "Таймаут"}
+        assert loaded.pending() == ["В-25-1"]
+        assert loaded.pending(retry_failed=True) == ["Б-25-1", "В-25-1"]
+
+    @pytest.mark.asyncio
+    async def test_crawl_saves_and_resumes(self, tmp_path):
+        """Тест обхода с сохранением, ошибками и продолжением после перезапуска"""
+        # Arrange
+        path = str(tmp_path / "crawl.json")
+        checkpoint = CrawlCheckpoint(path)
+        checkpoint.groups = ["А-25-1", "Б-25-1", "ОШИБКА-25-1"]
+        checkpoint.mark("А-25-1")
+        save_fn = AsyncMock()
+
+        # Act
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            report = await crawl(checkpoint, executor, 2, save_fn, parse_fn=fake_parse)
+
+        # Assert
+        save_fn.assert_awaited_once_with("Б-25-1", {'success': True, 'weeks': [[]]})
+        summary = report.summary()
+        assert summary['processed'] == 2
+        assert summary['completed'] == 1
+        assert summary['failed'] == 1
+        assert summary['groups_per_minute'] > 0
+
+        resumed = CrawlCheckpoint(path)
+        resumed.load()
+        assert resumed.done == {"А-25-1", "Б-25-1"}
+        assert resumed.failed == {"ОШИБКА-25-1": "Группа не найдена"}
+        assert resumed.pending() == []
+
+    def test_crawl_hour_in_vladivostok(self):
+        """Тест: час остановки считается по Владивостоку, а не по зоне сервера"""
+        # Act
+        hour = crawl_hour(datetime(2025, 9, 1, 20, 30, tzinfo=timezone.utc))
+
+        # Assert
+        assert hour == 6
+
+    @pytest.mark.asyncio
+    async def test_crawl_stops_at_hour(self, tmp_path):
+        """Тест: в час остановки новые группы не берутся"""
+        # Arrange
+        checkpoint = CrawlCheckpoint(str(tmp_path / "crawl.json"))
+        checkpoint.groups = ["А-25-1", "Б-25-1"]
+        save_fn = AsyncMock()
+
+        # Act
+        with patch('vvsule.crawler.crawl_hour', return_value=6), \
+                ThreadPoolExecutor(max_workers=1) as executor:
+            report = await crawl(checkpoint, executor, 1, save_fn, parse_fn=fake_parse, stop_at_hour=6)
+
+        # Assert
+        save_fn.assert_not_awaited()
+        assert report.summary()['processed'] == 0
+        assert checkpoint.pending() == ["А-25-1", "Б-25-1"]
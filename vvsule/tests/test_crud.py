@@ -9,6 +9,7 @@ from datetime import datetime
 import json
 from vvsule.database.crud import crud, CRUD
 from vvsule.database.models import User, ScheduleCache, UserRequest
+from vvsule.schedule_calendar import current_week_key
 
 
 class TestCRUD:
@@ -119,20 +120,14 @@ class TestCRUD:
         # Arrange
         cache_data = {'weeks': [[{'Дата': 'Понедельник'}]]}
 
-        from vvsule.database.models import ScheduleCache
+        from vvsule.database.models import Lesson
         from datetime import datetime
 
-        cache = ScheduleCache(
-            id=1,
-            group_name="БПИ-25-1",
-            week_type="all_weeks",
-            schedule_data=json.dumps(cache_data),
-            last_updated=datetime.utcnow()
-        )
+        lesson = Lesson(group_name="БПИ-25-1", week_key=current_week_key(), position=0, date_text='Понедельник')
         
-        # Мокаем execute чтобы он возвращал cache
+        # Мокаем execute чтобы он возвращал неделю кэша с ее занятием
         mock_result = Mock()
-        mock_result.scalar_one_or_none.return_value = cache
+        mock_result.all.return_value = [(lesson.week_key, datetime.utcnow(), lesson)]
         mock_session.execute.return_value = mock_result
         
         # Act
@@ -143,7 +138,7 @@ class TestCRUD:
         )
         
         # Assert
-        assert result == cache_data
+        assert result['weeks'] == cache_data['weeks']
         
     @pytest.mark.asyncio
     async def test_get_cached_schedule_stale(self, mock_session):
@@ -168,6 +163,54 @@ class TestCRUD:
         # Assert
         assert result is None  # Устаревший кэш не возвращается
         
+    @pytest.mark.asyncio
+    async def test_get_cached_schedule_entry_stale(self, mock_session):
+        """Тест получения устаревшего кэша с пометкой stale"""
+        # Arrange
+        from datetime import timedelta
+
+        from vvsule.database.models import Lesson
+
+        week = [{'Дата': 'Понедельник'}]
+        lesson = Lesson(group_name="БПИ-25-1", week_key=current_week_key(), position=0, date_text='Понедельник')
+        mock_result = Mock()
+        mock_result.all.return_value = [
+            (current_week_key(), datetime.utcnow() - timedelta(hours=10), lesson)
+        ]
+        mock_session.execute.return_value = mock_result
+
+        # Act
+        entry = await crud.get_cached_schedule_entry(
+            session=mock_session,
+            group_name="БПИ-25-1",
+            week_type="all_weeks"
+        )
+
+        # Assert
+        assert entry.data['weeks'] == [week]
+        assert entry.data['week_keys'] == [current_week_key()]
+        assert entry.is_stale is True
+
+    @pytest.mark.asyncio
+    async def test_get_cached_schedule_entry_expired(self, mock_session):
+        """Тест кэша старше жесткого TTL"""
+        # Arrange
+        from datetime import timedelta
+
+        mock_result = Mock()
+        mock_result.all.return_value = [(current_week_key(), datetime.utcnow() - timedelta(days=3), None)]
+        mock_session.execute.return_value = mock_result
+
+        # Act
+        entry = await crud.get_cached_schedule_entry(
+            session=mock_session,
+            group_name="БПИ-25-1",
+            week_type="all_weeks"
+        )
+
+        # Assert
+        assert entry is None
+
     @pytest.mark.asyncio
     async def test_get_cached_schedule_not_found(self, mock_session):
         """Тест получения кэша расписания (кэш не найден)"""
@@ -0,0 +1,229 @@
+"""
+Тесты для пула браузеров vvsule/driver_pool.py
+
+"""
+
+import pytest
+import threading
+from unittest.mock import Mock, patch
+from vvsule.driver_pool import DriverPool, CLEAR_STORAGE_SCRIPT
+
+
+class TestDriverPool:
+    """Тесты для класса DriverPool"""
+
+    @pytest.fixture
+    def factory(self):
+        """Фабрика, создающая новый мок драйвера на каждый вызов"""
+        def create_driver():
+            driver = Mock()
+            driver.find_elements.return_value = []
+            return driver
+        return Mock(side_effect=create_driver)
+
+    def make_pool(self, factory, **kwargs):
+        params = {
+            'size': 2,
+            'max_uses': 10,
+            'max_age': 3600,
+            'home_url': "https://www.vvsu.ru/timetable/",
+            'acquire_timeout': 1,
+        }
+        params.update(kwargs)
+        return DriverPool(factory=factory, **params)
+
+    def test_driver_reused_between_uses(self, factory):
+        """Тест повторного использования прогретого браузера"""
+        # Arrange
+        pool = self.make_pool(factory)
+
+        # Act
+        with pool.driver() as first:
+            pass
+        with pool.driver() as second:
+            pass
+
+        # Assert
+        assert first is second
+        factory.assert_called_once()
+        first.quit.assert_not_called()
+
+    def test_driver_reset_on_release(self, factory):
+        """Тест сброса браузера на страницу расписания после использования"""
+        # Arrange
+        pool = self.make_pool(factory)
+        group_input = Mock()
+
+        # Act
+        with pool.driver() as driver:
+            driver.find_elements.return_value = [group_input]
+
+        # Assert
+        driver.get.assert_called_with("https://www.vvsu.ru/timetable/")
+        group_input.clear.assert_called_once()
+
+    def test_driver_reset_clears_site_state(self, factory):
+        """Тест очистки куки и хранилищ сайта, чтобы следующий парсинг не увидел прошлую группу"""
+        # Arrange
+        pool = self.make_pool(factory)
+
+        # Act
+        with pool.driver() as driver:
+            pass
+
+        # Assert
+        driver.delete_all_cookies.assert_called_once()
+        driver.execute_script.assert_any_call(CLEAR_STORAGE_SCRIPT)
+        driver.get.assert_called_with("https://www.vvsu.ru/timetable/")
+
+    def test_driver_recycled_after_max_uses(self, factory):
+        """Тест перезапуска браузера после N использований"""
+        # Arrange
+        pool = self.make_pool(factory, max_uses=2)
+
+        # Act
+        with pool.driver() as first:
+            pass
+        with pool.driver() as second:
+            pass
+        with pool.driver() as third:
+            pass
+
+        # Assert
+        assert first is second
+        assert third is not first
+        first.quit.assert_called_once()
+        assert pool.stats()['recycled'] == 1
+
+    def test_driver_recycled_after_max_age(self, factory):
+        """Тест перезапуска браузера по возрасту"""
+        # Arrange
+        pool = self.make_pool(factory, max_age=60)
+
+        with pool.driver() as first:
+            pass
+
+        # Act - "состариваем" браузер
+        with patch('vvsule.driver_pool.time.monotonic', return_value=10 ** 9):
+            with pool.driver() as second:
+                pass
+
+        # Assert
+        assert second is not first
+        first.quit.assert_called_once()
+
+    def test_unhealthy_driver_replaced(self, factory):
+        """Тест замены браузера, не прошедшего проверку"""
+        # Arrange
+        pool = self.make_pool(factory)
+        with pool.driver() as first:
+            pass
+        first.execute_script.side_effect = Exception("browser crashed")
+
+        # Act
+        with pool.driver() as second:
+            pass
+
+        # Assert
+        assert second is not first
+        first.quit.assert_called_once()
+        assert pool.stats()['broken'] == 1
+
+    def test_driver_discarded_after_exception(self, factory):
+        """Тест закрытия браузера при исключении во время парсинга"""
+        # Arrange
+        pool = self.make_pool(factory)
+
+        # Act
+        with pytest.raises(ValueError):
+            with pool.driver() as driver:
+                raise ValueError("parse failed")
+
+        # Assert
+        driver.quit.assert_called_once()
+        assert pool.stats()['alive'] == 0
+
+    def test_driver_kept_after_healthy_error(self, factory):
+        """Тест: ошибка данных (например, группа не найдена) не закрывает исправный браузер"""
+        # Arrange
+        pool = self.make_pool(factory)
+
+        # Act
+        with pytest.raises(LookupError):
+            with pool.driver(healthy_errors=(LookupError,)) as driver:
+                raise LookupError("group not found")
+
+        # Assert
+        driver.quit.assert_not_called()
+        assert pool.stats()['idle'] == 1
+        assert pool.stats()['broken'] == 0
+
+    def test_factory_failure_returns_none(self):
+        """Тест неудачного запуска браузера (фабрика вернула None)"""
+        # Arrange
+        pool = self.make_pool(Mock(return_value=None))
+
+        # Act
+        with pool.driver() as driver:
+            pass
+
+        # Assert
+        assert driver is None
+        assert pool.stats()['alive'] == 0
+
+    def test_acquire_timeout_when_exhausted(self, factory):
+        """Тест ожидания свободного браузера при исчерпанном пуле"""
+        # Arrange
+        pool = self.make_pool(factory, size=1, acquire_timeout=0.05)
+
+        # Act & Assert
+        with pool.driver():
+            with pytest.raises(TimeoutError):
+                pool.acquire()
+
+    def test_waiting_thread_gets_released_driver(self, factory):
+        """Тест передачи освободившегося браузера ожидающему потоку"""
+        # Arrange
+        pool = self.make_pool(factory, size=1, acquire_timeout=5)
+        pooled = pool.acquire()
+        received = []
+
+        def worker():
+            received.append(pool.acquire())
+
+        # Act
+        thread = threading.Thread(target=worker)
+        thread.start()
+        pool.release(pooled)
+        thread.join(timeout=5)
+
+        # Assert
+        assert received[0] is pooled
+        factory.assert_called_once()
+
+    def test_warm_up(self, factory):
+        """Тест прогрева браузеров"""
+        # Arrange
+        pool = self.make_pool(factory, size=3)
+
+        # Act
+        pool.warm_up(2)
+
+        # Assert
+        stats = pool.stats()
+        assert stats['idle'] == 2
+        assert stats['created'] == 2
+
+    def test_close_quits_idle_drivers(self, factory):
+        """Тест закрытия пула"""
+        # Arrange
+        pool = self.make_pool(factory)
+        pool.warm_up(2)
+
+        # Act
+        pool.close()
+
+        # Assert
+        assert pool.stats()['alive'] == 0
+        with pytest.raises(RuntimeError):
+            pool.acquire()
@@ -0,0 +1,270 @@
+"""
+Тесты для HTTP-бэкенда парсера vvsule/http_parser.py
+
+"""
+
+import json
+import os
+import pytest
+from unittest.mock import patch
+from urllib.parse import urljoin
+from selenium.common.exceptions import NoSuchElementException
+from vvsule.http_parser import (
+    HttpTimetableClient,
+    parse_html,
+    read_table_rows,
+    extract_week_tables,
+    build_timetable_result
+)
+from vvsule.parser import (
+    parse_with_driver,
+    parse_vvsu_timetable,
+    ACTIVE_SLIDE_SCRIPT,
+    ACTIVE_TABLE_ROWS_SCRIPT
+)
+
+
+class FakeElement:
+    """WebElement с готовым текстом (innerText), атрибутами и вложенными элементами по селектору"""
+
+    def __init__(self, text='', attrs=None, children=None):
+        self.text = text
+        self.attrs = attrs or {}
+        self.children = children or {}  # {селектор: [FakeElement]}
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def is_enabled(self):
+        return True
+
+    def clear(self):
+        pass
+
+    def find_elements(self, by, value):
+        return self.children.get(value, [])
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(value)
+        return found[0]
+
+
+class FakeInput(FakeElement):
+    """Поле ввода группы: запоминает введенный текст в драйвере"""
+
+    def __init__(self, driver):
+        super().__init__()
+        self.driver = driver
+
+    def send_keys(self, value):
+        self.driver.typed = value
+
+
+def week_table(rows, base_url):
+    """Таблица недели из строк {заголовок колонки: текст или {text, rowspan/href}}"""
+    row_elements = []
+    for row in rows:
+        cells = {}
+        for header, cell in row.items():
+            if isinstance(cell, str):
+                cell = {'text': cell}
+            attrs = {'rowspan': cell['rowspan']} if 'rowspan' in cell else {}
+            children = {}
+            if 'href' in cell:
+                # Свойство href ссылки в браузере - абсолютный адрес
+                children['a'] = [FakeElement(attrs={'href': urljoin(base_url, cell['href'])})]
+            cells[f"td[data-th='{header}']"] = [FakeElement(cell['text'], attrs, children)]
+        row_elements.append(FakeElement(children=cells))
+    return FakeElement(children={"tbody tr": row_elements})
+
+
+class FakeDriver:
+    """
+    Браузер, который показывает недели из описания страницы (текст ячеек таким,
+    каким его отдает innerText) и листает карусель недель
+    """
+
+    def __init__(self, page, base_url):
+        self.base_url = base_url
+        self.current_url = base_url
+        self.typed = ''
+        self.tables = [week_table(rows, base_url) for rows in page['weeks']]
+        self.active = page['active']
+        self.next_button = FakeElement()
+
+    def get(self, url):
+        self.current_url = url
+
+    def find_element(self, by, value):
+        if value == "input#gr":
+            return FakeInput(self)
+        if value == "div.carousel-item.active table.table-no-transform":
+            if self.active >= len(self.tables):
+                raise NoSuchElementException(value)
+            return self.tables[self.active]
+        if value == "button.arrow-button.right[data-bs-slide='next']":
+            return self.next_button
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        # Автодополнение показывает кнопку с введенной группой
+        return [FakeElement(self.typed)]
+
+    def execute_script(self, script, element=None):
+        if script == ACTIVE_SLIDE_SCRIPT:
+            return self.active
+        if script == ACTIVE_TABLE_ROWS_SCRIPT:
+            return len(self.tables[self.active].children["tbody tr"]) if self.active < len(self.tables) else 0
+        if element is self.next_button:
+            self.active += 1
+
+
+class TestHttpParser:
+    """Тесты для парсинга расписания без браузера"""
+
+    @pytest.fixture
+    def client(self, timetable_fixture_server):
+        client = HttpTimetableClient(
+            timetable_url=timetable_fixture_server.url,
+            group_param='gr',
+            timeout=5,
+            connection_limit=2
+        )
+        yield client
+        client.close()
+
+    def read_fixture(self, server, name='bpi-25-1.html'):
+        with open(os.path.join(server.fixtures_dir, name), encoding='utf-8') as f:
+            return f.read()
+
+    def test_http_backend_matches_selenium_backend(self, client, timetable_fixture_server):
+        """
+        Тест идентичности результатов HTTP- и Selenium-бэкендов: HTTP-бэкенд разбирает
+        HTML страницы, Selenium-бэкенд читает те же недели из описания того, что показывает браузер
+        """
+        # Arrange
+        page = json.loads(self.read_fixture(timetable_fixture_server, 'bpi-25-1.browser.json'))
+        driver = FakeDriver(page, timetable_fixture_server.url)
+
+        # Act
+        http_result = client.parse_sync("бпи-25-1")
+        with patch('vvsule.parser.config.parser.extraction_mode', 'elements'):
+            selenium_result = parse_with_driver(driver, "БПИ-25-1")
+
+        # Assert
+        assert http_result['success'] is True
+        assert selenium_result['success'] is True
+        assert http_result['weeks'] == selenium_result['weeks']
+        assert http_result['total_weeks'] == selenium_result['total_weeks'] == 3
+        assert timetable_fixture_server.requests_log == ["БПИ-25-1"]
+
+    def test_http_backend_lessons(self, client):
+        """Тест содержимого распарсенной недели"""
+        # Act
+        result = client.parse_sync("БПИ-25-1")
+
+        # Assert
+        first_week = result['weeks'][0]
+        assert first_week[0] == {
+            'Дата': 'Понедельник\n01.09.2025',
+            'Время': '09:00 - 10:30',
+            'Дисциплина': 'Математический анализ',
+            'Аудитория': '1101',
+            'Преподаватель': 'Иванов И.И.',
+            'Тип занятия': 'Лекция'
+        }
+        # Дата переносится на строку без ячейки даты (rowspan)
+        assert first_week[1]['Дата'] == 'Понедельник\n01.09.2025'
+        assert first_week[1]['Ссылка на вебинар'].endswith('/webinar/room-42')
+        # Строка без времени пропущена
+        assert [lesson['Дата'].split('\n')[0] for lesson in first_week] == [
+            'Понедельник', 'Понедельник', 'Вторник', 'Четверг'
+        ]
+
+    def test_http_backend_group_not_found(self, client):
+        """Тест несуществующей группы"""
+        # Act
+        result = client.parse_sync("НЕСУЩЕСТВУЮЩАЯ-ГРУППА")
+
+        # Assert
+        assert result['success'] is False
+        assert "не найдена" in result['error']
+        assert result['weeks'] == []
+
+    def test_http_backend_connection_error(self):
+        """Тест недоступного сайта"""
+        # Arrange
+        client = HttpTimetableClient(
+            timetable_url="http://127.0.0.1:9/timetable/",
+            group_param='gr',
+            timeout=2,
+            connection_limit=1
+        )
+
+        # Act
+        result = client.parse_sync("БПИ-25-1")
+        client.close()
+
+        # Assert
+        assert result['success'] is False
+        assert result['weeks'] == []
+
+    def test_week_tables_start_from_active(self, timetable_fixture_server):
+        """Тест выбора недель начиная с активной"""
+        # Arrange
+        document = parse_html(self.read_fixture(timetable_fixture_server))
+
+        # Act
+        tables = extract_week_tables(document)
+        rows = read_table_rows(tables[0])
+
+        # Assert
+        assert len(tables) == 4
+        assert rows[0]['date'] == {'text': 'Понедельник\n01.09.2025', 'rowspan': '2'}
+        assert rows[1]['date'] is None
+
+    def test_max_weeks_limit(self, timetable_fixture_server):
+        """Тест ограничения количества недель"""
+        # Arrange
+        html = self.read_fixture(timetable_fixture_server)
+
+        # Act
+        result = build_timetable_result(html, "БПИ-25-1", max_weeks=2)
+
+        # Assert
+        assert result['total_weeks'] == 2
+
+    def test_progress_reports_each_week(self, timetable_fixture_server):
+        """Тест события week для каждой разобранной недели"""
+        # Arrange
+        html = self.read_fixture(timetable_fixture_server)
+        events = []
+
+        # Act
+        result = build_timetable_result(
+            html, "БПИ-25-1", max_weeks=3,
+            on_progress=lambda event, **data: events.append((event, data))
+        )
+
+        # Assert
+        assert [data['index'] for event, data in events if event == "week"] == list(range(result['total_weeks']))
+        assert [data['lessons'] for _event, data in events] == result['weeks']
+
+    def test_parse_vvsu_timetable_falls_back_to_selenium(self):
+        """Тест переключения на Selenium при ошибке HTTP-бэкенда"""
+        # Arrange
+        selenium_result = {'success': True, 'weeks': [[]], 'total_weeks': 1}
+
+        with patch('vvsule.parser.config.parser.backend', 'http'), \
+                patch('vvsule.parser.http_client.parse_sync',
+                      return_value={'success': False, 'error': 'HTTP 500', 'weeks': []}), \
+                patch('vvsule.parser.parse_vvsu_timetable_selenium',
+                      return_value=selenium_result) as mock_selenium:
+            # Act
+            result = parse_vvsu_timetable("БПИ-25-1")
+
+        # Assert
+        assert result == selenium_result
+        mock_selenium.assert_called_once_with("БПИ-25-1", on_progress=None, start_week=0, max_weeks=3)
@@ -0,0 +1,72 @@
+"""
+Тесты для хранения занятий в таблице lessons vvsule/lessons.py
+
+"""
+
+import json
+from datetime import date, time, datetime
+from vvsule.lessons import make_lessons, lesson_dict, week_blobs
+from vvsule.timetable_rows import build_lessons_from_rows
+from vvsule.cache_policy import week_rows, content_hash
+
+
+class TestLessons:
+    """Тесты разбора занятий в строки lessons и обратно"""
+
+    def test_round_trip(self, sample_schedule_data):
+        """Тест: занятия из lessons совпадают с результатом парсера"""
+        # Arrange
+        week = sample_schedule_data['weeks'][0] + [{
+            'Дата': 'Среда\n03.09.2025',
+            'Время': '13:00 - 14:30',
+            'Дисциплина': 'Вебинар',
+            'Ссылка на вебинар': 'https://vvsu.ru/webinar/room-42'
+        }]
+
+        # Act
+        records = make_lessons("БПИ-25-1", "2025-W36", week)
+
+        # Assert
+        assert [lesson_dict(record) for record in records] == week
+        assert [record.position for record in records] == list(range(len(week)))
+        assert records[-1].lesson_date == date(2025, 9, 3)
+        assert records[-1].start_time == time(13, 0)
+        assert records[-1].webinar_url == 'https://vvsu.ru/webinar/room-42'
+
+    def test_week_blobs_keeps_empty_weeks(self):
+        """Тест сборки недель из строк запроса, неделя без занятий остается пустой"""
+        # Arrange
+        updated = datetime(2025, 9, 1, 12, 0)
+        first, second = make_lessons("БПИ-25-1", "2025-W36", [
+            {'Время': '09:00 - 10:30', 'Дисциплина': 'Физика'},
+            {'Время': '10:40 - 12:10', 'Дисциплина': 'Химия'},
+        ])
+        rows = [("2025-W36", updated, first), ("2025-W36", updated, second), ("2025-W37", updated, None)]
+
+        # Act
+        weeks = week_blobs(rows)
+
+        # Assert
+        assert [lesson['Дисциплина'] for lesson in json.loads(weeks["2025-W36"][0])] == ['Физика', 'Химия']
+        assert weeks["2025-W37"] == ('[]', updated)
+
+    def test_week_hash_survives_db_round_trip(self):
+        """Тест: хэш недели после сохранения в lessons и чтения обратно не меняется"""
+        # Arrange
+        week = build_lessons_from_rows([
+            {'date': {'text': 'Понедельник\n01.09.2025', 'rowspan': '2'}, 'time': '09:00 - 10:30',
+             'discipline': {'text': 'Программирование', 'link': None}, 'room': '', 'teacher': None, 'type': 'Лекция'},
+            {'date': None, 'time': '10:40 - 12:10',
+             'discipline': {'text': 'Вебинар', 'link': 'https://vvsu.ru/webinar/room-42'},
+             'room': 'Вебинар', 'teacher': 'Петров П.П.', 'type': ''},
+        ])
+        [(week_key, _lessons, parsed_hash)] = week_rows({'weeks': [week], 'week_keys': ["2025-W36"]})
+        updated = datetime(2025, 9, 1, 12, 0)
+        rows = [(week_key, updated, record) for record in make_lessons("БПИ-25-1", week_key, week)]
+
+        # Act
+        blob, _updated = week_blobs(rows)[week_key]
+
+        # Assert
+        assert json.loads(blob) == week
+        assert content_hash(blob) == parsed_hash
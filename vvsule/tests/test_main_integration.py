@@ -9,6 +9,7 @@ from unittest.mock import Mock, patch, AsyncMock
 from vvsule.main import main as bot_main
 from vvsule.database.database import database
 from vvsule.database.crud import crud
+from config import config
 
 
 class TestIntegration:
@@ -95,7 +96,8 @@ class TestIntegration:
                         ]]
                     }
                     
-                    with patch('vvsule.background_tasks.crud.save_schedule_cache'):
+                    with patch('vvsule.background_tasks.crud.save_schedule_cache'), \
+                            patch('vvsule.background_tasks.prefetch_week'):
                         with patch('vvsule.background_tasks.crud.log_user_request'):
                             # Act
                             await parse_and_send_schedule(
@@ -109,8 +111,299 @@ class TestIntegration:
                             
                             # Assert
                             mock_bot.send_message.assert_called()
-                            mock_parser.assert_called_once_with("БПИ-25-1")
+                            # Вторым аргументом парсер получает on_progress для показа недель по мере готовности
+                            mock_parser.assert_called_once()
+                            assert mock_parser.call_args[0][0] == "БПИ-25-1"
                             
+    @pytest.mark.asyncio
+    async def test_background_task_serves_stale_cache(self, mock_session):
+        """Тест: устаревший кэш отдается сразу, а обновление идет в фоне"""
+        # Arrange
+        from datetime import datetime, timedelta
+        from vvsule.background_tasks import parse_and_send_schedule
+        from vvsule.cache_policy import CachedSchedule, StoredSchedule, serialize_schedule, STALE
+
+        mock_bot = AsyncMock()
+        blob, _, _ = serialize_schedule(
+            {'success': True, 'weeks': [[{'Дата': 'Понедельник', 'Время': '09:00', 'Дисциплина': 'Тест'}]]}
+        )
+        cached = CachedSchedule(
+            stored=StoredSchedule(blob, datetime.utcnow() - timedelta(hours=10)),
+            state=STALE,
+            age_seconds=36000
+        )
+
+        async def get_session():
+            yield mock_session
+
+        with patch('vvsule.background_tasks.database.get_session', get_session), \
+                patch('vvsule.background_tasks.crud.get_cached_schedule_entry', AsyncMock(return_value=cached)), \
+                patch('vvsule.background_tasks.crud.get_user_by_telegram_id', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.refresh_schedule_in_background') as mock_refresh, \
+                patch('vvsule.background_tasks.prefetch_week'), \
+                patch('vvsule.background_tasks.parse_vvsu_timetable') as mock_parser:
+            # Act
+            await parse_and_send_schedule(
+                bot=mock_bot,
+                chat_id=12345,
+                group_name="БПИ-25-1",
+                user_id=67890,
+                week_type="current",
+                offset=0
+            )
+
+        # Assert
+        mock_refresh.assert_called_once_with("БПИ-25-1", 1)
+        mock_parser.assert_not_called()
+        sent_text = mock_bot.send_message.call_args[0][1]
+        assert "Тест" in sent_text
+        assert "обновляю" in sent_text
+
+    @pytest.mark.asyncio
+    async def test_background_task_loads_next_week_on_demand(self, mock_session):
+        """Тест: неделя за пределами кэша парсится по запросу, следующая - предзагружается"""
+        # Arrange
+        from datetime import datetime
+        from vvsule.background_tasks import parse_and_send_schedule
+        from vvsule.cache_policy import make_cached_schedule, StoredSchedule, serialize_schedule
+
+        mock_bot = AsyncMock()
+        blob, _, _ = serialize_schedule(
+            {'success': True, 'weeks': [[{'Дата': 'Понедельник', 'Время': '09:00', 'Дисциплина': 'Тест'}]]}
+        )
+        cached = make_cached_schedule(StoredSchedule(blob, datetime.utcnow()))
+        next_week = [{'Дата': 'Вторник', 'Время': '10:40', 'Дисциплина': 'Следующая неделя'}]
+
+        async def get_session():
+            yield mock_session
+
+        with patch('vvsule.background_tasks.database.get_session', get_session), \
+                patch('vvsule.background_tasks.crud.get_cached_schedule_entry', AsyncMock(return_value=cached)), \
+                patch('vvsule.background_tasks.crud.get_user_by_telegram_id', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.load_week', AsyncMock(return_value=next_week)) as mock_load, \
+                patch('vvsule.background_tasks.prefetch_week') as mock_prefetch:
+            # Act
+            await parse_and_send_schedule(
+                bot=mock_bot,
+                chat_id=12345,
+                group_name="БПИ-25-1",
+                user_id=67890,
+                week_type="next",
+                offset=1
+            )
+
+        # Assert
+        mock_load.assert_awaited_once_with("БПИ-25-1", 1)
+        mock_prefetch.assert_called_once_with("БПИ-25-1", 2)
+        sent_text = mock_bot.send_message.call_args[0][1]
+        assert "Следующая неделя" in sent_text
+        assert "Неделя 2 из 3" in sent_text
+
+    @pytest.mark.asyncio
+    async def test_navigation_uses_week_from_callback_data(self, mock_session):
+        """Тест: неделя из callback data показывается без позиции пользователя, кнопки ведут к соседним"""
+        # Arrange
+        from datetime import datetime
+        from vvsule.background_tasks import parse_and_send_schedule
+        from vvsule.cache_policy import make_cached_schedule, StoredSchedule, serialize_schedule
+        from vvsule.schedule_calendar import current_week_key, shift_week, week_keys
+        from vvsule.callback_codec import decode_callback
+
+        this_week = current_week_key()
+        mock_bot = AsyncMock()
+        blob, _, _ = serialize_schedule({
+            'success': True,
+            'weeks': [
+                [{'Время': '09:00 - 10:30', 'Дисциплина': 'Первая неделя'}],
+                [{'Время': '09:00 - 10:30', 'Дисциплина': 'Вторая неделя'}],
+            ],
+            'week_keys': week_keys(this_week, 2)
+        })
+        cached = make_cached_schedule(StoredSchedule(blob, datetime.utcnow()))
+
+        async def get_session():
+            yield mock_session
+
+        with patch('vvsule.background_tasks.database.get_session', get_session), \
+                patch('vvsule.background_tasks.crud.get_cached_schedule_entry', AsyncMock(return_value=cached)), \
+                patch('vvsule.background_tasks.crud.get_user_by_telegram_id', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.prefetch_week'), \
+                patch('vvsule.background_tasks.group_directory.resolve_id', AsyncMock(return_value=7)), \
+                patch('vvsule.background_tasks.update_user_week_position') as mock_position:
+            # Act
+            await parse_and_send_schedule(
+                bot=mock_bot,
+                chat_id=12345,
+                group_name="БПИ-25-1",
+                user_id=67890,
+                week_type="next",
+                offset=1,
+                week=shift_week(this_week, 1)
+            )
+
+        # Assert
+        mock_position.assert_not_called()
+        call = mock_bot.send_message.call_args
+        assert "Вторая неделя" in call[0][1]
+        buttons = call.kwargs['reply_markup'].inline_keyboard[0]
+        prev_button = decode_callback(buttons[0].callback_data)
+        next_button = decode_callback(buttons[2].callback_data)
+        assert (prev_button.action, prev_button.group_id, prev_button.week) == ("prev", 7, this_week)
+        assert (next_button.action, next_button.group_id, next_button.week) == ("next", 7, shift_week(this_week, 2))
+        assert len(buttons[2].callback_data.encode("utf-8")) <= 64
+
+    @pytest.mark.asyncio
+    async def test_today_served_from_cache_index(self, mock_session):
+        """Тест: /today отвечает из индекса кэша без парсинга"""
+        # Arrange
+        from datetime import datetime
+        from vvsule.background_tasks import send_day_schedule
+        from vvsule.cache_policy import make_cached_schedule, StoredSchedule, serialize_schedule
+        from vvsule.schedule_calendar import current_date, current_week_key
+
+        today = current_date()
+        mock_bot = AsyncMock()
+        blob, _, _ = serialize_schedule({
+            'success': True,
+            'weeks': [[{'Дата': f"День\n{today:%d.%m.%Y}", 'Время': '09:00 - 10:30', 'Дисциплина': 'Физика'}]],
+            'week_keys': [current_week_key()]
+        })
+        cached = make_cached_schedule(StoredSchedule(blob, datetime.utcnow()))
+
+        async def get_session():
+            yield mock_session
+
+        with patch('vvsule.background_tasks.database.get_session', get_session), \
+                patch('vvsule.background_tasks.crud.get_cached_schedule_entry', AsyncMock(return_value=cached)), \
+                patch('vvsule.background_tasks.load_week', AsyncMock()) as mock_load:
+            # Act
+            await send_day_schedule(bot=mock_bot, chat_id=12345, group_name="бпи-25-1", day_offset=0)
+
+        # Assert
+        mock_load.assert_not_awaited()
+        sent_text = mock_bot.send_message.call_args[0][1]
+        assert "Сегодня" in sent_text
+        assert "Физика" in sent_text
+
+    @pytest.mark.asyncio
+    async def test_tomorrow_parses_single_week_on_miss(self, mock_session):
+        """Тест: при промахе кэша парсится только неделя нужного дня"""
+        # Arrange
+        from datetime import timedelta
+        from vvsule.background_tasks import send_day_schedule
+        from vvsule.schedule_calendar import current_date
+
+        tomorrow = current_date() + timedelta(days=1)
+        week_offset = 1 if tomorrow.weekday() == 0 else 0
+        mock_bot = AsyncMock()
+
+        async def get_session():
+            yield mock_session
+
+        with patch('vvsule.background_tasks.database.get_session', get_session), \
+                patch('vvsule.background_tasks.crud.get_cached_schedule_entry', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.load_week', AsyncMock(return_value=[])) as mock_load:
+            # Act
+            await send_day_schedule(bot=mock_bot, chat_id=12345, group_name="БПИ-25-1", day_offset=1)
+
+        # Assert
+        mock_load.assert_awaited_once_with("БПИ-25-1", week_offset)
+        sent_text = mock_bot.send_message.call_args[0][1]
+        assert "Завтра" in sent_text
+        assert "Занятий нет" in sent_text
+
+    @pytest.mark.asyncio
+    async def test_background_task_sends_current_week_early(self, mock_session):
+        """Тест: текущая неделя отправляется до окончания парсинга остальных"""
+        # Arrange
+        import time
+        from vvsule.background_tasks import parse_and_send_schedule
+
+        mock_bot = AsyncMock()
+        mock_bot.send_message.return_value = Mock(message_id=777)
+        weeks = [
+            [{'Дата': 'Понедельник', 'Время': '09:00', 'Дисциплина': 'Первая неделя'}],
+            [{'Дата': 'Понедельник', 'Время': '09:00', 'Дисциплина': 'Вторая неделя'}],
+        ]
+
+        def parse(group_name, on_progress=None, **_kwargs):
+            on_progress("week", index=0, lessons=weeks[0])
+            time.sleep(0.3)
+            on_progress("week", index=1, lessons=weeks[1])
+            return {'success': True, 'weeks': weeks}
+
+        async def get_session():
+            yield mock_session
+
+        with patch('vvsule.background_tasks.QUEUE_NOTICE_DELAY', 0.01), \
+                patch.object(config.parser, 'eager_weeks', 2), \
+                patch('vvsule.background_tasks.database.get_session', get_session), \
+                patch('vvsule.background_tasks.crud.get_cached_schedule_entry', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.crud.get_user_by_telegram_id', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.crud.save_schedule_cache', AsyncMock()), \
+                patch('vvsule.background_tasks.prefetch_week'), \
+                patch('vvsule.background_tasks.parse_vvsu_timetable', side_effect=parse):
+            # Act
+            await parse_and_send_schedule(
+                bot=mock_bot,
+                chat_id=12345,
+                group_name="БПИ-25-8",
+                user_id=67890,
+                week_type="current",
+                offset=0
+            )
+
+        # Assert
+        preview_text = mock_bot.send_message.call_args[0][1]
+        assert "Первая неделя" in preview_text
+        assert "Загружаю следующие недели" in preview_text
+        final = mock_bot.edit_message_text.call_args.kwargs
+        assert final['message_id'] == 777
+        assert "Неделя 1 из 3" in final['text']
+
+    @pytest.mark.asyncio
+    async def test_background_task_single_week_skips_preview(self, mock_session):
+        """Тест: при парсинге одной недели промежуточное сообщение не показывается"""
+        # Arrange
+        import time
+        from vvsule.background_tasks import parse_and_send_schedule
+
+        mock_bot = AsyncMock()
+        mock_bot.send_message.return_value = Mock(message_id=777)
+        weeks = [[{'Дата': 'Понедельник', 'Время': '09:00', 'Дисциплина': 'Первая неделя'}]]
+
+        def parse(group_name, on_progress=None, **_kwargs):
+            on_progress("week", index=0, lessons=weeks[0])
+            time.sleep(0.3)
+            return {'success': True, 'weeks': weeks}
+
+        async def get_session():
+            yield mock_session
+
+        with patch('vvsule.background_tasks.QUEUE_NOTICE_DELAY', 0.01), \
+                patch.object(config.parser, 'eager_weeks', 1), \
+                patch('vvsule.background_tasks.database.get_session', get_session), \
+                patch('vvsule.background_tasks.crud.get_cached_schedule_entry', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.crud.get_user_by_telegram_id', AsyncMock(return_value=None)), \
+                patch('vvsule.background_tasks.crud.save_schedule_cache', AsyncMock()), \
+                patch('vvsule.background_tasks.prefetch_week'), \
+                patch('vvsule.background_tasks.parse_vvsu_timetable', side_effect=parse):
+            # Act
+            await parse_and_send_schedule(
+                bot=mock_bot,
+                chat_id=12345,
+                group_name="БПИ-25-8",
+                user_id=67890,
+                week_type="current",
+                offset=0
+            )
+
+        # Assert
+        mock_bot.send_message.assert_called_once()
+        final_text = mock_bot.send_message.call_args[0][1]
+        assert "Загружаю следующие недели" not in final_text
+        assert "Первая неделя" in final_text
+
     @pytest.mark.asyncio
     async def test_web_api_integration(self):
         """Тест интеграции веб-API с парсером"""
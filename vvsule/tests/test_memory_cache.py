@@ -0,0 +1,123 @@
+"""
+Тесты для кэша в памяти vvsule/memory_cache.py
+
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, AsyncMock, patch
+from vvsule.memory_cache import MemoryCache
+from vvsule.database.crud import crud
+from vvsule.database.models import ScheduleCache
+from vvsule.schedule_calendar import current_week_key
+
+
+class TestMemoryCache:
+    """Тесты для класса MemoryCache"""
+
+    def test_get_put(self):
+        """Тест попадания и промаха"""
+        # Arrange
+        cache = MemoryCache(max_entries=10, max_bytes=1000, ttl=60)
+
+        # Act
+        cache.put("БПИ-25-1", {'weeks': []}, size=10)
+
+        # Assert
+        assert cache.get("БПИ-25-1") == {'weeks': []}
+        assert cache.get("БПИ-25-2") is None
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['bytes'] == 10
+
+    def test_lru_eviction_by_entries(self):
+        """Тест вытеснения давно не использованной записи"""
+        # Arrange
+        cache = MemoryCache(max_entries=2, max_bytes=1000, ttl=60)
+        cache.put("А", 1, size=1)
+        cache.put("Б", 2, size=1)
+        cache.get("А")
+
+        # Act
+        cache.put("В", 3, size=1)
+
+        # Assert
+        assert cache.get("Б") is None
+        assert cache.get("А") == 1
+        assert cache.get("В") == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_eviction_by_bytes(self):
+        """Тест вытеснения по суммарному размеру"""
+        # Arrange
+        cache = MemoryCache(max_entries=10, max_bytes=100, ttl=60)
+        cache.put("А", 1, size=60)
+
+        # Act
+        cache.put("Б", 2, size=60)
+        cache.put("Огромная", 3, size=500)
+
+        # Assert
+        assert cache.get("А") is None
+        assert cache.get("Б") == 2
+        assert cache.get("Огромная") is None
+        assert cache.stats()['bytes'] == 60
+
+    def test_ttl_expiration(self):
+        """Тест истечения TTL"""
+        # Arrange
+        cache = MemoryCache(max_entries=10, max_bytes=100, ttl=60)
+        cache.put("А", 1, size=1)
+
+        # Act
+        with patch('vvsule.memory_cache.time.monotonic', return_value=10 ** 9):
+            result = cache.get("А")
+
+        # Assert
+        assert result is None
+        assert cache.stats()['expirations'] == 1
+        assert cache.stats()['entries'] == 0
+
+    def test_invalidate(self):
+        """Тест удаления записи"""
+        # Arrange
+        cache = MemoryCache(max_entries=10, max_bytes=100, ttl=60)
+        cache.put("А", 1, size=1)
+
+        # Act
+        cache.invalidate("А")
+
+        # Assert
+        assert cache.get("А") is None
+        assert cache.stats()['invalidations'] == 1
+
+    @pytest.mark.asyncio
+    async def test_crud_uses_memory_tier_and_save_invalidates(self):
+        """Тест: повторное чтение без запроса к БД, запись сбрасывает кэш"""
+        # Arrange
+        session = AsyncMock()
+        cache_row = ScheduleCache(
+            group_name="БПИ-25-1",
+            week_type=current_week_key(),
+            last_updated=datetime.utcnow()
+        )
+        lessons = []
+        result = Mock()
+        result.all.side_effect = lambda: [(cache_row.week_type, cache_row.last_updated, lesson) for lesson in lessons] \
+            or [(cache_row.week_type, cache_row.last_updated, None)]
+        result.scalars.return_value.all.return_value = [cache_row]
+        session.execute.return_value = result
+        session.add_all = Mock(side_effect=lessons.extend)
+
+        # Act
+        first = await crud.get_cached_schedule(session, "БПИ-25-1", "all_weeks")
+        second = await crud.get_cached_schedule(session, "бпи-25-1", "all_weeks")
+        await crud.save_schedule_cache(session, "БПИ-25-1", "all_weeks", {'weeks': [[{'Дисциплина': 'Физика'}]]})
+        third = await crud.get_cached_schedule(session, "БПИ-25-1", "all_weeks")
+
+        # Assert
+        assert first['weeks'] == second['weeks'] == [[]]
+        assert third['weeks'] == [[{'Дисциплина': 'Физика'}]]
+        # Чтение, запись (поиск недель и удаление их занятий) и чтение после сброса
+        assert session.execute.await_count == 4
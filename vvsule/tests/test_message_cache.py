@@ -0,0 +1,134 @@
+"""
+Тесты для готовых сообщений бота и пропуска лишних правок vvsule/message_cache.py
+
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText, Response, SendMessage
+from aiogram.types import Message
+from vvsule.message_cache import MessageDigests, rendered_messages
+from vvsule.background_tasks import render_week_message, prerender_weeks
+from vvsule.cache_policy import assemble_schedule, week_rows
+from vvsule.schedule_calendar import current_week_key
+
+
+class TestMessageCache:
+    """Тесты кэша готовых сообщений с расписанием недели"""
+
+    def setup_method(self):
+        """Очистка кэша перед каждым тестом"""
+        rendered_messages.clear()
+
+    def test_render_once_per_content(self):
+        """Тест: повторная навигация не форматирует неделю заново, изменение занятий - форматирует"""
+        # Arrange
+        week = current_week_key()
+        lessons = [{'Время': '09:00 - 10:30', 'Дисциплина': 'Физика'}]
+        changed = [{'Время': '09:00 - 10:30', 'Дисциплина': 'Химия'}]
+
+        with patch('vvsule.background_tasks.format_schedule_for_telegram', return_value="занятия") as mock_format:
+            # Act
+            first = render_week_message("БПИ-25-1", week, lessons, "current", 0, 3)
+            second = render_week_message("БПИ-25-1", week, lessons, "current", 0, 3)
+            third = render_week_message("БПИ-25-1", week, changed, "current", 0, 3)
+
+        # Assert
+        assert second is first
+        assert third is not first
+        assert mock_format.call_count == 2
+        assert first.parts[0].endswith("занятия")
+
+    def test_prerendered_at_ingest(self):
+        """Тест: сообщение недели готово сразу после парсинга и находится по хэшу из кэша"""
+        # Arrange
+        schedule = {'success': True, 'weeks': [[{'Время': '09:00 - 10:30', 'Дисциплина': 'Физика'}]]}
+        prerender_weeks("БПИ-25-1", schedule)
+        (week, _lessons, _hash), = week_rows(schedule)
+        stored = assemble_schedule("БПИ-25-1", {week: (
+            '[{"Время": "09:00 - 10:30", "Дисциплина": "Физика"}]', datetime.utcnow()
+        )})
+
+        with patch('vvsule.background_tasks.format_schedule_for_telegram') as mock_format:
+            # Act
+            message = render_week_message(
+                "БПИ-25-1", week, stored.index.week(week), "current", 0, 3, False, stored.week_hash(week)
+            )
+
+        # Assert
+        mock_format.assert_not_called()
+        assert "Физика" in message.parts[0]
+        assert message.keyboard.inline_keyboard[0][1].callback_data == "schedule_current_БПИ-25-1"
+
+
+class TestMessageDigests:
+    """Тесты пропуска правок, которые не меняют сообщение"""
+
+    @pytest.mark.asyncio
+    async def test_identical_edit_skipped(self):
+        """Тест: повторная правка с тем же текстом и клавиатурой не доходит до Bot API"""
+        # Arrange
+        middleware = MessageDigests()
+        make_request = AsyncMock(return_value=Response(ok=True, result=True))
+        edit = EditMessageText(chat_id=1, message_id=10, text="Неделя 1")
+
+        # Act
+        await middleware(make_request, None, edit)
+        result = await middleware(make_request, None, edit)
+        await middleware(make_request, None, EditMessageText(chat_id=1, message_id=10, text="Неделя 2"))
+
+        # Assert
+        assert result.result is True
+        assert make_request.await_count == 2
+        assert middleware.stats()['skipped_edits'] == 1
+
+    @pytest.mark.asyncio
+    async def test_identical_edit_sent_without_skip(self):
+        """Тест: без skip_unchanged (несколько реплик) повторная правка отправляется"""
+        # Arrange
+        middleware = MessageDigests(skip_unchanged=False)
+        make_request = AsyncMock(return_value=Response(ok=True, result=True))
+        edit = EditMessageText(chat_id=1, message_id=10, text="Неделя 1")
+
+        # Act
+        await middleware(make_request, None, edit)
+        await middleware(make_request, None, edit)
+
+        # Assert
+        assert make_request.await_count == 2
+        assert middleware.stats()['skipped_edits'] == 0
+
+    @pytest.mark.asyncio
+    async def test_not_modified_is_success(self):
+        """Тест: ответ 'message is not modified' считается успешной правкой"""
+        # Arrange
+        middleware = MessageDigests()
+        edit = EditMessageText(chat_id=1, message_id=10, text="Неделя 1")
+        make_request = AsyncMock(side_effect=TelegramBadRequest(
+            edit, "Bad Request: message is not modified: specified new message content is the same"
+        ))
+
+        # Act
+        result = await middleware(make_request, None, edit)
+        await middleware(make_request, None, edit)
+
+        # Assert
+        assert result.result is True
+        make_request.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_sent_message_remembered(self):
+        """Тест: правка только что отправленного сообщения тем же содержимым пропускается"""
+        # Arrange
+        middleware = MessageDigests()
+        sent = Mock(spec=Message, message_id=10)
+        make_request = AsyncMock(return_value=Response(ok=True, result=sent))
+
+        # Act
+        await middleware(make_request, None, SendMessage(chat_id=1, text="Неделя 1"))
+        await middleware(make_request, None, EditMessageText(chat_id=1, message_id=10, text="Неделя 1"))
+
+        # Assert
+        make_request.assert_awaited_once()
@@ -0,0 +1,152 @@
+"""
+Тесты для очереди исходящих запросов бота vvsule/outbound.py
+
+"""
+
+import asyncio
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, Response, SendMessage
+from vvsule.outbound import OutboundDispatcher, OutboundPriority, TokenBucket, sending_priority
+
+
+def make_dispatcher(**kwargs):
+    params = dict(global_rate=10, chat_rate=10, chat_burst=3, group_chat_rate=10, max_retries=2)
+    params.update(kwargs)
+    return OutboundDispatcher(**params)
+
+
+class FakeApi:
+    """make_request, который запоминает порядок запросов и может ответить 429"""
+
+    def __init__(self, retry_after: list = None):
+        self.calls = []
+        self.retry_after = list(retry_after or [])
+
+    async def __call__(self, bot, method):
+        if self.retry_after:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=self.retry_after.pop(0))
+        self.calls.append((getattr(method, 'chat_id', None), getattr(method, 'text', None)))
+        return Response(ok=True, result=True)
+
+
+class TestTokenBucket:
+    """Тесты ведра токенов"""
+
+    def test_burst_then_rate(self):
+        """Тест: capacity запросов сразу, дальше - по rate в секунду"""
+        # Arrange
+        bucket = TokenBucket(rate=2, capacity=2, now=0.0)
+
+        # Act
+        bucket.take(0.0)
+        bucket.take(0.0)
+
+        # Assert
+        assert bucket.delay(0.0) == pytest.approx(0.5)
+        assert bucket.delay(0.5) == 0.0
+
+    def test_pause_blocks_until_deadline(self):
+        """Тест: после RetryAfter токены не выдаются до конца паузы"""
+        # Arrange
+        bucket = TokenBucket(rate=1, capacity=3, now=0.0)
+
+        # Act
+        bucket.pause(0.0, 5)
+
+        # Assert
+        assert bucket.delay(1.0) == pytest.approx(4.0)
+        assert bucket.delay(5.0) == 0.0
+
+
+class TestOutboundDispatcher:
+    """Тесты очереди отправки"""
+
+    @pytest.mark.asyncio
+    async def test_interactive_goes_before_progress(self):
+        """Тест: при исчерпанном общем лимите ответ пользователю уходит раньше промежуточного сообщения"""
+        # Arrange
+        dispatcher = make_dispatcher()
+        dispatcher.global_bucket.tokens = 0
+        api = FakeApi()
+
+        async def progress():
+            with sending_priority(OutboundPriority.PROGRESS):
+                await dispatcher(api, None, SendMessage(chat_id=1, text="место в очереди"))
+
+        # Act
+        progress_task = asyncio.create_task(progress())
+        await asyncio.sleep(0)
+        reply_task = asyncio.create_task(dispatcher(api, None, SendMessage(chat_id=2, text="ответ")))
+        await asyncio.sleep(0)
+        stats = dispatcher.stats()
+        await asyncio.gather(progress_task, reply_task)
+
+        # Assert
+        assert stats['queued_by_priority'] == {'progress': 1, 'interactive': 1}
+        assert [text for _chat, text in api.calls] == ["ответ", "место в очереди"]
+        assert dispatcher.stats()['queued'] == 0
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_chat_limit_does_not_block_other_chats(self):
+        """Тест: занятый чат ждет своего токена, остальные чаты отправляются без очереди"""
+        # Arrange
+        dispatcher = make_dispatcher(global_rate=100, chat_burst=1)
+        api = FakeApi()
+
+        # Act
+        await asyncio.gather(
+            dispatcher(api, None, SendMessage(chat_id=1, text="часть 1")),
+            dispatcher(api, None, SendMessage(chat_id=1, text="часть 2")),
+            dispatcher(api, None, SendMessage(chat_id=2, text="другой чат")),
+        )
+
+        # Assert
+        assert [text for _chat, text in api.calls] == ["часть 1", "другой чат", "часть 2"]
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honored(self):
+        """Тест: после 429 запрос повторяется, а чат приостанавливается"""
+        # Arrange
+        dispatcher = make_dispatcher()
+        api = FakeApi(retry_after=[0])
+
+        # Act
+        response = await dispatcher(api, None, SendMessage(chat_id=1, text="расписание"))
+
+        # Assert
+        assert response.ok is True
+        assert api.calls == [(1, "расписание")]
+        assert dispatcher.stats()['retry_after'] == 1
+        assert dispatcher.stats()['sent'] == 1
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_gives_up(self):
+        """Тест: после max_retries повторов ошибка пробрасывается"""
+        # Arrange
+        dispatcher = make_dispatcher(max_retries=1)
+        api = FakeApi(retry_after=[0, 0])
+
+        # Act & Assert
+        with pytest.raises(TelegramRetryAfter):
+            await dispatcher(api, None, SendMessage(chat_id=1, text="расписание"))
+        assert api.calls == []
+        await dispatcher.close()
+
+    @pytest.mark.asyncio
+    async def test_requests_without_chat_skip_queue(self):
+        """Тест: ответы на кнопки не ждут токенов"""
+        # Arrange
+        dispatcher = make_dispatcher()
+        dispatcher.global_bucket.tokens = 0
+        api = FakeApi()
+
+        # Act
+        await asyncio.wait_for(dispatcher(api, None, AnswerCallbackQuery(callback_query_id="1")), 0.05)
+
+        # Assert
+        assert api.calls == [(None, None)]
+        assert dispatcher.stats()['sent'] == 0
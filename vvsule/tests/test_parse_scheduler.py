@@ -0,0 +1,215 @@
+"""
+Тесты для планировщика парсинга vvsule/parse_scheduler.py
+
+"""
+
+import threading
+import pytest
+from unittest.mock import patch
+from vvsule.parse_scheduler import ParseScheduler, Priority, workers_for_memory
+
+
+class TestParseScheduler:
+    """Тесты для класса ParseScheduler"""
+
+    @pytest.fixture
+    def scheduler(self):
+        scheduler = ParseScheduler(workers=1, name="test")
+        yield scheduler
+        scheduler.close()
+
+    @pytest.fixture
+    def blocker(self, scheduler):
+        """Занимает единственного воркера до вызова release.set()"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+            return "blocked"
+
+        job = scheduler.submit(block, key="blocker")
+        started.wait(5)
+        yield release
+        release.set()
+        job.future.result(5)
+
+    def test_run_returns_result(self, scheduler):
+        """Тест выполнения задачи и возврата результата"""
+        # Act
+        result = scheduler.run(str.upper, "бпи-25-1", key="БПИ-25-1", timeout=5)
+
+        # Assert
+        assert result == "БПИ-25-1"
+        assert scheduler.stats()['completed'] == 1
+
+    def test_priority_order(self, scheduler, blocker):
+        """Тест порядка: пользователи, затем прогрев"""
+        # Arrange
+        order = []
+        jobs = [
+            scheduler.submit(order.append, "warm", key="warm", priority=Priority.WARM),
+            scheduler.submit(order.append, "user-1", key="user-1", priority=Priority.INTERACTIVE),
+            scheduler.submit(order.append, "user-2", key="user-2", priority=Priority.INTERACTIVE),
+        ]
+
+        # Act
+        blocker.set()
+        for job in jobs:
+            job.future.result(5)
+
+        # Assert
+        assert order == ["user-1", "user-2", "warm"]
+
+    def test_concurrency_limited_by_workers(self):
+        """Тест ограничения числа одновременных парсингов"""
+        # Arrange
+        scheduler = ParseScheduler(workers=2, name="test")
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def parse(group):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            threading.Event().wait(0.05)
+            with lock:
+                active[0] -= 1
+            return group
+
+        # Act
+        jobs = [scheduler.submit(parse, f"ГР-{i}", key=f"ГР-{i}") for i in range(6)]
+        results = [job.future.result(5) for job in jobs]
+        scheduler.close()
+
+        # Assert
+        assert results == [f"ГР-{i}" for i in range(6)]
+        assert peak[0] == 2
+
+    def test_same_key_returns_same_job_and_promotes(self, scheduler, blocker):
+        """Тест: повторная задача группы не дублируется и поднимает приоритет"""
+        # Arrange
+        order = []
+        warm = scheduler.submit(order.append, "БПИ-25-1", key="БПИ-25-1", priority=Priority.WARM)
+        scheduler.submit(order.append, "crawl", key="crawl", priority=Priority.WARM)
+
+        # Act
+        interactive = scheduler.submit(order.append, "БПИ-25-1", key="БПИ-25-1", priority=Priority.INTERACTIVE)
+        blocker.set()
+        warm.future.result(5)
+
+        # Assert
+        assert interactive is warm
+        assert interactive.priority == Priority.INTERACTIVE
+        assert order[0] == "БПИ-25-1"
+        assert order.count("БПИ-25-1") == 1
+        assert scheduler.stats()['promoted'] == 1
+
+    def test_queue_info_position_and_eta(self, scheduler, blocker):
+        """Тест места в очереди и оценки времени ожидания"""
+        # Arrange
+        scheduler.avg_duration = 10
+        scheduler.submit(str, "warm", key="warm", priority=Priority.WARM)
+        scheduler.submit(str, "user", key="user", priority=Priority.INTERACTIVE)
+
+        # Act
+        running = scheduler.queue_info("blocker")
+        user = scheduler.queue_info("user")
+        warm = scheduler.queue_info("warm")
+
+        # Assert
+        assert running['state'] == 'running'
+        assert running['position'] == 0
+        assert user == {'job_id': user['job_id'], 'state': 'queued', 'position': 1, 'eta_seconds': 20}
+        assert warm['position'] == 2
+        assert warm['eta_seconds'] == 30
+        assert scheduler.queue_info("unknown") is None
+
+    def test_exception_propagated(self, scheduler):
+        """Тест передачи исключения вызывающему"""
+        # Arrange
+        def parse(group):
+            raise RuntimeError("browser crashed")
+
+        # Act & Assert
+        with pytest.raises(RuntimeError, match="browser crashed"):
+            scheduler.run(parse, "БПИ-25-1", key="БПИ-25-1", timeout=5)
+        assert scheduler.stats()['failed'] == 1
+        assert scheduler.queue_info("БПИ-25-1") is None
+
+    def test_progress_reaches_late_subscriber(self, scheduler):
+        """Тест: подписчик уже поставленной задачи получает прошедшие и новые события"""
+        # Arrange
+        started = threading.Event()
+        release = threading.Event()
+        first, second = [], []
+
+        def parse(group, on_progress=None):
+            on_progress("browser_ready")
+            started.set()
+            release.wait(5)
+            on_progress("week", index=0, lessons=[group])
+            return group
+
+        job = scheduler.submit(parse, "БПИ-25-1", key="БПИ-25-1", priority=Priority.WARM,
+                               on_progress=lambda event, **data: first.append(event))
+        started.wait(5)
+
+        # Act
+        joined = scheduler.submit(parse, "БПИ-25-1", key="БПИ-25-1",
+                                  on_progress=lambda event, **data: second.append((event, data)))
+        release.set()
+        result = job.future.result(5)
+
+        # Assert
+        assert joined is job
+        assert result == "БПИ-25-1"
+        assert first == ["browser_ready", "week"]
+        assert second == [("browser_ready", {}), ("week", {'index': 0, 'lessons': ["БПИ-25-1"]})]
+
+    @pytest.mark.asyncio
+    async def test_run_async(self, scheduler):
+        """Тест асинхронного ожидания результата"""
+        # Act
+        result = await scheduler.run_async(str.upper, "бпи-25-1", key="БПИ-25-1")
+
+        # Assert
+        assert result == "БПИ-25-1"
+
+    def test_close_cancels_queued_jobs(self, scheduler, blocker):
+        """Тест отмены ожидающих задач при остановке"""
+        # Arrange
+        job = scheduler.submit(str, "warm", key="warm", priority=Priority.WARM)
+
+        # Act
+        scheduler.close()
+
+        # Assert
+        assert job.future.cancelled()
+        with pytest.raises(RuntimeError):
+            scheduler.submit(str, "late")
+
+
+class TestWorkersForMemory:
+    """Тесты расчета числа воркеров"""
+
+    def test_explicit_workers(self):
+        """Тест явно заданного числа воркеров"""
+        assert workers_for_memory(max_workers=3, pool_size=2, browser_memory_mb=400) == 3
+
+    def test_workers_limited_by_memory(self):
+        """Тест ограничения по свободной памяти"""
+        with patch('vvsule.parse_scheduler.available_memory_mb', return_value=900):
+            assert workers_for_memory(max_workers=0, pool_size=4, browser_memory_mb=400) == 2
+
+    def test_workers_limited_by_pool(self):
+        """Тест ограничения размером пула браузеров"""
+        with patch('vvsule.parse_scheduler.available_memory_mb', return_value=16000):
+            assert workers_for_memory(max_workers=0, pool_size=2, browser_memory_mb=400) == 2
+
+    def test_at_least_one_worker(self):
+        """Тест минимум одного воркера при нехватке памяти"""
+        with patch('vvsule.parse_scheduler.available_memory_mb', return_value=100):
+            assert workers_for_memory(max_workers=0, pool_size=2, browser_memory_mb=400) == 1
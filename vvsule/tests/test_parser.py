@@ -3,6 +3,7 @@
 
 """
 
+import asyncio
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from vvsule.parser import (
@@ -10,13 +11,35 @@ from vvsule.parser import (
     parse_current_week,
     go_to_next_week,
     parse_schedule_table,
-    setup_driver
+    setup_driver,
+    create_driver_pool,
+    build_lessons_from_rows,
+    EXTRACT_WEEK_SCRIPT,
+    ACTIVE_SLIDE_SCRIPT,
+    timed_wait,
+    wait_stats,
+    find_group_button,
+    schedule_replaced,
+    iter_weeks,
+    iter_vvsu_timetable,
+    aiter_vvsu_timetable,
+    WeekStream,
+    TimetableParseError
 )
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 import logging
 
 
 class TestParser:
     """Тесты для функций парсинга расписания"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_driver_pool(self):
+        """Отдельный пул браузеров на каждый тест, чтобы моки не переиспользовались"""
+        pool = create_driver_pool()
+        with patch('vvsule.parser.driver_pool', pool):
+            yield pool
+        pool.close()
     
     @patch('vvsule.parser.webdriver.Firefox')
     @patch('vvsule.parser.FirefoxService')
@@ -201,4 +224,325 @@ class TestParser:
             assert 'error' in result
             assert "Critical error" in result['error']
             assert result['weeks'] == []
-            mock_logging.error.assert_called()
\ No newline at end of file
+            mock_logging.error.assert_called()
+    @patch('vvsule.parser.setup_driver')
+    def test_parse_vvsu_timetable_reuses_pooled_driver(self, mock_setup_driver):
+        """Тест повторного использования браузера из пула между парсингами"""
+        # Arrange
+        mock_driver = Mock()
+        mock_setup_driver.return_value = mock_driver
+        mock_driver.find_elements.return_value = []  # Группа не найдена
+
+        # Act
+        parse_vvsu_timetable("БПИ-25-1")
+        parse_vvsu_timetable("БПИ-25-2")
+
+        # Assert
+        mock_setup_driver.assert_called_once()
+        mock_driver.quit.assert_not_called()
+
+    def test_build_lessons_from_rows_date_carry_over(self):
+        """Тест переноса даты из ячейки с rowspan на следующие строки"""
+        # Arrange
+        rows = [
+            {
+                'date': {'text': 'Понедельник\n01.01.2024', 'rowspan': '2'},
+                'time': '09:00 - 10:30',
+                'discipline': {'text': 'Математика\nЛекция', 'link': 'https://webinar/1'},
+                'room': '101', 'teacher': 'Иванов И.И.', 'type': 'Лекция'
+            },
+            {
+                'date': None,
+                'time': '11:00 - 12:30',
+                'discipline': {'text': 'Физика'},
+                'room': '102', 'teacher': None, 'type': ''
+            },
+            {
+                'date': {'text': 'Вторник 02.01.2024', 'rowspan': None},
+                'time': '',
+                'discipline': None, 'room': None, 'teacher': None, 'type': None
+            },
+        ]
+
+        # Act
+        result = build_lessons_from_rows(rows)
+
+        # Assert
+        assert result == [
+            {
+                'Дата': 'Понедельник\n01.01.2024',
+                'Время': '09:00 - 10:30',
+                'Дисциплина': 'Математика',
+                'Ссылка на вебинар': 'https://webinar/1',
+                'Аудитория': '101',
+                'Преподаватель': 'Иванов И.И.',
+                'Тип занятия': 'Лекция'
+            },
+            {
+                'Дата': 'Понедельник\n01.01.2024',
+                'Время': '11:00 - 12:30',
+                'Дисциплина': 'Физика',
+                'Аудитория': '102'
+            },
+        ]
+
+    def test_parse_current_week_single_script_call(self):
+        """Тест извлечения всей недели одним вызовом execute_script"""
+        # Arrange
+        mock_driver = Mock()
+        mock_driver.execute_script.return_value = {'rows': [
+            {
+                'date': {'text': 'Понедельник 01.01.2024', 'rowspan': '1'},
+                'time': '09:00 - 10:30',
+                'discipline': {'text': 'Математика'},
+                'room': '101', 'teacher': 'Иванов И.И.', 'type': 'Лекция'
+            }
+        ]}
+
+        # Act
+        with patch('vvsule.parser.config.parser.extraction_mode', 'script'):
+            result = parse_current_week(mock_driver)
+
+        # Assert
+        mock_driver.execute_script.assert_called_once_with(EXTRACT_WEEK_SCRIPT)
+        mock_driver.find_element.assert_not_called()
+        assert result == [{
+            'Дата': 'Понедельник 01.01.2024',
+            'Время': '09:00 - 10:30',
+            'Дисциплина': 'Математика',
+            'Аудитория': '101',
+            'Преподаватель': 'Иванов И.И.',
+            'Тип занятия': 'Лекция'
+        }]
+
+    def test_parse_current_week_empty_table(self):
+        """Тест извлечения пустой недели (таблица есть, строк нет)"""
+        # Arrange
+        mock_driver = Mock()
+        mock_driver.execute_script.return_value = {'rows': []}
+
+        # Act
+        with patch('vvsule.parser.config.parser.extraction_mode', 'script'):
+            result = parse_current_week(mock_driver)
+
+        # Assert
+        assert result == []
+        mock_driver.execute_script.assert_called_once()
+
+    def test_timed_wait_records_duration(self):
+        """Тест записи фактической длительности ожидания"""
+        # Arrange
+        wait_stats.reset()
+        mock_driver = Mock()
+
+        # Act
+        result = timed_wait(mock_driver, "autocomplete", 1, lambda d: "button")
+
+        # Assert
+        assert result == "button"
+        stats = wait_stats.snapshot()['autocomplete']
+        assert stats['count'] == 1
+        assert stats['timeouts'] == 0
+        assert stats['avg_seconds'] < stats['legacy_sleep_seconds']
+        assert stats['saved_seconds_total'] > 0
+
+    def test_timed_wait_timeout_recorded(self):
+        """Тест записи ожидания, завершившегося таймаутом"""
+        # Arrange
+        wait_stats.reset()
+        mock_driver = Mock()
+
+        # Act & Assert
+        with pytest.raises(TimeoutException):
+            timed_wait(mock_driver, "slide_change", 0.05, lambda d: False)
+        assert wait_stats.snapshot()['slide_change']['timeouts'] == 1
+
+    def test_timed_wait_retries_stale_group_button(self):
+        """Тест повторного поиска кнопки группы после перерисовки списка"""
+        # Arrange
+        stale_button = Mock()
+        type(stale_button).text = property(Mock(side_effect=StaleElementReferenceException()))
+        fresh_button = Mock()
+        fresh_button.text = "БПИ-25-1"
+        mock_driver = Mock()
+        mock_driver.find_elements.side_effect = [[stale_button], [fresh_button]]
+
+        # Act
+        result = timed_wait(
+            mock_driver, "autocomplete", 1,
+            lambda d: find_group_button(d, "БПИ-25-1")
+        )
+
+        # Assert
+        assert result is fresh_button
+        assert mock_driver.find_elements.call_count == 2
+
+    def test_schedule_replaced_waits_for_previous_table(self):
+        """Тест: строки таблицы прошлой группы не считаются загруженным расписанием"""
+        # Arrange
+        previous_table = Mock()
+        previous_table.is_enabled.side_effect = [True, StaleElementReferenceException()]
+        mock_driver = Mock()
+        mock_driver.execute_script.return_value = 5
+        condition = schedule_replaced([previous_table])
+
+        # Act
+        before_replace = condition(mock_driver)
+        after_replace = condition(mock_driver)
+
+        # Assert
+        assert before_replace is False
+        assert after_replace == 5
+
+    def test_go_to_next_week_waits_for_slide_change(self):
+        """Тест ожидания смены активного слайда вместо фиксированной паузы"""
+        # Arrange
+        mock_driver = Mock()
+        slides = iter([0, -1, -1, 1])  # до клика, анимация, анимация, новый слайд
+
+        def execute_script(script, *args):
+            if script == ACTIVE_SLIDE_SCRIPT:
+                return next(slides)
+            return None
+
+        mock_driver.execute_script.side_effect = execute_script
+
+        # Act
+        result = go_to_next_week(mock_driver)
+
+        # Assert
+        assert result is True
+        assert next(slides, None) is None  # все состояния карусели прочитаны
+
+    def test_go_to_next_week_slide_not_changed(self):
+        """Тест отсутствия следующей недели (карусель не перелистнулась)"""
+        # Arrange
+        mock_driver = Mock()
+        mock_driver.execute_script.return_value = 2
+
+        # Act
+        with patch('vvsule.parser.config.parser.wait_slide_timeout', 0.05):
+            result = go_to_next_week(mock_driver)
+
+        # Assert
+        assert result is False
+
+
+class TestWeekStreaming:
+    """Тесты для потокового парсинга по неделям"""
+
+    def test_iter_weeks_yields_current_week_first(self):
+        """Тест: текущая неделя отдается до перехода к следующей"""
+        # Arrange
+        week_1 = [{'Дата': 'Понедельник 01.09.2025', 'Время': '09:00'}]
+        week_2 = [{'Дата': 'Понедельник 08.09.2025', 'Время': '11:00'}]
+
+        with patch('vvsule.parser.timed_wait'), \
+                patch('vvsule.parser.parse_current_week', side_effect=[week_1, week_2]), \
+                patch('vvsule.parser.go_to_next_week', side_effect=[True, False]) as mock_next_week:
+            weeks = iter_weeks(Mock(find_elements=Mock(return_value=[])), "БПИ-25-1")
+
+            # Act
+            first = next(weeks)
+            calls_after_first = mock_next_week.call_count
+            rest = list(weeks)
+
+        # Assert
+        assert first == week_1
+        assert calls_after_first == 0
+        assert rest == [week_2]
+
+    def test_iter_weeks_group_not_found(self):
+        """Тест ошибки для несуществующей группы"""
+        # Arrange
+        with patch('vvsule.parser.timed_wait', side_effect=[Mock(), TimeoutException()]):
+            # Act & Assert
+            with pytest.raises(TimetableParseError, match="не найдена"):
+                list(iter_weeks(Mock(), "НЕТ-ГРУППЫ"))
+
+    def test_iter_vvsu_timetable_group_not_found_keeps_driver(self):
+        """Тест: браузер после ненайденной группы возвращается в пул исправным"""
+        # Arrange
+        pool = create_driver_pool()
+
+        with patch('vvsule.parser.setup_driver', return_value=Mock(find_elements=Mock(return_value=[]))), \
+                patch('vvsule.parser.driver_pool', pool), \
+                patch('vvsule.parser.iter_weeks', side_effect=TimetableParseError("Группа НЕТ-ГРУППЫ не найдена")):
+            # Act
+            with pytest.raises(TimetableParseError, match="не найдена"):
+                list(iter_vvsu_timetable("НЕТ-ГРУППЫ"))
+            stats = pool.stats()
+            driver = pool._idle[0].driver
+            pool.close()
+
+        # Assert
+        assert stats['idle'] == 1
+        assert stats['broken'] == 0
+        assert driver.quit.call_count == 1  # Только при закрытии пула
+
+    def test_iter_vvsu_timetable_closed_early_returns_driver(self):
+        """Тест: браузер закрытого раньше времени генератора возвращается в пул исправным"""
+        # Arrange
+        pool = create_driver_pool()
+        week_1 = [{'Дата': 'Понедельник 01.09.2025', 'Время': '09:00'}]
+
+        with patch('vvsule.parser.setup_driver', return_value=Mock(find_elements=Mock(return_value=[]))), \
+                patch('vvsule.parser.driver_pool', pool), \
+                patch('vvsule.parser.iter_weeks', return_value=iter([week_1, week_1])):
+            weeks = iter_vvsu_timetable("БПИ-25-1")
+
+            # Act
+            first = next(weeks)
+            weeks.close()
+            stats = pool.stats()
+            driver = pool._idle[0].driver
+            pool.close()
+
+        # Assert
+        assert first == week_1
+        assert stats['idle'] == 1
+        assert stats['broken'] == 0
+        driver.get.assert_called_with(pool.home_url)
+        assert driver.quit.call_count == 1  # Только при закрытии пула
+
+    @pytest.mark.asyncio
+    async def test_week_stream_takes_missing_weeks_from_result(self):
+        """Тест: недели, не пришедшие через on_progress, берутся из результата"""
+        # Arrange
+        stream = WeekStream()
+        stream.on_progress("browser_ready")
+        stream.on_progress("week", index=0, lessons=['первая'])
+        await asyncio.sleep(0)
+        stream.finish({'success': True, 'weeks': [['первая'], ['вторая']]})
+
+        # Act
+        weeks = [item async for item in stream]
+
+        # Assert
+        assert weeks == [(0, ['первая']), (1, ['вторая'])]
+
+    @pytest.mark.asyncio
+    async def test_aiter_vvsu_timetable_streams_through_scheduler(self):
+        """Тест асинхронного итератора по неделям через планировщик"""
+        # Arrange
+        def parse(group_name, on_progress=None):
+            on_progress("week", index=0, lessons=['первая'])
+            on_progress("week", index=1, lessons=['вторая'])
+            return {'success': True, 'weeks': [['первая'], ['вторая']]}
+
+        with patch('vvsule.parser.parse_vvsu_timetable', side_effect=parse):
+            # Act
+            weeks = [lessons async for lessons in aiter_vvsu_timetable("бпи-25-7")]
+
+        # Assert
+        assert weeks == [['первая'], ['вторая']]
+
+    @pytest.mark.asyncio
+    async def test_aiter_vvsu_timetable_raises_on_error(self):
+        """Тест ошибки асинхронного итератора при неудачном парсинге"""
+        # Arrange
+        with patch('vvsule.parser.parse_vvsu_timetable',
+                   return_value={'success': False, 'error': 'Группа не найдена', 'weeks': []}):
+            # Act & Assert
+            with pytest.raises(TimetableParseError, match="Группа не найдена"):
+                [lessons async for lessons in aiter_vvsu_timetable("НЕТ-ГРУППЫ")]
@@ -0,0 +1,75 @@
+"""
+Тесты для календаря расписания vvsule/schedule_calendar.py
+
+"""
+
+from datetime import date, time, datetime
+from vvsule.schedule_calendar import (
+    ScheduleIndex,
+    current_week_key,
+    parse_lesson_date,
+    parse_time_range,
+    schedule_week_keys,
+    shift_week,
+    week_key
+)
+
+
+class TestScheduleCalendar:
+    """Тесты ключей недель и разбора дат"""
+
+    def test_week_keys(self):
+        """Тест ключей недель по времени Владивостока"""
+        # Act & Assert
+        assert week_key(date(2025, 9, 1)) == "2025-W36"
+        # Воскресенье 15:00 UTC - во Владивостоке уже понедельник
+        assert current_week_key(datetime(2025, 9, 7, 15, 0)) == "2025-W37"
+        assert shift_week("2025-W52", 1) == "2026-W01"
+
+    def test_parse_date_and_time(self):
+        """Тест разбора подписи даты и интервала времени"""
+        # Act & Assert
+        assert parse_lesson_date('Понедельник\n01.09.2025') == date(2025, 9, 1)
+        assert parse_lesson_date('Вторник, 2 сентября 2025') == date(2025, 9, 2)
+        assert parse_lesson_date('Понедельник') is None
+        assert parse_lesson_date('31.02.2025') is None
+        assert parse_time_range('09:00 - 10:30') == (time(9, 0), time(10, 30))
+        assert parse_time_range('8.30–10.00') == (time(8, 30), time(10, 0))
+        assert parse_time_range('по расписанию') == (None, None)
+
+    def test_week_keys_from_lesson_dates(self):
+        """Тест: неделя определяется датами занятий, неделя без дат - позицией"""
+        # Arrange
+        now = datetime(2025, 9, 3, 12, 0)
+        dated = {'weeks': [[{'Дата': 'Понедельник\n08.09.2025'}], []]}
+        undated = {'weeks': [[], []], 'start_week': 1}
+
+        # Act
+        dated_keys = schedule_week_keys(dated, now)
+        undated_keys = schedule_week_keys(undated, now)
+
+        # Assert
+        assert dated_keys == ["2025-W37", "2025-W38"]
+        assert undated_keys == ["2025-W37", "2025-W38"]
+
+
+class TestScheduleIndex:
+    """Тесты поиска недель и дней по индексу"""
+
+    def test_lookups(self):
+        """Тест текущей и следующей недели, сегодня и завтра"""
+        # Arrange
+        now = datetime(2025, 9, 2, 1, 0)  # Вторник 11:00 во Владивостоке
+        monday = {'Дата': 'Понедельник\n01.09.2025', 'Дисциплина': 'Физика'}
+        wednesday = {'Дата': 'Среда\n03.09.2025', 'Дисциплина': 'Химия'}
+        next_monday = {'Дата': 'Понедельник\n08.09.2025', 'Дисциплина': 'История'}
+
+        # Act
+        index = ScheduleIndex.from_schedule({'weeks': [[monday, wednesday], [next_monday]]}, now)
+
+        # Assert
+        assert index.current_week(now) == [monday, wednesday]
+        assert index.next_week(now) == [next_monday]
+        assert index.today(now) == []
+        assert index.tomorrow(now) == [wednesday]
+        assert index.day(date(2025, 9, 15)) is None  # Неделя не загружена
@@ -0,0 +1,181 @@
+"""
+Тесты для фоновых задач загрузки расписания vvsule/schedule_jobs.py и их SSE-API
+
+"""
+
+import json
+import threading
+import pytest
+from unittest.mock import patch
+import main as web
+from vvsule.schedule_jobs import ScheduleJobRegistry, ScheduleJob
+
+
+def parse_sse(text):
+    """События из тела text/event-stream: [(тип, данные)]"""
+    events = []
+    for block in text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class TestScheduleJob:
+    """Тесты для классов ScheduleJob и ScheduleJobRegistry"""
+
+    def test_registry_coalesces_active_job(self):
+        """Тест одной активной задачи на группу"""
+        # Arrange
+        registry = ScheduleJobRegistry(retention=300)
+
+        # Act
+        first, first_created = registry.get_or_create("БПИ-25-1")
+        second, second_created = registry.get_or_create("БПИ-25-1")
+        first.publish("done", success=True)
+        third, third_created = registry.get_or_create("БПИ-25-1")
+
+        # Assert
+        assert (first_created, second_created, third_created) == (True, False, True)
+        assert second is first
+        assert third is not first
+        assert registry.get(first.id) is first
+
+    def test_registry_purges_finished_jobs(self):
+        """Тест удаления завершенных задач после retention"""
+        # Arrange
+        registry = ScheduleJobRegistry(retention=0)
+        job, _created = registry.get_or_create("БПИ-25-1")
+        job.publish("error", message="Ошибка")
+        job.finished_at -= 1
+
+        # Act
+        found = registry.get(job.id)
+
+        # Assert
+        assert found is None
+        assert registry.stats() == {'jobs': 0, 'active': 0}
+
+    def test_stream_replays_after_last_event_id(self):
+        """Тест продолжения потока с Last-Event-ID"""
+        # Arrange
+        job = ScheduleJob("БПИ-25-1")
+        job.publish("queued", position=1, eta_seconds=15)
+        job.publish("week", index=0, lessons=[])
+        job.publish("done", success=True)
+
+        # Act
+        events = parse_sse("".join(job.stream(last_id=1)))
+
+        # Assert
+        assert [event for event, _data in events] == ["week", "done"]
+
+    def test_stream_waits_for_events_with_keepalive(self):
+        """Тест: поток ждет новых событий и шлет keepalive"""
+        # Arrange
+        job = ScheduleJob("БПИ-25-1")
+        stream = job.stream(heartbeat=0.01)
+        next(stream)  # retry
+
+        # Act
+        keepalive = next(stream)
+        threading.Timer(0.05, job.publish, args=("done",), kwargs={'success': True}).start()
+        rest = "".join(stream)
+
+        # Assert
+        assert keepalive == ": keepalive\n\n"
+        assert parse_sse(rest) == [("done", {'success': True})]
+
+
+class TestScheduleJobApi:
+    """Тесты /api/schedule с фоновой задачей и потока событий"""
+
+    @pytest.fixture
+    def client(self):
+        return web.app.test_client()
+
+    def test_cold_schedule_returns_job_and_streams_weeks(self, client, sample_schedule_data):
+        """Тест: при промахе кэша сразу возвращается задача, недели приходят по одной"""
+        # Arrange
+        release = threading.Event()
+
+        def parse(group_name, on_progress=None, **_kwargs):
+            release.wait(5)
+            on_progress("browser_ready")
+            for index, lessons in enumerate(sample_schedule_data['weeks']):
+                on_progress("week", index=index, lessons=lessons)
+            return sample_schedule_data
+
+        with patch('main.get_cached_schedule_entry', return_value=None), \
+                patch('main.parse_vvsu_timetable', side_effect=parse), \
+                patch('main.save_schedule_cache') as mock_save:
+            # Act
+            response = client.get('/api/schedule?group=БПИ-25-9')
+            data = response.get_json()
+            release.set()
+            stream = client.get(data['events_url'])
+            events = parse_sse(stream.get_data(as_text=True))
+
+        # Assert
+        assert response.status_code == 202
+        assert data['pending'] is True
+        assert stream.mimetype == 'text/event-stream'
+        assert [event for event, _data in events] == ["queued", "browser_ready", "week", "week", "done"]
+        assert events[2][1] == {'index': 0, 'lessons': sample_schedule_data['weeks'][0]}
+        assert events[-1][1]['weeks_count'] == 2
+        mock_save.assert_called_once_with('БПИ-25-9', sample_schedule_data)
+
+        status = client.get(data['status_url']).get_json()
+        assert status['state'] == 'done'
+        assert status['weeks_parsed'] == 2
+
+    def test_job_follows_parse_already_in_queue(self, client, sample_schedule_data):
+        """Тест: задача подписывается на уже идущий парсинг группы (фоновое обновление)"""
+        # Arrange
+        started = threading.Event()
+        release = threading.Event()
+
+        def parse(group_name, on_progress=None, **_kwargs):
+            on_progress("browser_ready")
+            started.set()
+            release.wait(5)
+            for index, lessons in enumerate(sample_schedule_data['weeks']):
+                on_progress("week", index=index, lessons=lessons)
+            return sample_schedule_data
+
+        with patch('main.get_cached_schedule_entry', return_value=None), \
+                patch('main.parse_vvsu_timetable', side_effect=parse) as mock_parse, \
+                patch('main.save_schedule_cache'):
+            web.refresh_schedule_in_background('БПИ-25-8')
+            started.wait(5)
+
+            # Act
+            data = client.get('/api/schedule?group=БПИ-25-8').get_json()
+            release.set()
+            events = parse_sse(client.get(data['events_url']).get_data(as_text=True))
+
+        # Assert
+        assert [event for event, _data in events] == ["queued", "browser_ready", "week", "week", "done"]
+        mock_parse.assert_called_once()
+
+    def test_parse_error_is_streamed(self, client):
+        """Тест события error при неудачном парсинге"""
+        # Arrange
+        with patch('main.get_cached_schedule_entry', return_value=None), \
+                patch('main.parse_vvsu_timetable',
+                      return_value={'success': False, 'error': 'Группа не найдена', 'weeks': []}):
+            # Act
+            data = client.get('/api/schedule?group=НЕТ-ГРУППЫ').get_json()
+            events = parse_sse(client.get(data['events_url']).get_data(as_text=True))
+
+        # Assert
+        assert events[-1][0] == "error"
+        assert 'Группа не найдена' in events[-1][1]['message']
+
+    def test_unknown_job_returns_404(self, client):
+        """Тест 404 для несуществующей задачи"""
+        # Act
+        response = client.get('/api/schedule/jobs/missing/events')
+
+        # Assert
+        assert response.status_code == 404
@@ -0,0 +1,166 @@
+"""
+Тесты для объединения запросов vvsule/single_flight.py
+
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from vvsule.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Тесты для класса SingleFlight"""
+
+    def test_concurrent_threads_share_one_call(self):
+        """Тест одного вызова на группу при одновременных запросах из потоков"""
+        # Arrange
+        flight = SingleFlight("test")
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def parse(group):
+            calls.append(group)
+            started.set()
+            release.wait(5)
+            return {'success': True, 'group_name': group}
+
+        results = []
+
+        def worker():
+            results.append(flight.do("БПИ-25-1", parse, "БПИ-25-1"))
+
+        # Act
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while flight.stats()['coalesced'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        # Assert
+        assert calls == ["БПИ-25-1"]
+        assert len(results) == 5
+        assert all(result is results[0] for result in results)
+        assert flight.stats() == {'executed': 1, 'coalesced': 4, 'max_waiters': 5, 'in_flight': 0}
+
+    def test_different_keys_not_coalesced(self):
+        """Тест независимых вызовов для разных групп"""
+        # Arrange
+        flight = SingleFlight("test")
+
+        # Act
+        first = flight.do("БПИ-25-1", str.lower, "БПИ-25-1")
+        second = flight.do("БПИ-25-2", str.lower, "БПИ-25-2")
+
+        # Assert
+        assert first == "бпи-25-1"
+        assert second == "бпи-25-2"
+        assert flight.stats()['executed'] == 2
+
+    def test_key_released_after_call(self):
+        """Тест повторного вызова после завершения предыдущего"""
+        # Arrange
+        flight = SingleFlight("test")
+        calls = []
+
+        # Act
+        flight.do("БПИ-25-1", calls.append, 1)
+        flight.do("БПИ-25-1", calls.append, 2)
+
+        # Assert
+        assert calls == [1, 2]
+        assert not flight.in_flight("БПИ-25-1")
+
+    def test_exception_propagated_to_all_waiters(self):
+        """Тест передачи исключения всем ожидающим"""
+        # Arrange
+        flight = SingleFlight("test")
+
+        def parse(group):
+            raise RuntimeError("site down")
+
+        # Act & Assert
+        with pytest.raises(RuntimeError, match="site down"):
+            flight.do("БПИ-25-1", parse, "БПИ-25-1")
+        assert not flight.in_flight("БПИ-25-1")
+
+    @pytest.mark.asyncio
+    async def test_async_waiters_share_one_call(self):
+        """Тест одного вызова при одновременных запросах из корутин"""
+        # Arrange
+        flight = SingleFlight("test")
+        calls = []
+
+        def parse(group):
+            calls.append(group)
+            time.sleep(0.1)
+            return {'success': True}
+
+        # Act
+        results = await asyncio.gather(*[
+            flight.do_async("БПИ-25-1", parse, "БПИ-25-1") for _ in range(3)
+        ])
+
+        # Assert
+        assert calls == ["БПИ-25-1"]
+        assert results == [{'success': True}] * 3
+
+    @pytest.mark.asyncio
+    async def test_coroutine_leader_shared_with_thread(self):
+        """Тест ожидания потоком Flask парсинга, запущенного ботом"""
+        # Arrange
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+        calls = []
+
+        async def parse_and_cache(group):
+            calls.append(group)
+            await release.wait()
+            return {'success': True, 'group_name': group}
+
+        # Act
+        leader = asyncio.ensure_future(flight.do_async("БПИ-25-1", parse_and_cache, "БПИ-25-1"))
+        await asyncio.sleep(0)
+        thread_result = asyncio.get_running_loop().run_in_executor(
+            None, flight.do, "БПИ-25-1", parse_and_cache, "БПИ-25-1"
+        )
+        while flight.stats()['coalesced'] < 1:
+            await asyncio.sleep(0.01)
+        release.set()
+
+        # Assert
+        assert await leader == {'success': True, 'group_name': "БПИ-25-1"}
+        assert await thread_result == {'success': True, 'group_name': "БПИ-25-1"}
+        assert calls == ["БПИ-25-1"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_call(self):
+        """Тест: отмена одного ожидающего не отменяет общий парсинг"""
+        # Arrange
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def parse(group):
+            await release.wait()
+            return {'success': True}
+
+        first = asyncio.ensure_future(flight.do_async("БПИ-25-1", parse, "БПИ-25-1"))
+        second = asyncio.ensure_future(flight.do_async("БПИ-25-1", parse, "БПИ-25-1"))
+        await asyncio.sleep(0)
+
+        # Act
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        # Assert
+        assert await second == {'success': True}
+        with pytest.raises(asyncio.CancelledError):
+            await first
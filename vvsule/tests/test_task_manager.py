@@ -0,0 +1,100 @@
+"""
+Тесты для фоновых задач обработчиков vvsule/task_manager.py
+
+"""
+
+import asyncio
+import pytest
+from vvsule.task_manager import TaskManager
+
+
+class TestTaskManager:
+    """Тесты менеджера фоновых задач"""
+
+    @pytest.mark.asyncio
+    async def test_newer_task_supersedes_older(self):
+        """Тест: новое нажатие на том же сообщении отменяет незавершенную задачу"""
+        # Arrange
+        manager = TaskManager(max_concurrent=10)
+        shown = []
+
+        async def navigate(week):
+            await asyncio.sleep(0.05)
+            shown.append(week)
+
+        # Act
+        tasks = [manager.spawn(navigate(week), key=(1, 100)) for week in range(5)]
+        other = manager.spawn(navigate("другое сообщение"), key=(1, 200))
+        await asyncio.gather(*tasks, other, return_exceptions=True)
+
+        # Assert
+        assert shown == [4, "другое сообщение"]
+        stats = manager.stats()
+        assert (stats['superseded'], stats['cancelled'], stats['completed']) == (4, 4, 2)
+        assert manager._by_key == {}
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self):
+        """Тест: сверх max_concurrent задачи ждут очереди"""
+        # Arrange
+        manager = TaskManager(max_concurrent=2)
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        # Act
+        tasks = [manager.spawn(job()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        stats = manager.stats()
+        release.set()
+        await asyncio.gather(*tasks)
+
+        # Assert
+        assert (stats['running'], stats['queued']) == (2, 1)
+        assert manager.stats()['running'] == 0
+        assert manager.stats()['completed'] == 3
+
+    @pytest.mark.asyncio
+    async def test_failure_is_counted(self):
+        """Тест: ошибка задачи не теряется"""
+        # Arrange
+        manager = TaskManager(max_concurrent=1)
+
+        async def broken():
+            raise RuntimeError("сбой")
+
+        # Act
+        task = manager.spawn(broken(), name="broken")
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        # Assert
+        assert manager.stats()['failed'] == 1
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_then_cancels(self):
+        """Тест: при остановке быстрые задачи дорабатывают, зависшие отменяются, новые не запускаются"""
+        # Arrange
+        manager = TaskManager(max_concurrent=10)
+        finished = []
+
+        async def quick():
+            await asyncio.sleep(0.01)
+            finished.append("quick")
+
+        async def stuck():
+            await asyncio.sleep(10)
+
+        manager.spawn(quick())
+        manager.spawn(stuck())
+
+        # Act
+        cancelled = await manager.drain(timeout=0.1)
+        late = manager.spawn(quick())
+
+        # Assert
+        assert cancelled == 1
+        assert finished == ["quick"]
+        assert late is None
+        assert manager.stats()['cancelled'] == 1
@@ -7,7 +7,8 @@ import pytest
 from vvsule.user_state import (
     get_user_week_position,
     set_user_week_position,
-    update_user_week_position
+    update_user_week_position,
+    user_positions
 )
 
 
@@ -226,4 +227,15 @@ class TestUserState:
         # Assert
         assert position == 0  # Значение по умолчанию для новой группы
         # При этом позиция для первой группы не изменилась
-        assert get_user_week_position(user_id, group1) == 3
\ No newline at end of file
+        assert get_user_week_position(user_id, group1) == 3
+        
+    def test_positions_are_bounded(self):
+        """Тест: позиции хранятся в ограниченном кэше, старые вытесняются"""
+        # Act
+        for user_id in range(user_positions.max_entries + 10):
+            set_user_week_position(user_id, "БПИ-25-1", 1)
+        
+        # Assert
+        assert user_positions.stats()['entries'] == user_positions.max_entries
+        assert get_user_week_position(0, "БПИ-25-1") == 0  # Вытеснена
+        assert get_user_week_position(user_positions.max_entries + 9, "БПИ-25-1") == 1
@@ -0,0 +1,257 @@
+"""
+Тесты HTTP-кэширования веб-API (main.py): ETag, Last-Modified, 304
+
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import main as web
+from vvsule.database.models import ScheduleCache
+from vvsule.cache_policy import StoredSchedule, assemble_schedule, make_cached_schedule, serialize_schedule, week_rows
+from vvsule.lessons import make_lessons, week_blobs
+from vvsule.schedule_calendar import current_week_key, week_keys
+
+
+class TestWebCache:
+    """Тесты условных запросов к /api/schedule и /api/weather"""
+
+    @pytest.fixture
+    def client(self):
+        return web.app.test_client()
+
+    @pytest.fixture
+    def schedule_data(self, sample_schedule_data):
+        """Результат парсинга, начинающийся с текущей недели"""
+        return dict(sample_schedule_data, week_keys=week_keys(current_week_key(), 2))
+
+    @pytest.fixture
+    def cached_entry(self, schedule_data):
+        """Запись кэша, собранная как при чтении из БД: строки lessons -> недели -> assemble_schedule"""
+        updated = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=10)
+        rows = [
+            (key, updated, record)
+            for key, lessons, _hash in week_rows(schedule_data)
+            for record in make_lessons('БПИ-25-1', key, lessons)
+        ]
+        return make_cached_schedule(assemble_schedule('БПИ-25-1', week_blobs(rows)))
+
+    def test_schedule_sets_validators(self, client, cached_entry):
+        """Тест заголовков ETag, Last-Modified и Cache-Control"""
+        # Arrange
+        with patch('main.get_cached_schedule_entry', return_value=cached_entry):
+            # Act
+            response = client.get('/api/schedule?group=БПИ-25-1')
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers['ETag'] == f'W/"{cached_entry.stored.content_hash}"'
+        assert response.last_modified.replace(tzinfo=None) == cached_entry.last_updated
+        assert response.cache_control.max_age > 0
+        assert response.get_json()['schedule']['weeks'] == cached_entry.data['weeks']
+
+    def test_schedule_if_none_match_returns_304(self, client, cached_entry):
+        """Тест 304 по совпавшему ETag"""
+        # Arrange
+        etag = f'W/"{cached_entry.stored.content_hash}"'
+
+        with patch('main.get_cached_schedule_entry', return_value=cached_entry):
+            # Act
+            response = client.get('/api/schedule?group=БПИ-25-1', headers={'If-None-Match': etag})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+    def test_schedule_if_modified_since_returns_304(self, client, cached_entry):
+        """Тест 304 по If-Modified-Since"""
+        # Arrange
+        since = (cached_entry.last_updated + timedelta(seconds=1)).strftime('%a, %d %b %Y %H:%M:%S GMT')
+
+        with patch('main.get_cached_schedule_entry', return_value=cached_entry):
+            # Act
+            response = client.get('/api/schedule?group=БПИ-25-1', headers={'If-Modified-Since': since})
+
+        # Assert
+        assert response.status_code == 304
+
+    def test_schedule_changed_content_returns_200(self, client, cached_entry):
+        """Тест полного ответа при изменившемся расписании"""
+        # Arrange
+        with patch('main.get_cached_schedule_entry', return_value=cached_entry):
+            # Act
+            response = client.get('/api/schedule?group=БПИ-25-1', headers={'If-None-Match': '"old-version"'})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
+
+    def test_parser_response_etag_matches_future_cache(self, client, schedule_data, cached_entry):
+        """Тест: ETag свежего парсинга совпадает с ETag, который отдаст следующий запрос из кэша"""
+        # Arrange
+        with patch('main.get_cached_schedule_entry', return_value=None), \
+                patch('main.parse_flight.do', return_value=schedule_data):
+            parsed = client.get('/api/schedule?group=БПИ-25-1&wait=1')
+
+        with patch('main.get_cached_schedule_entry', return_value=cached_entry):
+            # Act
+            cached = client.get('/api/schedule?group=БПИ-25-1', headers={'If-None-Match': parsed.headers['ETag']})
+
+        # Assert
+        assert parsed.status_code == 200
+        assert parsed.cache_control.no_cache
+        assert cached.status_code == 304
+        assert parsed.headers['ETag'] == cached.headers['ETag']
+
+    @pytest.fixture
+    def weather_snapshots(self):
+        """Пустой снимок погоды на каждый тест"""
+        web.weather_snapshots.invalidate('weather')
+        yield web.weather_snapshots
+        web.weather_snapshots.invalidate('weather')
+
+    def test_weather_if_none_match_returns_304(self, client, sample_weather_data, weather_snapshots):
+        """Тест 304 для неизменившейся погоды"""
+        # Arrange
+        with patch('main.get_weekly_weather_sync', return_value=sample_weather_data):
+            first = client.get('/api/weather')
+
+            # Act
+            second = client.get('/api/weather', headers={'If-None-Match': first.headers['ETag']})
+
+        # Assert
+        assert first.status_code == 200
+        assert first.cache_control.max_age == web.config.cache.weather_max_age
+        assert second.status_code == 304
+
+    def test_weather_snapshot_not_regenerated(self, client, sample_weather_data, weather_snapshots):
+        """Тест: пока снимок свежий, погода не запрашивается заново (демо-данные случайны)"""
+        # Arrange
+        responses = [dict(sample_weather_data, forecast=[{'temperature': t}]) for t in (-5, -7)]
+
+        with patch('main.get_weekly_weather_sync', side_effect=responses) as mock_weather:
+            first = client.get('/api/weather')
+
+            # Act
+            second = client.get('/api/weather', headers={'If-None-Match': first.headers['ETag']})
+
+        # Assert
+        assert second.status_code == 304
+        mock_weather.assert_called_once()
+
+    def test_weather_etag_ignores_updated_at(self, client, sample_weather_data, weather_snapshots):
+        """Тест: после истечения снимка тот же прогноз с новым updated_at дает тот же ETag"""
+        # Arrange
+        responses = [dict(sample_weather_data, updated_at=f"2025-09-01T10:0{i}:00") for i in range(2)]
+
+        with patch('main.get_weekly_weather_sync', side_effect=responses):
+            first = client.get('/api/weather')
+            weather_snapshots.invalidate('weather')
+
+            # Act
+            second = client.get('/api/weather', headers={'If-None-Match': first.headers['ETag']})
+
+        # Assert
+        assert second.status_code == 304
+
+
+class TestScheduleWeekApi:
+    """Тесты /api/schedule/week: дальние недели загружаются по запросу"""
+
+    @pytest.fixture
+    def client(self):
+        return web.app.test_client()
+
+    def test_cached_week_served_without_parsing(self, client, sample_schedule_data):
+        """Тест: неделя из кэша отдается без парсинга и предзагрузки"""
+        # Arrange
+        # Собранная из недель запись кэша знает ключи своих недель
+        schedule = dict(sample_schedule_data, week_keys=week_keys(current_week_key(), 2))
+        blob, _weeks_count, _hash = serialize_schedule(schedule)
+        cached = make_cached_schedule(StoredSchedule(blob, datetime.utcnow()))
+
+        with patch('main.get_cached_schedule_entry', return_value=cached), \
+                patch('main.load_week') as mock_load, \
+                patch('main.prefetch_week') as mock_prefetch:
+            # Act
+            data = client.get('/api/schedule/week?group=бпи-25-1&offset=0').get_json()
+
+        # Assert
+        assert data['success'] is True
+        assert data['lessons'] == sample_schedule_data['weeks'][0]
+        assert data['source'] == 'cache'
+        mock_load.assert_not_called()
+        mock_prefetch.assert_not_called()
+
+    def test_missing_week_parsed_and_next_prefetched(self, client):
+        """Тест: недостающая неделя парсится, следующая ставится в предзагрузку"""
+        # Arrange
+        lessons = [{'Дата': 'Понедельник\n15.09.2025', 'Дисциплина': 'Физика'}]
+
+        with patch('main.get_cached_schedule_entry', return_value=None), \
+                patch('main.load_week', return_value={'success': True, 'weeks': [lessons]}) as mock_load, \
+                patch('main.prefetch_week') as mock_prefetch:
+            # Act
+            data = client.get('/api/schedule/week?group=БПИ-25-1&offset=2').get_json()
+
+        # Assert
+        assert data['success'] is True
+        assert data['lessons'] == lessons
+        assert data['source'] == 'parser'
+        mock_load.assert_called_once_with('БПИ-25-1', 2)
+        mock_prefetch.assert_called_once_with('БПИ-25-1', 3)
+
+    def test_week_outside_horizon_rejected(self, client):
+        """Тест недели за пределами горизонта"""
+        # Act
+        data = client.get('/api/schedule/week?group=БПИ-25-1&offset=3').get_json()
+
+        # Assert
+        assert data['success'] is False
+
+    def test_load_week_parses_single_week(self):
+        """Тест: load_week парсит одну неделю в очереди планировщика под ключом недели"""
+        # Arrange
+        result = {'success': True, 'weeks': [[]]}
+
+        with patch('main.parse_vvsu_timetable', return_value=result) as mock_parse, \
+                patch('main.save_schedule_cache'):
+            # Act
+            data = web.load_week('БПИ-25-1', 2)
+
+        # Assert
+        assert data == result
+        mock_parse.assert_called_once()
+        assert mock_parse.call_args.kwargs['start_week'] == 2
+        assert mock_parse.call_args.kwargs['max_weeks'] == 1
+
+
+class TestCacheStatsApi:
+    """Тесты /api/cache/stats"""
+
+    def test_groups_counted_once_across_weeks(self):
+        """Тест: группа с несколькими неделями в кэше считается один раз"""
+        # Arrange
+        engine = create_engine("sqlite://")
+        ScheduleCache.__table__.create(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as session:
+            session.add_all([
+                ScheduleCache(group_name='БПИ-25-1', week_type='2025-W36'),
+                ScheduleCache(group_name='БПИ-25-1', week_type='2025-W37'),
+                ScheduleCache(group_name='БИН-25-1', week_type='2025-W36'),
+            ])
+            session.commit()
+
+        with patch('main.SessionLocal', session_factory), patch('main.DB_AVAILABLE', True):
+            # Act
+            response = web.app.test_client().get('/api/cache/stats')
+
+        # Assert
+        stats = response.get_json()
+        assert stats['success'] is True
+        assert stats['total_cached_groups'] == 2
+        assert sorted(stats['cached_groups']) == ['БИН-25-1', 'БПИ-25-1']
@@ -0,0 +1,186 @@
+"""
+Тесты для режима webhook vvsule/webhook.py на фейковом Bot API benchmarks/fake_telegram.py
+
+"""
+
+import asyncio
+import socket
+import pytest
+from dataclasses import replace
+from unittest.mock import AsyncMock, Mock, patch
+from aiohttp import ClientSession, web
+from aiogram import Bot, Dispatcher, Router, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from benchmarks.fake_telegram import FakeTelegram, message_update, send_updates
+from vvsule.outbound import OutboundDispatcher
+from vvsule.webhook import SECRET_HEADER, create_webhook_app, run_webhook
+from config import config
+
+
+SECRET = "test-secret"
+
+
+class TestWebhook:
+    """Тесты приема обновлений через webhook"""
+
+    async def start(self, handler, max_concurrent=10, chat_interval=0.0, outbound=None):
+        """Фейковый Telegram, бот с обработчиком сообщений и webhook-сервер; возвращает (telegram, адрес webhook, app)"""
+        telegram = FakeTelegram(chat_interval=chat_interval)
+        api_url = await telegram.start()
+        bot = Bot(token="123:abc", session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)))
+        if outbound:
+            bot.session.middleware(outbound)
+
+        router = Router()
+        router.message()(handler)
+        dispatcher = Dispatcher()
+        dispatcher.include_router(router)
+
+        app = create_webhook_app(dispatcher, bot, path="/webhook", secret=SECRET, max_concurrent=max_concurrent)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        async def stop():
+            await runner.cleanup()
+            await bot.session.close()
+            await telegram.stop()
+
+        self.stop = stop
+        return telegram, f"http://127.0.0.1:{port}", app
+
+    @staticmethod
+    async def echo(message: types.Message):
+        await message.answer(f"Эхо: {message.text}")
+
+    @pytest.mark.asyncio
+    async def test_update_is_processed(self):
+        """Тест: обновление с верным секретом обрабатывается, ответ уходит в Bot API"""
+        # Arrange
+        telegram, base_url, app = await self.start(self.echo)
+
+        # Act
+        try:
+            result = await send_updates(f"{base_url}/webhook", [message_update(1, 42, "/today")], SECRET)
+            async with ClientSession() as session:
+                async with session.get(f"{base_url}/healthz") as response:
+                    health = await response.json()
+        finally:
+            await self.stop()
+
+        # Assert
+        assert result['statuses'] == {200: 1}
+        assert telegram.calls_of("sendMessage") == [{'chat_id': '42', 'text': 'Эхо: /today'}]
+        assert health['status'] == 'ok'
+        assert health['received'] == 1
+
+    @pytest.mark.asyncio
+    async def test_wrong_secret_rejected(self):
+        """Тест: запрос без верного секрета не доходит до обработчиков"""
+        # Arrange
+        telegram, base_url, app = await self.start(self.echo)
+
+        # Act
+        try:
+            wrong = await send_updates(f"{base_url}/webhook", [message_update(1, 42, "/start")], "wrong")
+            async with ClientSession() as session:
+                async with session.post(f"{base_url}/webhook", json=message_update(2, 42, "/start")) as response:
+                    missing = response.status
+                async with session.post(f"{base_url}/webhook", data="не json",
+                                        headers={SECRET_HEADER: SECRET}) as response:
+                    broken = response.status
+        finally:
+            await self.stop()
+
+        # Assert
+        assert wrong['statuses'] == {401: 1}
+        assert (missing, broken) == (401, 400)
+        assert telegram.calls == []
+        assert app['webhook'].stats()['rejected'] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Тест: одновременно обрабатывается не больше max_concurrent обновлений"""
+        # Arrange
+        release = asyncio.Event()
+
+        async def slow(message: types.Message):
+            await release.wait()
+
+        telegram, base_url, app = await self.start(slow, max_concurrent=2)
+
+        # Act
+        try:
+            sending = asyncio.create_task(
+                send_updates(f"{base_url}/webhook", [message_update(i, i, "текст") for i in range(1, 6)], SECRET, 5)
+            )
+            await asyncio.sleep(0.2)
+            in_progress = app['webhook'].stats()['in_progress']
+            release.set()
+            result = await sending
+        finally:
+            await self.stop()
+
+        # Assert
+        assert in_progress == 2
+        assert result['statuses'] == {200: 5}
+        assert app['webhook'].stats()['max_in_progress'] == 2
+
+    @pytest.mark.asyncio
+    async def test_flood_limit_is_retried(self):
+        """Тест: ответ 429 фейкового Telegram повторяется очередью отправки"""
+        # Arrange
+        outbound = OutboundDispatcher(global_rate=100, chat_rate=20, chat_burst=2, group_chat_rate=20, max_retries=3)
+
+        async def two_parts(message: types.Message):
+            await message.answer("часть 1")
+            await message.answer("часть 2")
+
+        telegram, base_url, app = await self.start(two_parts, chat_interval=0.5, outbound=outbound)
+
+        # Act
+        try:
+            await send_updates(f"{base_url}/webhook", [message_update(1, 42, "/today")], SECRET)
+        finally:
+            await self.stop()
+            await outbound.close()
+
+        # Assert
+        assert [params['text'] for params in telegram.calls_of("sendMessage")] == ["часть 1", "часть 2"]
+        assert telegram.flood_errors == 1
+        assert outbound.stats()['retry_after'] == 1
+
+    @pytest.mark.asyncio
+    async def test_server_listens_before_set_webhook(self):
+        """Тест: webhook регистрируется, когда сервер уже принимает запросы"""
+        # Arrange
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        webhook_config = replace(config.webhook, enabled=True, url="https://bot.example", secret=SECRET,
+                                 host='127.0.0.1', port=port)
+        health = []
+
+        async def set_webhook(**kwargs):
+            async with ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/healthz") as response:
+                    health.append(response.status)
+
+        bot = Mock(set_webhook=AsyncMock(side_effect=set_webhook))
+
+        # Act
+        with patch('vvsule.webhook.config', replace(config, webhook=webhook_config)):
+            serving = asyncio.create_task(run_webhook(Dispatcher(), bot))
+            for _ in range(50):
+                if health:
+                    break
+                await asyncio.sleep(0.02)
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+
+        # Assert
+        assert health == [200]
+        assert bot.set_webhook.await_args.kwargs['url'] == f"https://bot.example{webhook_config.path}"
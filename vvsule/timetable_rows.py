@@ -0,0 +1,57 @@
+"""
+Сборка занятий из строк таблицы недели.
+Общая часть Selenium- и HTTP-парсера: оба читают ячейки строк в одном формате,
+а занятия из них собираются здесь, поэтому результаты бэкендов совпадают.
+
+"""
+
+
+def build_lessons_from_rows(rows: list) -> list:
+    """
+    Собирает занятия из сырых строк таблицы.
+
+    Каждая строка - словарь с ключами date ({text, rowspan}), time,
+    discipline ({text, link}), room, teacher, type; отсутствующая ячейка - None,
+    ключа link нет, если в ячейке дисциплины нет ссылки.
+    """
+    lessons = []
+    current_date = None
+
+    for row in rows:
+        lesson_data = {}
+
+        # Дата: ячейка с rowspan открывает новый день, строки без ячейки наследуют его
+        date_cell = row.get('date')
+        if date_cell is not None:
+            date_text = (date_cell.get('text') or '').strip()
+            if date_text:
+                if date_cell.get('rowspan') or not current_date:
+                    current_date = date_text
+                lesson_data['Дата'] = current_date
+        elif current_date:
+            lesson_data['Дата'] = current_date
+
+        time_text = (row.get('time') or '').strip()
+        if not time_text:
+            continue  # Пропускаем строки без времени
+        lesson_data['Время'] = time_text
+
+        discipline_cell = row.get('discipline')
+        if discipline_cell is not None:
+            discipline_text = (discipline_cell.get('text') or '').strip()
+            if discipline_text:
+                # Берем первую строку (основное название)
+                lesson_data['Дисциплина'] = discipline_text.split('\n')[0]
+                # Ссылка без href (None) не сохраняется: в lessons ее не отличить от отсутствующей
+                if discipline_cell.get('link'):
+                    lesson_data['Ссылка на вебинар'] = discipline_cell['link']
+
+        for key, field in (('room', 'Аудитория'), ('teacher', 'Преподаватель'), ('type', 'Тип занятия')):
+            text = (row.get(key) or '').strip()
+            if text:
+                lesson_data[field] = text
+
+        if lesson_data:
+            lessons.append(lesson_data)
+
+    return lessons
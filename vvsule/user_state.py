@@ -1,24 +1,40 @@
-"""Хранение состояния пользователей"""
+"""
+Хранение состояния пользователей.
+Навигация по неделям передает неделю в callback data и состояния не требует;
+позиции нужны только для кнопок старого формата без недели, поэтому хранятся
+в ограниченном кэше с TTL.
 
-user_positions = {}  # {user_id: {group_name: current_week_index}}
+"""
+from vvsule.memory_cache import MemoryCache
+
+
+POSITIONS_MAX_ENTRIES = 10000  # Сколько пользователей помнить
+POSITIONS_TTL = 24 * 3600  # Сколько помнить позицию (сек)
+POSITION_SIZE = 64  # Примерный размер записи (байт)
+
+user_positions = MemoryCache(  # {"user_id_group": current_week_index}
+    max_entries=POSITIONS_MAX_ENTRIES,
+    max_bytes=POSITIONS_MAX_ENTRIES * POSITION_SIZE,
+    ttl=POSITIONS_TTL
+)
 
 
 def get_user_week_position(user_id: int, group_name: str) -> int:
     """Получить текущую позицию недели для пользователя"""
     user_key = f"{user_id}_{group_name}"
-    return user_positions.get(user_key, 0)
+    position = user_positions.get(user_key)
+    return position if position is not None else 0
 
 
 def set_user_week_position(user_id: int, group_name: str, week_index: int):
     """Установить позицию недели для пользователя"""
     user_key = f"{user_id}_{group_name}"
-    user_positions[user_key] = week_index
+    user_positions.put(user_key, week_index, size=POSITION_SIZE)
 
 
 def update_user_week_position(user_id: int, group_name: str, offset: int, total_weeks: int) -> int:
     """Обновить позицию недели с учетом смещения"""
-    user_key = f"{user_id}_{group_name}"
-    current = user_positions.get(user_key, 0)
+    current = get_user_week_position(user_id, group_name)
     new_position = current + offset
     
     # Проверяем границы
@@ -27,5 +43,5 @@ def update_user_week_position(user_id: int, group_name: str, offset: int, total_
     elif new_position >= total_weeks:
         new_position = total_weeks - 1
     
-    user_positions[user_key] = new_position
-    return new_position
\ No newline at end of file
+    set_user_week_position(user_id, group_name, new_position)
+    return new_position
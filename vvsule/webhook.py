@@ -0,0 +1,122 @@
+"""
+Получение обновлений через webhook.
+Telegram присылает обновления POST-запросами на aiohttp-сервер, вместо того
+чтобы бот постоянно держал long polling. Запрос без верного секретного токена
+отклоняется, одновременно обрабатывается не больше max_concurrent обновлений
+(остальные ждут, не отвечая Telegram). Состояния между обновлениями в памяти
+реплики не нужны (неделя и группа - в callback data), поэтому реплик можно
+запускать несколько за балансировщиком.
+
+"""
+import asyncio
+import hmac
+import logging
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from pydantic import ValidationError
+from config import config
+
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookHandler:
+    """Обработчик запросов Telegram: проверка секрета и ограничение параллельности"""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret: str, max_concurrent: int):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.secret = secret
+        self.max_concurrent = max_concurrent
+        self._slots = None
+        self.received = 0
+        self.rejected = 0
+        self.failed = 0
+        self.in_progress = 0
+        self.max_in_progress = 0
+
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            self.rejected += 1
+            logging.warning(f"Запрос к webhook без верного секрета от {request.remote}")
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except (ValueError, ValidationError) as e:
+            logging.warning(f"Некорректное обновление от Telegram: {e}")
+            return web.Response(status=400)
+
+        self.received += 1
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            self.in_progress += 1
+            self.max_in_progress = max(self.max_in_progress, self.in_progress)
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception as e:
+                # Telegram повторял бы обновление, пока не получит 200
+                self.failed += 1
+                logging.error(f"Ошибка при обработке обновления {update.update_id}: {e}", exc_info=True)
+            finally:
+                self.in_progress -= 1
+        return web.Response(status=200)
+
+
+    async def health(self, request: web.Request) -> web.Response:
+        """Проверка реплики для балансировщика"""
+        return web.json_response({'status': 'ok', **self.stats()})
+
+
+    def stats(self) -> dict:
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'in_progress': self.in_progress,
+            'max_in_progress': self.max_in_progress,
+        }
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot, path: str, secret: str,
+                       max_concurrent: int) -> web.Application:
+    """aiohttp-приложение с webhook по path и /healthz"""
+    handler = WebhookHandler(dispatcher, bot, secret, max_concurrent)
+    app = web.Application()
+    app['webhook'] = handler
+    app.router.add_post(path, handler.handle)
+    app.router.add_get('/healthz', handler.health)
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot):
+    """
+    Запускает сервер webhook, регистрирует webhook и обслуживает его до отмены.
+    Каждая реплика регистрирует один и тот же адрес балансировщика, а при остановке
+    webhook не удаляется: остальные реплики продолжают получать обновления.
+    """
+    app = create_webhook_app(
+        dispatcher, bot,
+        path=config.webhook.path,
+        secret=config.webhook.secret,
+        max_concurrent=config.webhook.max_concurrent_updates
+    )
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        # Сервер запускается до регистрации: первые обновления Telegram не должны упасть в пустоту
+        site = web.TCPSite(runner, config.webhook.host, config.webhook.port)
+        await site.start()
+        logging.info(f"Webhook слушает {config.webhook.host}:{config.webhook.port}{config.webhook.path}")
+        await bot.set_webhook(
+            url=f"{config.webhook.url}{config.webhook.path}",
+            secret_token=config.webhook.secret,
+            max_connections=config.webhook.max_connections,
+            allowed_updates=dispatcher.resolve_used_update_types()
+        )
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()